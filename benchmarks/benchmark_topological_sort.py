@@ -0,0 +1,86 @@
+"""
+Benchmark topological_sort_dfs_style và topological_sort_by_level trên DAG tổng hợp lớn
+
+Chạy từ thư mục gốc của project:
+    python ./benchmarks/benchmark_topological_sort.py --nodes 20000 --layers 40
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from graph_utils import GraphUtils
+
+
+def build_synthetic_graph(num_nodes: int, num_layers: int, edges_per_node: int,
+                          cycle_ratio: float, seed: int) -> GraphUtils:
+    """Tạo đồ thị phân tầng ngẫu nhiên (cạnh đi từ tầng thấp lên tầng cao) kèm một ít cycle"""
+    rng = random.Random(seed)
+    graph = GraphUtils()
+    layers = [[] for _ in range(num_layers)]
+    for i in range(num_nodes):
+        node = f"item-{i:06d}"
+        layers[i % num_layers].append(node)
+        graph.nodes.add(node)
+        graph.in_degree[node] = 0
+
+    for layer_id in range(1, num_layers):
+        for node in layers[layer_id]:
+            for _ in range(edges_per_node):
+                prereq_layer = rng.randrange(max(0, layer_id - 3), layer_id)
+                graph.add_edge(rng.choice(layers[prereq_layer]), node)
+            # Một ít cycle 2 nodes trong cùng tầng
+            if rng.random() < cycle_ratio:
+                other = rng.choice(layers[layer_id])
+                if other != node:
+                    graph.add_edge(node, other)
+                    graph.add_edge(other, node)
+    return graph
+
+
+def run_benchmark(args):
+    sys.setrecursionlimit(max(10000, args.layers * 100))
+    graph = build_synthetic_graph(args.nodes, args.layers, args.edges, args.cycle_ratio, args.seed)
+    rng = random.Random(args.seed)
+    node_levels = {node: rng.randint(1, 10) for node in graph.nodes}
+
+    start = time.perf_counter()
+    sccs = graph.find_sccs_tarjan()
+    condensation_graph, _, scc_in_degree = graph.build_condensation_graph(sccs)
+    prepare_time = time.perf_counter() - start
+    num_edges = sum(len(v) for v in graph.graph.values())
+    print(f"Graph: {len(graph.nodes)} nodes, {num_edges} edges, {len(sccs)} SCCs "
+          f"(Tarjan + condensation {prepare_time:.3f}s)")
+
+    routines = [
+        ("topological_sort_dfs_style", graph.topological_sort_dfs_style),
+        ("topological_sort_by_level", graph.topological_sort_by_level),
+    ]
+    for name, routine in routines:
+        timings = []
+        stages = None
+        error = None
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            try:
+                stages = routine(sccs, condensation_graph, scc_in_degree, node_levels)
+            except ValueError as e:
+                error = e
+            timings.append(time.perf_counter() - start)
+        covered = sum(len(stage["nodes"]) for stage in stages) if stages else 0
+        status = f"ERROR: {error}" if error else f"{covered}/{len(graph.nodes)} nodes"
+        print(f"{name:28s} best {min(timings) * 1000:8.1f} ms  "
+              f"stages {len(stages) if stages else 0:6d}  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark topological sort routines")
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--layers", type=int, default=40)
+    parser.add_argument("--edges", type=int, default=2, help="prerequisites per node")
+    parser.add_argument("--cycle-ratio", type=float, default=0.02)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    run_benchmark(parser.parse_args())
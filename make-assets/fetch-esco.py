@@ -0,0 +1,314 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Thay cho fetch-esco (Dart): duyệt cây ISCO bằng asyncio với số request đồng thời giới hạn,
+# bỏ trùng URI, cache response trên đĩa (chạy lại chỉ gọi API cho URI mới) và ghi từng
+# occupation ra NDJSON ngay khi nhận được
+INITIAL_URI = "http://data.europa.eu/esco/isco/C25"
+API_URL = "https://ec.europa.eu/esco/api"
+ENDPOINT_OCCUPATION = "/resource/occupation"
+KNOWLEDGE_SKILL_TYPE = "http://data.europa.eu/esco/skill-type/knowledge"
+
+def cache_path(cache_dir: str, uri: str) -> str:
+    """File cache của một URI (cũng là fixture cho FixtureServer)"""
+    return os.path.join(cache_dir, hashlib.sha256(uri.encode('utf-8')).hexdigest()[:32] + ".json")
+
+def parse_occupation(data: dict) -> dict:
+    """Chuyển resource occupation của ESCO sang schema của data.json (giống Occupation.toJson bên Dart)"""
+    links = data.get("_links", {})
+    occupation = {
+        "url": data["uri"],
+        "name": data["title"],
+        "description": data.get("description", {}).get("en", {}).get("literal", ""),
+        "other_name": [str(name) for name in data.get("alternativeLabel", {}).get("en", [])],
+        "essential_skill": [],
+        "optional_skill": [],
+        "essential_knowledge": [],
+        "optional_knowledge": []
+    }
+    for relation, kind in (("hasEssentialSkill", "essential"), ("hasOptionalSkill", "optional")):
+        for skill in links.get(relation, []):
+            # Không có skillType thì coi là skill
+            field = "knowledge" if skill.get("skillType") == KNOWLEDGE_SKILL_TYPE else "skill"
+            occupation[f"{kind}_{field}"].append(skill["title"])
+    return occupation
+
+class EscoCrawler:
+    """Duyệt cây ISCO/occupation của ESCO bằng một hàng đợi và số worker cố định"""
+
+    def __init__(self, api_url: str = API_URL, cache_dir: str = "cache/esco",
+                 concurrency: int = 8, timeout: float = 30.0, max_attempts: int = 3,
+                 refresh: bool = False):
+        """
+        Khởi tạo EscoCrawler
+
+        Args:
+            api_url: URL gốc của ESCO API (hoặc FixtureServer)
+            cache_dir: Thư mục cache response
+            concurrency: Số request đồng thời tối đa
+            timeout: Timeout mỗi request (giây)
+            max_attempts: Số lần thử mỗi URI
+            refresh: Bỏ qua cache, luôn gọi API
+        """
+        self.api_url = api_url.rstrip("/")
+        self.cache_dir = cache_dir
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.refresh = refresh
+        self.stats = {"requests": 0, "cache_hits": 0, "duplicates": 0, "failures": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _request(self, uri: str) -> dict:
+        query = urllib.parse.urlencode({"language": "en-us", "selectedVersion": "v1.2.0", "uris": uri})
+        with urllib.request.urlopen(f"{self.api_url}{ENDPOINT_OCCUPATION}?{query}", timeout=self.timeout) as response:
+            return json.loads(response.read().decode("utf-8"))
+
+    async def fetch(self, uri: str) -> dict:
+        """
+        Lấy resource của URI, ưu tiên cache trên đĩa
+
+        Returns:
+            JSON response của ESCO
+
+        Raises:
+            RuntimeError: Hết số lần thử
+        """
+        path = cache_path(self.cache_dir, uri)
+        if not self.refresh and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                self.stats["cache_hits"] += 1
+                return json.load(file)["response"]
+
+        data = None
+        error = None
+        for attempt in range(self.max_attempts):
+            try:
+                self.stats["requests"] += 1
+                data = await asyncio.to_thread(self._request, uri)
+                break
+            except urllib.error.HTTPError as e:
+                error = f"HTTP {e.code}"
+                if e.code < 500 and e.code != 429:
+                    break  # Lỗi phía client: không retry
+            except (urllib.error.URLError, OSError, ValueError) as e:
+                error = str(e)
+            if attempt + 1 < self.max_attempts:
+                await asyncio.sleep(0.5 * (2 ** attempt))
+        if data is None:
+            raise RuntimeError(f"{uri}: {error}")
+
+        # Ghi cache atomic để lần chạy bị ngắt không để lại file hỏng
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"uri": uri, "response": data}, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return data
+
+    async def crawl(self, root_uri: str, on_occupation) -> int:
+        """
+        Duyệt toàn bộ cây bắt đầu từ root_uri
+
+        Args:
+            root_uri: URI ISCO gốc
+            on_occupation: Callback(occupation_dict) gọi ngay khi parse xong một occupation
+
+        Returns:
+            Số occupation tìm được
+        """
+        queue = asyncio.Queue()
+        seen = {root_uri}
+        queue.put_nowait(root_uri)
+        found = 0
+
+        async def worker():
+            nonlocal found
+            while True:
+                uri = await queue.get()
+                try:
+                    print(f"Fetching {uri} ....")
+                    data = await self.fetch(uri)
+                    for key, resource in data.get("_embedded", {}).items():
+                        if "occupation" in key:
+                            on_occupation(parse_occupation(resource))
+                            found += 1
+                            continue
+                        links = resource.get("_links", {})
+                        for child in links.get("narrowerConcept", []) + links.get("narrowerOccupation", []):
+                            if child["uri"] in seen:
+                                self.stats["duplicates"] += 1
+                                continue
+                            seen.add(child["uri"])
+                            queue.put_nowait(child["uri"])
+                except Exception as e:
+                    self.stats["failures"] += 1
+                    print(f"Failed to fetch: {e}")
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        await queue.join()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        return found
+
+def write_outputs(occupations: list, output_dir: str):
+    """Ghi data.json, knowledge.json, skill.json như fetch-esco (Dart) để make-assets dùng tiếp"""
+    occupations = sorted(occupations, key=lambda o: (o["name"], o["url"]))
+
+    def unique(fields: tuple) -> list:
+        return list(dict.fromkeys(item for o in occupations for field in fields for item in o[field]))
+
+    outputs = {
+        "data.json": occupations,
+        "knowledge.json": unique(("essential_knowledge", "optional_knowledge")),
+        "skill.json": unique(("essential_skill", "optional_skill"))
+    }
+    for filename, data in outputs.items():
+        path = os.path.join(output_dir, filename)
+        with open(path + ".tmp", 'w', encoding='utf-8') as file:
+            json.dump(data, file, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+        print(f"Written {path}")
+
+def fetch_esco(args):
+    os.makedirs(args.output_dir, exist_ok=True)
+    crawler = EscoCrawler(args.api_url, args.cache_dir, args.concurrency, args.timeout, refresh=args.refresh)
+    ndjson_path = os.path.join(args.output_dir, "data.ndjson")
+    occupations = {}
+
+    start_time = time.perf_counter()
+    with open(ndjson_path, 'w', encoding='utf-8') as stream:
+        def on_occupation(occupation: dict):
+            # Một occupation có thể nằm dưới nhiều nhánh: chỉ ghi lần đầu
+            if occupation["url"] in occupations:
+                return
+            occupations[occupation["url"]] = occupation
+            stream.write(json.dumps(occupation, ensure_ascii=False) + "\n")
+            stream.flush()
+            print(f"Occupation added: {occupation['name']}")
+
+        asyncio.run(crawler.crawl(args.root, on_occupation))
+
+    execution_time = time.perf_counter() - start_time
+    stats = crawler.stats
+    print(f"Total {len(occupations)} occupations streamed to {ndjson_path} ({execution_time:.2f} seconds, "
+          f"{stats['requests']} requests, {stats['cache_hits']} cache hits, "
+          f"{stats['duplicates']} duplicate URIs, {stats['failures']} failures)")
+    if stats["failures"]:
+        print("Some URIs failed, outputs not updated. Rerun to retry (fetched responses are cached)")
+        return False
+    write_outputs(list(occupations.values()), args.output_dir)
+    return True
+
+class FixtureServer:
+    """HTTP server (stdlib) trả lại response đã ghi trong cache_dir, để chạy crawler offline"""
+
+    def __init__(self, cache_dir: str, host: str = "127.0.0.1", port: int = 8766, latency: float = 0.0):
+        """
+        Khởi tạo FixtureServer
+
+        Args:
+            cache_dir: Thư mục cache của EscoCrawler (các response đã ghi)
+            host: Địa chỉ bind
+            port: Cổng (0: chọn cổng trống)
+            latency: Latency thêm cho mỗi request (giây)
+        """
+        self.cache_dir = cache_dir
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Không log từng request
+
+            def do_GET(self):
+                parsed = urllib.parse.urlparse(self.path)
+                uris = urllib.parse.parse_qs(parsed.query).get("uris", [])
+                with server._lock:
+                    server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                path = cache_path(server.cache_dir, uris[0]) if uris else None
+                if not parsed.path.endswith(ENDPOINT_OCCUPATION) or not path or not os.path.exists(path):
+                    self._send(404, b'{"error": "No recorded response"}')
+                    return
+                with open(path, 'r', encoding='utf-8') as file:
+                    self._send(200, json.dumps(json.load(file)["response"]).encode("utf-8"))
+
+            def _send(self, status: int, payload: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """URL gốc của server (dùng cho --api-url)"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FixtureServer":
+        """Chạy server ở background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Dừng server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def serve_forever(self):
+        """Chạy server ở thread hiện tại (Ctrl+C để dừng)"""
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch ESCO occupations, knowledge and skills")
+    parser.add_argument("--root", default=INITIAL_URI, help="ISCO concept to start from")
+    parser.add_argument("--api-url", default=API_URL, help="ESCO API base URL (or a fixture server)")
+    parser.add_argument("--cache-dir", default="cache/esco", help="on-disk cache of ESCO responses")
+    parser.add_argument("--output-dir", default="fetch-esco/data")
+    parser.add_argument("--concurrency", type=int, default=8, help="maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds per request")
+    parser.add_argument("--refresh", action="store_true", help="ignore cached responses")
+    parser.add_argument("--serve-fixtures", action="store_true",
+                        help="serve the responses recorded in --cache-dir instead of crawling")
+    parser.add_argument("--port", type=int, default=8766, help="port for --serve-fixtures")
+    args = parser.parse_args()
+
+    print(os.getcwd())
+    if args.serve_fixtures:
+        fixture_server = FixtureServer(args.cache_dir, port=args.port)
+        print(f"Replaying {args.cache_dir} on {fixture_server.url}{ENDPOINT_OCCUPATION}")
+        fixture_server.serve_forever()
+        exit(0)
+
+    if not fetch_esco(args):
+        exit(1)
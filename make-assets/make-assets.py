@@ -1,14 +1,40 @@
+import argparse
 import datetime
+import hashlib
+import json
 import os
+import sys
 from dotenv import load_dotenv
-from google import genai
-from google.genai import errors
 import time
 import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-API_KEY: str | None = ""
+# Dùng lại DataLoader, graph_utils và LLM backends của app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from data_loader import DataLoader
+from graph_utils import create_base_plan
+from llm_backend import (LLMBackend, GenerationConfig, StubBackend, create_backend,
+                         knowledge_stub_responder, ENRICH_ITEMS_MARKER, ENRICH_ALLOWED_MARKER)
+from llm_resilience import ResilientLLMClient
+from sqlite_data_loader import build_database
+from concurrency_utils import RateLimiter
+
+KNOWLEDGE_FILE = 'assets/knowledge.txt'
+MANIFEST_FILE = 'assets/knowledge_manifest.json'
+CHECKPOINT_DIR = 'cache/knowledge_batches'
+
+def hash_file(path: str) -> str | None:
+    try:
+        with open(path, 'rb') as file:
+            return hashlib.sha256(file.read()).hexdigest()
+    except OSError:
+        return None
 
 def copy_assets_file(src: str, dst: str):
+    # Bỏ qua file không đổi nội dung
+    if os.path.exists(src) and hash_file(src) == hash_file(dst):
+        print(f"Unchanged '{dst}'")
+        return
     try:
         shutil.copy2(src, dst)
         print(f"Copied '{src}' to '{dst}'")
@@ -22,31 +48,63 @@ def copy_assets():
     copy_assets_file('fetch-esco/data/data.json', 'assets/data.json')
     copy_assets_file('fetch-esco/data/skill.json', 'assets/skill.json')
     copy_assets_file('fetch-esco/data/knowledge.json', 'assets/knowledge.json')
+    write_jobs_ndjson()
 
-def call_llm(model: str, thinking_budget: int, temperature: float) -> bool:
-    print(f"Calling LLM with model: {model}, thinking_budget: {thinking_budget}, temperature: {temperature}")
+def write_jobs_ndjson(src: str = 'assets/data.json', dst: str = 'assets/data.ndjson'):
+    """Ghi bản NDJSON (một job mỗi dòng) của data.json để app load dần từng job"""
+    try:
+        with open(src, 'r', encoding='utf-8') as file:
+            jobs = json.load(file)
+        with open(dst + ".tmp", 'w', encoding='utf-8') as file:
+            for job in jobs:
+                file.write(json.dumps(job, ensure_ascii=False) + "\n")
+        os.replace(dst + ".tmp", dst)
+        print(f"Written {len(jobs)} jobs to '{dst}'")
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"An error occurred: {e}")
 
-    system_instruction = '''
+SYSTEM_INSTRUCTION = '''
     You are a sophisticated AI expert in IT skill taxonomy and curriculum design. Your task is to process a list of IT skill names and enrich it into a structured JSON format. You will analyze each skill and determine its proficiency level, key components, and essential prerequisites based on common industry standards.
     '''
 
-    whole_knowledge_data = ""
-    with open('assets/knowledge.json', 'r') as file:
-        whole_knowledge_data = file.read()
+# Chuỗi model fallback (model, thinking_budget, temperature)
+MODEL_CHAIN = [
+    ("gemini-flash-latest", 8192, 0.8),
+    ("gemini-flash-lite-latest", 0, 0.95),
+]
+
+def create_llm_client(backend: LLMBackend, deadline: float) -> ResilientLLMClient:
+    """Tạo client gọi LLM với retry/backoff, circuit breaker và chuỗi model fallback"""
+    models = [
+        (model, GenerationConfig(
+            system_instruction=SYSTEM_INSTRUCTION,
+            temperature=temperature,
+            thinking_budget=thinking_budget
+        ))
+        for model, thinking_budget, temperature in MODEL_CHAIN
+    ]
+    return ResilientLLMClient(backend, models, max_attempts=2, base_delay=2.0,
+                              max_delay=30.0, deadline=deadline)
 
-    prompt = f'''
-        {whole_knowledge_data}
+def build_enrichment_prompt(batch: list, vocabulary: list) -> str:
+    """Prompt enrich một batch knowledge; prerequisites chỉ được chọn trong toàn bộ vocabulary"""
+    return f'''
+        {ENRICH_ITEMS_MARKER}
+        {json.dumps(batch, ensure_ascii=False)}
 
-        Generate a JSON array where each main skill is an object with the following structure:
+        {ENRICH_ALLOWED_MARKER}
+        {json.dumps(vocabulary, ensure_ascii=False)}
+
+        Generate a JSON array with one object for each item in ITEMS TO ENRICH, with the following structure:
         {{
-        "knowledge": "<skill_name>",
+        "skill": "<skill_name>",
         "level": "<level, from 1 to 10>",
         "detailed": ["List of detailed knowledge areas related to the main knowledge, like framework, library, protocols, ... Eg for 'JavaScript Framework' it could be ['React', 'Node.js', 'Vue.js']"],
         "prerequisites": ["<list_of_prerequisite_skills. Only main skill is needed here, no detailed knowledge areas>"]
         }}
 
         FIELD DEFINITIONS & CONSTRAINTS:
-        skill (string): The name of the skill, copied exactly from the input.
+        skill (string): The name of the skill, copied exactly from ITEMS TO ENRICH.
         level (integer): An integer from 1 to 10 representing the typical proficiency level required for a professional role centered around this skill. Use this scale for consistency:
         1-2: Foundational/Academic knowledge.
         3-4: Junior-level proficiency; can perform basic tasks with supervision.
@@ -54,65 +112,420 @@ def call_llm(model: str, thinking_budget: int, temperature: float) -> bool:
         7-8: Senior-level/Advanced proficiency; can lead projects and mentor others.
         9-10: Expert/Architect-level mastery; recognized as a thought leader, can innovate and set strategy.
         detailed (array of strings): A list of 5 to 7 of the most critical sub-skills, technologies, or core concepts that define this skill. Be specific and focus on the most important components.
-        prerequisites (array of strings): A list of 1 to 3 direct, foundational skills required before someone can effectively learn the main skill. Only list the absolute most important prerequisites. Do not make up the main skill that are not in the provided list.
+        prerequisites (array of strings): A list of 1 to 3 direct, foundational skills required before someone can effectively learn the main skill. Only list the absolute most important prerequisites, copied exactly from ALLOWED PREREQUISITES.
         prerequisites should not form a cycle. If a cycle is formed, make all the prerequisites in the cycle the same level.
 
-        Only include smaller skills that are relevant to IT professionals and exclude any non-IT related skills. 
-        Do not make up the main skill that are not in the provided list.
+        Only enrich smaller skills that are relevant to IT professionals. For an item of ITEMS TO ENRICH that is not related to IT, output {{"skill": "<skill_name>", "excluded": true}} instead.
+        Do not make up skills that are not in ITEMS TO ENRICH.
         Output in JSON format. Only output like a JSON file. Do not include any Markdown elements or code blocks.
     '''
 
-    # print(prompt)
+def validate_batch(response_text: str, batch: list, vocabulary_lookup: dict) -> tuple:
+    """
+    Parse và kiểm tra response của một batch
 
-    client = genai.Client(api_key=API_KEY)
+    Args:
+        response_text: Response text của LLM
+        batch: Tên các knowledge trong batch
+        vocabulary_lookup: Map lowercase -> tên gốc của toàn bộ knowledge
 
-    start_time = time.perf_counter()
+    Returns:
+        (dictionary tên gốc -> entry hợp lệ, set tên gốc bị LLM loại với "excluded": true),
+        chỉ gồm các item thuộc batch
+
+    Raises:
+        ValueError: Response không phải JSON array
+    """
+    text = response_text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1].rsplit("```", 1)[0]
+    data = json.loads(text)
+    if not isinstance(data, list):
+        raise ValueError("Response is not a JSON array")
+
+    batch_lookup = {name.lower(): name for name in batch}
+    entries = {}
+    rejected = set()
+    for item in data:
+        if not isinstance(item, dict):
+            continue
+        # Prompt cũ dùng key "knowledge", knowledge.txt dùng key "skill"
+        name = batch_lookup.get(str(item.get("skill", item.get("knowledge", ""))).strip().lower())
+        if name is None:
+            continue
+        if item.get("excluded") is True:
+            rejected.add(name)
+            continue
+        try:
+            level = min(10, max(1, int(item.get("level"))))
+        except (TypeError, ValueError):
+            continue
+        detailed = [str(d) for d in item.get("detailed", []) if isinstance(d, str) and d.strip()]
+        prerequisites = []
+        for prerequisite in item.get("prerequisites", []):
+            canonical = vocabulary_lookup.get(str(prerequisite).strip().lower())
+            if canonical and canonical != name and canonical not in prerequisites:
+                prerequisites.append(canonical)
+        entries[name] = {
+            "skill": name,
+            "level": level,
+            "detailed": detailed,
+            "prerequisites": prerequisites
+        }
+    return entries, rejected - set(entries)
+
+def enrich_batch(client: ResilientLLMClient, batch: list, vocabulary: list, vocabulary_lookup: dict,
+                 rate_limiter: RateLimiter, max_attempts: int) -> tuple:
+    """
+    Enrich một batch, retry khi response không hợp lệ; các item bị thiếu được hỏi lại một lần
+    (item vẫn thiếu sau đó không bị loại mà được enrich lại ở lần chạy sau)
+
+    Returns:
+        (dictionary tên -> entry, set tên bị LLM loại vì không thuộc IT)
+    """
+    entries = {}
+    rejected = set()
+    pending = list(batch)
+    asked_missing = False
+    for attempt in range(max_attempts):
+        rate_limiter.acquire()
+        try:
+            response_text = client.generate(build_enrichment_prompt(pending, vocabulary))
+            batch_entries, batch_rejected = validate_batch(response_text, pending, vocabulary_lookup)
+        except Exception as e:
+            print(f"  Batch starting '{batch[0]}' attempt {attempt + 1} failed: {e}")
+            continue
+        entries.update(batch_entries)
+        rejected.update(batch_rejected)
+        pending = [name for name in batch if name not in entries and name not in rejected]
+        if not pending or asked_missing:
+            break
+        asked_missing = True
+    else:
+        if not entries and not rejected:
+            raise RuntimeError(f"Batch starting '{batch[0]}' failed after {max_attempts} attempts")
+    return entries, rejected
+
+def write_json_atomic(path: str, data, **dump_kwargs):
+    """Ghi JSON ra file tạm rồi os.replace, để file đích không bao giờ bị ghi dở"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, **dump_kwargs)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+def batch_checkpoint_path(batch: list, fingerprint: str, vocabulary: list) -> str:
+    """Checkpoint của một batch, đặt tên theo hash của prompt, vocabulary và các item trong batch"""
+    key = json.dumps([fingerprint, vocabulary, batch], ensure_ascii=False)
+    return os.path.join(CHECKPOINT_DIR, hashlib.sha256(key.encode('utf-8')).hexdigest()[:24] + ".json")
+
+def run_batch(client: ResilientLLMClient, batch: list, vocabulary: list, vocabulary_lookup: dict,
+              rate_limiter: RateLimiter, max_attempts: int, checkpoint_path: str) -> tuple:
+    """
+    Enrich một batch, dùng lại checkpoint nếu đã có và ghi checkpoint khi xong
+
+    Returns:
+        (entries, set tên bị loại, True nếu lấy từ checkpoint)
+    """
     try:
-        response = client.models.generate_content(
-            model=model, 
-            contents=prompt,
-            config=genai.types.GenerateContentConfig(
-                system_instruction=system_instruction,
-                temperature=temperature,
-                thinking_config=genai.types.ThinkingConfig(thinking_budget=thinking_budget)
-            ),
-        )
-    except errors.ServerError as e:
-        print(f"Server error: {e}")
-        return False
-    except Exception as e:
-        print(f"An error occured: {e}")
+        with open(checkpoint_path, 'r', encoding='utf-8') as file:
+            checkpoint = json.load(file)
+        return checkpoint["entries"], set(checkpoint["rejected"]), True
+    except (OSError, json.JSONDecodeError, KeyError, TypeError):
+        pass
+    entries, rejected = enrich_batch(client, batch, vocabulary, vocabulary_lookup, rate_limiter, max_attempts)
+    write_json_atomic(checkpoint_path, {"entries": entries, "rejected": sorted(rejected)})
+    return entries, rejected, False
+
+def prompt_fingerprint() -> str:
+    """Hash của system instruction, prompt template và chuỗi model: đổi thì phải enrich lại toàn bộ"""
+    template = SYSTEM_INSTRUCTION + build_enrichment_prompt([], []) + json.dumps(MODEL_CHAIN)
+    return hashlib.sha256(template.encode('utf-8')).hexdigest()
+
+def item_hash(name: str, fingerprint: str) -> str:
+    """Content hash của một knowledge item (tên + prompt fingerprint)"""
+    return hashlib.sha256(f"{fingerprint}|{name}".encode('utf-8')).hexdigest()
+
+def entry_hash(entry: dict) -> str:
+    return hashlib.sha256(json.dumps(entry, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+def load_previous_outputs() -> tuple:
+    """
+    Đọc knowledge.txt và manifest của lần build trước
+
+    Returns:
+        (entries theo tên, manifest items); không có manifest thì dùng knowledge.txt hiện tại
+        làm mốc (mọi entry đang có coi như được sinh với prompt hiện tại)
+    """
+    entries = {}
+    try:
+        with open(KNOWLEDGE_FILE, 'r', encoding='utf-8') as file:
+            entries = {entry["skill"]: entry for entry in json.load(file)}
+    except (OSError, json.JSONDecodeError, KeyError, TypeError):
+        print(f"No usable previous {KNOWLEDGE_FILE}")
+
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as file:
+            return entries, json.load(file).get("items", {})
+    except (OSError, json.JSONDecodeError):
+        pass
+
+    print(f"No manifest found, adopting existing {KNOWLEDGE_FILE} as the baseline")
+    fingerprint = prompt_fingerprint()
+    items = {name: {"input": item_hash(name, fingerprint), "output": entry_hash(entry)}
+             for name, entry in entries.items()}
+    return entries, items
+
+def write_manifest(vocabulary: list, entries: dict, excluded: set, fingerprint: str):
+    """
+    Ghi manifest: input hash và output hash (hoặc trạng thái excluded) của từng item
+
+    Item không có output và không bị loại (LLM bỏ sót) không được ghi, để lần chạy sau enrich lại
+    """
+    items = {}
+    for name in vocabulary:
+        if name in entries:
+            items[name] = {"input": item_hash(name, fingerprint), "output": entry_hash(entries[name])}
+        elif name in excluded:
+            items[name] = {"input": item_hash(name, fingerprint), "excluded": True}
+    manifest = {
+        "prompt_fingerprint": fingerprint,
+        "generated_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        "items": items
+    }
+    write_json_atomic(MANIFEST_FILE, manifest, indent=1)
+
+def call_llm(client: ResilientLLMClient, batch_size: int = 25, concurrency: int = 4,
+             rate: float = 1.0, max_attempts: int = 3, full: bool = False, resume: bool = False) -> bool:
+    """
+    Enrich các knowledge mới/thay đổi của assets/knowledge.json theo batch song song
+    (giới hạn tốc độ), dùng lại kết quả cũ cho phần còn lại theo manifest, gộp theo thứ tự
+    của knowledge.json rồi ghi knowledge.txt
+
+    Mỗi batch xong được ghi checkpoint vào CHECKPOINT_DIR; với resume=True các batch đã có
+    checkpoint không gọi LLM lại. knowledge.txt chỉ được thay thế (atomic) khi mọi batch thành công.
+    """
+    with open('assets/knowledge.json', 'r') as file:
+        vocabulary = json.load(file)
+    vocabulary_lookup = {name.lower(): name for name in vocabulary}
+
+    fingerprint = prompt_fingerprint()
+    previous_entries, previous_items = ({}, {}) if full else load_previous_outputs()
+
+    # Item được dùng lại nếu input hash khớp và output cũ còn nguyên (hoặc đã bị LLM loại lần trước)
+    reused = {}
+    excluded = set()
+    to_enrich = []
+    for name in vocabulary:
+        record = previous_items.get(name)
+        if record and record.get("input") == item_hash(name, fingerprint):
+            if record.get("excluded"):
+                excluded.add(name)
+                continue
+            entry = previous_entries.get(name)
+            if entry is not None and entry_hash(entry) == record.get("output"):
+                # Bỏ prerequisites không còn trong vocabulary
+                entry = dict(entry)
+                entry["prerequisites"] = [p for p in entry.get("prerequisites", [])
+                                          if p.lower() in vocabulary_lookup]
+                reused[name] = entry
+                continue
+        to_enrich.append(name)
+    vocabulary_names = set(vocabulary_lookup.values())
+    removed = [name for name in previous_items if name not in vocabulary_names]
+    print(f"Manifest: {len(reused)} reused, {len(excluded)} previously excluded, "
+          f"{len(to_enrich)} new or changed, {len(removed)} removed")
+    if to_enrich:
+        print(f"  Recomputing: {', '.join(to_enrich[:20])}{' ...' if len(to_enrich) > 20 else ''}")
+
+    batches = [to_enrich[i:i + batch_size] for i in range(0, len(to_enrich), batch_size)]
+    if batches:
+        print(f"Calling LLM ({client.backend.name}) with models: {', '.join(model for model, _ in client.models)}")
+        print(f"Enriching {len(to_enrich)} items in {len(batches)} batches of {batch_size} "
+              f"({concurrency} concurrent, {rate} requests/s)")
+
+    if not resume and os.path.isdir(CHECKPOINT_DIR):
+        shutil.rmtree(CHECKPOINT_DIR)
+    os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+
+    rate_limiter = RateLimiter(rate, burst=concurrency)
+    entries = {}
+    rejected = set()
+    failed_batches = 0
+    restored_batches = 0
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(run_batch, client, batch, vocabulary, vocabulary_lookup, rate_limiter,
+                            max_attempts, batch_checkpoint_path(batch, fingerprint, vocabulary)): idx
+            for idx, batch in enumerate(batches)
+        }
+        for future in as_completed(futures):
+            try:
+                batch_entries, batch_rejected, restored = future.result()
+            except Exception as e:
+                print(f"An error occured: {e}")
+                failed_batches += 1
+                continue
+            entries.update(batch_entries)
+            rejected.update(batch_rejected)
+            restored_batches += restored
+            print(f"  Batch {futures[future] + 1}/{len(batches)}: {len(batch_entries)} items, "
+                  f"{len(batch_rejected)} excluded"
+                  f"{' (from checkpoint)' if restored else ''}")
+
+    execution_time = time.perf_counter() - start_time
+    print(f"LLM calls took {execution_time:.2f} seconds")
+    for model, metrics in client.get_metrics().items():
+        if metrics["count"]:
+            print(f"  {model}: {metrics['count']} calls, {metrics['errors']} errors, "
+                  f"p95 <= {metrics['p95']}s, circuit {metrics['circuit_state']}")
+
+    if restored_batches:
+        print(f"{restored_batches} batches restored from {CHECKPOINT_DIR}")
+    if failed_batches:
+        print(f"{failed_batches} batches failed, {KNOWLEDGE_FILE} left unchanged. "
+              f"Rerun with --resume to continue from the {len(batches) - failed_batches} completed batches")
         return False
-    finally:
-        end_time = time.perf_counter()
-        execution_time = end_time - start_time
-        print(f"LLM call took {execution_time:.2f} seconds")
+
+    # Chỉ item bị LLM loại rõ ràng mới được ghi excluded; item bị bỏ sót sẽ được enrich lại lần sau
+    excluded.update(rejected)
+    missing = [name for name in to_enrich if name not in entries and name not in rejected]
+    entries.update(reused)
+
+    # Gộp theo thứ tự knowledge.json để kết quả không phụ thuộc thứ tự hoàn thành của batch
+    merged = [entries[name] for name in vocabulary if name in entries]
+    print(f"{len(merged)} of {len(vocabulary)} items in output ({len(entries) - len(reused)} recomputed, "
+          f"{len(excluded)} excluded as non-IT, {len(missing)} missing)")
+    if missing:
+        print(f"  Missing from responses, will be retried on the next run: "
+              f"{', '.join(missing[:20])}{' ...' if len(missing) > 20 else ''}")
 
     try:
-        filename: str = f"knowledge.txt"
-        with open(filename, 'w') as file:
-            file.write(response.text)
-        print(f"Data written to assets/knowledge.txt")
+        write_json_atomic(KNOWLEDGE_FILE, merged, indent=4)
+        write_manifest(vocabulary, entries, excluded, fingerprint)
+        print(f"Data written to {KNOWLEDGE_FILE}, manifest written to {MANIFEST_FILE}")
     except IOError as e:
         print(f"File IO error occurred: {e}")
         exit(1)
+    shutil.rmtree(CHECKPOINT_DIR, ignore_errors=True)
     return True
 
+def prepare_output_dir(output_dir: str):
+    """
+    Chép input của pipeline (assets/ và fetch-esco/data/) sang output_dir rồi chạy trong đó,
+    để output của backend stub/http không ghi đè assets thật
+    """
+    for path in ('assets', 'fetch-esco/data'):
+        if os.path.isdir(path):
+            shutil.copytree(path, os.path.join(output_dir, path), dirs_exist_ok=True)
+    os.chdir(output_dir)
+    print(f"Writing assets under {os.getcwd()}")
+
+def build_base_roadmaps(output: str = 'assets/base_roadmaps.json'):
+    """Precompute roadmap khi chưa học gì cho mỗi job, gắn với hash của knowledge.txt"""
+    start_time = time.perf_counter()
+
+    data_loader = DataLoader(data_dir=".")
+    data_loader.load_all_data()
+
+    roadmaps = {}
+    for job in data_loader.jobs_data:
+        essential_knowledge = [k.lower() for k in job.get("essential_knowledge", [])]
+        roadmaps[job["name"]] = create_base_plan(essential_knowledge, data_loader)
+
+    artifact = {
+        "knowledge_hash": data_loader.knowledge_hash,
+        "roadmaps": roadmaps
+    }
+    try:
+        write_json_atomic(output, artifact, separators=(',', ':'))
+    except IOError as e:
+        print(f"File IO error occurred: {e}")
+        exit(1)
+
+    execution_time = time.perf_counter() - start_time
+    print(f"Base roadmaps for {len(roadmaps)} jobs written to {output} ({execution_time:.2f} seconds)")
+
+def build_sqlite_database(output: str = 'assets/career_data.sqlite3'):
+    """Build database SQLite (jobs, aliases, requirements, knowledge.txt, FTS5) cho SQLiteDataLoader"""
+    start_time = time.perf_counter()
+    try:
+        job_count = build_database(".", output)
+    except Exception as e:
+        print(f"An error occurred while building {output}: {e}")
+        return
+    execution_time = time.perf_counter() - start_time
+    print(f"SQLite database with {job_count} jobs written to {output} ({execution_time:.2f} seconds)")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prepare assets for Student Career Helper")
+    parser.add_argument("--base-roadmaps-only", action="store_true",
+                        help="only rebuild assets/base_roadmaps.json from current assets")
+    parser.add_argument("--sqlite-only", action="store_true",
+                        help="only rebuild assets/career_data.sqlite3 from current assets")
+    parser.add_argument("--backend", choices=["gemini", "stub", "http"], default="gemini",
+                        help="LLM backend: gemini (needs GEMINI_API_KEY), local stub, or stub HTTP server")
+    parser.add_argument("--backend-url", default="http://127.0.0.1:8765",
+                        help="server URL for the http backend (see src/llm_backend.py)")
+    parser.add_argument("--output-dir", default=None,
+                        help="directory whose assets/ receives the output (default: . for gemini, "
+                             "cache/<backend>-assets for stub/http, which may not write to ./assets)")
+    parser.add_argument("--deadline", type=float, default=300.0,
+                        help="maximum seconds per batch request, including retries and fallbacks")
+    parser.add_argument("--batch-size", type=int, default=25, help="knowledge items per LLM request")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum batch requests in flight")
+    parser.add_argument("--rate", type=float, default=1.0, help="maximum requests per second")
+    parser.add_argument("--full", action="store_true",
+                        help="ignore the manifest and enrich every knowledge item again")
+    parser.add_argument("--resume", action="store_true",
+                        help=f"reuse batch checkpoints in {CHECKPOINT_DIR} left by an interrupted run")
+    args = parser.parse_args()
+
     print(os.getcwd())
-    load_dotenv(".env")
-    API_KEY = os.getenv("GEMINI_API_KEY")
-    if not API_KEY:
-        print("GEMINI_API_KEY not found in .env")
-        exit(1)
+    if args.base_roadmaps_only:
+        build_base_roadmaps()
+        exit(0)
+    if args.sqlite_only:
+        build_sqlite_database()
+        exit(0)
+
+    if args.backend == "gemini":
+        load_dotenv(".env")
+        API_KEY = os.getenv("GEMINI_API_KEY")
+        if not API_KEY:
+            print("GEMINI_API_KEY not found in .env")
+            exit(1)
+        backend = create_backend("gemini", api_key=API_KEY)
+    elif args.backend == "stub":
+        backend = StubBackend(responder=knowledge_stub_responder)
+    else:
+        backend = create_backend("http", url=args.backend_url)
+
+    # Output giả lập của stub/http chỉ dùng để benchmark: không ghi vào assets thật
+    if args.backend != "gemini":
+        output_dir = os.path.abspath(args.output_dir or os.path.join("cache", f"{args.backend}-assets"))
+        if output_dir == os.getcwd():
+            print(f"Refusing to write {args.backend} backend output into ./assets, choose another --output-dir")
+            exit(1)
+        prepare_output_dir(output_dir)
+    elif args.output_dir:
+        prepare_output_dir(os.path.abspath(args.output_dir))
         
     copy_assets()
 
-    if(not call_llm("gemini-flash-latest", 8192, 0.8)):
-        print("Call failed, retrying...")
-        if(not call_llm("gemini-flash-lite-latest", 0, 0.95)):
-            print("Fatal error, exit now")
-            exit(1)
+    client = create_llm_client(backend, args.deadline)
+    succeeded = call_llm(client, args.batch_size, args.concurrency, args.rate,
+                         full=args.full, resume=args.resume)
+    client.close()
+    if(not succeeded):
+        print("Fatal error, exit now")
+        exit(1)
+
+    build_base_roadmaps()
+    build_sqlite_database()
 
 
 
@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dotenv import load_dotenv
+
+# Dùng lại DataLoader, AIProjectSuggester và LLM backends của app
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from data_loader import DataLoader
+from ai_project_suggester import AIProjectSuggester
+from concurrency_utils import RateLimiter
+from llm_backend import create_backend
+
+def build_profiles(data_loader: DataLoader, size: int = 10) -> dict:
+    """
+    Tạo các profile đại diện (danh sách knowledge canonical) từ dữ liệu
+
+    - empty: chưa học gì
+    - graduate: các knowledge nền tảng được nhiều knowledge khác cần làm prerequisite
+    - junior_developer: graduate + các essential knowledge phổ biến nhất giữa các jobs
+    """
+    graph = data_loader.prerequisite_graph
+    names = {k.lower(): k for k in data_loader.knowledge_data}
+
+    def top(counter: Counter, max_level: int) -> list:
+        ranked = sorted(counter.items(), key=lambda x: (-x[1], x[0]))
+        return [item for item, _ in ranked
+                if item in names and graph.get_level(item) <= max_level][:size]
+
+    dependents = Counter(p for item in graph.prerequisites for p in graph.get_prerequisites(item))
+    frequency = Counter(k.lower() for job in data_loader.jobs_data for k in job.get("essential_knowledge", []))
+
+    graduate = top(dependents, 6)
+    junior = graduate + [k for k in top(frequency, 6) if k not in graduate]
+    return {
+        "empty": [],
+        "graduate": [names[k] for k in graduate],
+        "junior_developer": [names[k] for k in junior]
+    }
+
+def load_checkpoint(path: str) -> dict:
+    """Đọc checkpoint JSONL: (job, profile) -> project_suggestions (bỏ qua dòng hỏng do bị ngắt giữa chừng)"""
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+                done[(record["job"], record["profile"])] = record["project_suggestions"]
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return done
+
+def write_artifact(data_loader: DataLoader, profiles: dict, done: dict, model_name: str, output: str):
+    """Ghi artifact gọn (ghi file tạm rồi thay thế để không để lại file hỏng)"""
+    suggestions = {}
+    for (job_name, profile), projects in sorted(done.items()):
+        suggestions.setdefault(job_name, {})[profile] = projects
+
+    artifact = {
+        "data_hash": data_loader.compute_file_hash(data_loader.jobs_file),
+        "knowledge_hash": data_loader.knowledge_hash,
+        "model": model_name,
+        "profiles": profiles,
+        "suggestions": suggestions
+    }
+    tmp_path = output + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump(artifact, file, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp_path, output)
+
+def pregenerate(args):
+    data_loader = DataLoader(data_dir=".")
+    data_loader.load_all_data()
+
+    if args.backend == "gemini":
+        load_dotenv(".env")
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            print("GEMINI_API_KEY not found in .env")
+            exit(1)
+        backend = create_backend("gemini", api_key=api_key)
+    else:
+        backend = create_backend(args.backend, url=args.backend_url)
+
+    # Không dùng artifact cũ khi sinh artifact mới
+    suggester = AIProjectSuggester(backend=backend, data_loader=data_loader, use_pregenerated=False)
+    profiles = build_profiles(data_loader)
+    jobs = data_loader.jobs_data[:args.limit] if args.limit else data_loader.jobs_data
+
+    os.makedirs(os.path.dirname(args.checkpoint) or ".", exist_ok=True)
+    if args.fresh and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+    done = load_checkpoint(args.checkpoint)
+    print(f"{len(done)} results restored from {args.checkpoint}")
+
+    rate_limiter = RateLimiter(args.rate, burst=args.concurrency)
+    write_lock = threading.Lock()
+    failures = []
+    start_time = time.perf_counter()
+
+    with open(args.checkpoint, 'a', encoding='utf-8') as checkpoint:
+        for profile, knowledge in profiles.items():
+            pending = [job for job in jobs if (job["name"], profile) not in done]
+            print(f"Profile '{profile}' ({len(knowledge)} items): {len(pending)} jobs to generate")
+
+            def on_result(idx: int, job_info: dict, project_data: dict, profile=profile):
+                if "error" in project_data:
+                    failures.append((job_info["name"], profile, project_data["error"]))
+                    print(f"  ✗ {job_info['name']}: {project_data['error']}")
+                    return
+                record = {
+                    "job": job_info["name"],
+                    "profile": profile,
+                    "project_suggestions": project_data.get("project_suggestions", [])
+                }
+                # Mỗi kết quả được flush ngay để có thể resume khi bị ngắt
+                with write_lock:
+                    checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    checkpoint.flush()
+                    done[(record["job"], profile)] = record["project_suggestions"]
+                print(f"  ✓ {job_info['name']}")
+
+            suggester.suggest_projects_concurrently(
+                pending,
+                knowledge,
+                max_concurrency=args.concurrency,
+                rate_limiter=rate_limiter,
+                timeout=args.timeout,
+                on_result=on_result
+            )
+
+    write_artifact(data_loader, profiles, done, suggester.model_name, args.output)
+    execution_time = time.perf_counter() - start_time
+    print(f"{len(done)} suggestions written to {args.output} ({execution_time:.2f} seconds, "
+          f"{len(failures)} failed, rerun to retry)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate project suggestions for every job and representative profile")
+    parser.add_argument("--backend", choices=["gemini", "stub", "http"], default="gemini",
+                        help="LLM backend: gemini (needs GEMINI_API_KEY), local stub, or stub HTTP server")
+    parser.add_argument("--backend-url", default="http://127.0.0.1:8765",
+                        help="server URL for the http backend (see src/llm_backend.py)")
+    parser.add_argument("--rate", type=float, default=1.0, help="maximum requests per second")
+    parser.add_argument("--concurrency", type=int, default=4, help="maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds per request")
+    parser.add_argument("--checkpoint", default="cache/pregenerate_suggestions.jsonl",
+                        help="JSONL checkpoint used to resume an interrupted run")
+    parser.add_argument("--fresh", action="store_true", help="ignore the existing checkpoint")
+    parser.add_argument("--limit", type=int, default=None, help="only process the first N jobs")
+    parser.add_argument("--output", default="assets/project_suggestions.json")
+    args = parser.parse_args()
+
+    print(os.getcwd())
+    pregenerate(args)
@@ -3,41 +3,170 @@ Module tích hợp Google Gemini API để đề xuất project thực hành
 """
 import os
 import json
-from google import genai
-from typing import List, Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Optional, Callable, Iterator
+from concurrency_utils import RateLimiter, SingleFlight, SingleFlightCancelled
+from json_stream_parser import ProjectSuggestionStreamParser
+from llm_backend import LLMBackend, GeminiBackend, GenerationConfig
+from llm_resilience import ResilientLLMClient
+from local_project_suggester import LocalProjectSuggester
+from suggestion_cache import SuggestionCache, jaccard_distance
 
 
 class AIProjectSuggester:
     """Class để đề xuất project thực hành sử dụng Google Gemini"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 cache: Optional[SuggestionCache] = None,
+                 backend: Optional[LLMBackend] = None,
+                 data_loader=None,
+                 prompt_token_budget: int = 600,
+                 max_description_chars: int = 400,
+                 request_deadline: float = 60.0,
+                 use_pregenerated: bool = True,
+                 pregenerated_max_distance: float = 0.2):
         """
         Khởi tạo AI Project Suggester với Google Gemini
         
         Args:
             api_key: Google API key (nếu không cung cấp sẽ lấy từ GOOGLE_API_KEY env variable)
+            cache: SuggestionCache để tái sử dụng response cho cùng job + knowledge, hoặc knowledge
+                gần giống nếu cache bật max_jaccard_distance (tùy chọn)
+            backend: LLMBackend dùng thay cho Gemini (vd. StubBackend khi benchmark offline)
+            data_loader: DataLoader để chọn optional knowledge liên quan qua prerequisite graph
+                và đề xuất offline (LocalProjectSuggester) khi không có API hoặc API lỗi (tùy chọn)
+            prompt_token_budget: Số tokens (ước lượng) tối đa của prompt
+            max_description_chars: Độ dài tối đa của job description trong prompt
+            request_deadline: Thời gian tối đa cho một request LLM, gồm retry và model fallback (giây)
+            use_pregenerated: Dùng project suggestions pre-generate (data_loader.pregenerated_suggestions)
+            pregenerated_max_distance: Khoảng cách Jaccard tối đa giữa knowledge của student và profile
         """
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
-        self.client = None
+        self.cache = cache
+        self.backend = backend
+        self.data_loader = data_loader
+        self.local_suggester = LocalProjectSuggester(data_loader) if data_loader else None
+        self.prompt_token_budget = prompt_token_budget
+        self.max_description_chars = max_description_chars
+        self.request_deadline = request_deadline
+        self.use_pregenerated = use_pregenerated
+        self.pregenerated_max_distance = pregenerated_max_distance
+        self.llm_client = None  # ResilientLLMClient, tạo lazy theo backend hiện tại
+        self._llm_client_lock = threading.Lock()
+        self.single_flight = SingleFlight()  # Gộp các request giống nhau đang chạy
         self.model_name = "gemini-2.5-flash"
         self.SYSTEM_INSTRUCTION = '''
             You are a project advisor AI. Your task is to analyze the provided IT job information and the student's skill set, and suggest relevant projects that can help the student bridge the gap between their current skills and those required for the job.
         '''
+        self.generation_config = GenerationConfig(
+            system_instruction=self.SYSTEM_INSTRUCTION,
+            temperature=0.7,
+            thinking_budget=8192,
+            max_output_tokens=8192
+        )
+        # Chuỗi model fallback: model nhẹ hơn, không thinking khi model chính lỗi/quá tải
+        self.model_chain = [
+            (self.model_name, self.generation_config),
+            ("gemini-2.5-flash-lite", GenerationConfig(
+                system_instruction=self.SYSTEM_INSTRUCTION,
+                temperature=0.7,
+                thinking_budget=0,
+                max_output_tokens=8192
+            ))
+        ]
         
-        if self.api_key:
+        if self.backend is None and self.api_key:
             self._initialize_client()
     
     def _initialize_client(self):
-        """Khởi tạo Google Gemini client"""
+        """Khởi tạo Google Gemini backend"""
         try:
-            self.client = genai.Client(api_key=self.api_key)
+            self.backend = GeminiBackend(api_key=self.api_key)
         except Exception as e:
             print(f"❌ Lỗi khi khởi tạo Gemini: {e}")
-            self.client = None
+            self.backend = None
+    
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Ước lượng số tokens của text (~4 ký tự mỗi token)
+        
+        Args:
+            text: Text cần ước lượng
+            
+        Returns:
+            Số tokens ước lượng
+        """
+        return (len(text) + 3) // 4
+    
+    def _select_prompt_knowledge(self, job_info: Dict, student_knowledge: List[str]) -> Dict[str, List[str]]:
+        """
+        Chọn knowledge đưa vào prompt: phần còn thiếu (essential trước, optional liên quan sau)
+        và các knowledge đã biết có liên quan tới phần thiếu
+        
+        Args:
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+            
+        Returns:
+            Dictionary {"missing_essential", "related_optional", "known_related"}
+        """
+        known = set(k.lower() for k in student_knowledge)
+        graph = self.data_loader.prerequisite_graph if self.data_loader else None
+        
+        def dedupe_missing(items: List[str]) -> List[str]:
+            seen = set()
+            result = []
+            for item in items:
+                key = item.lower()
+                if key not in known and key not in seen:
+                    seen.add(key)
+                    result.append(item)
+            return result
+        
+        missing_essential = dedupe_missing(job_info.get('essential_knowledge', []))
+        essential_keys = set(k.lower() for k in missing_essential)
+        missing_optional = [k for k in dedupe_missing(job_info.get('optional_knowledge', []))
+                            if k.lower() not in essential_keys]
+        
+        if graph is None:
+            related_optional = missing_optional
+            optional_keys = set(k.lower() for k in job_info.get('optional_knowledge', []))
+            known_related = [k for k in student_knowledge if k.lower() in optional_keys]
+        else:
+            # Optional liên quan: có prerequisite đã biết, hoặc là prerequisite của knowledge đã biết
+            known_prerequisites = set()
+            for item in known:
+                known_prerequisites.update(graph.get_prerequisites(item))
+            
+            def relatedness(item: str) -> int:
+                key = item.lower()
+                score = sum(1 for p in graph.get_prerequisites(key) if p in known)
+                return score + (1 if key in known_prerequisites else 0)
+            
+            scored = [(relatedness(k), idx, k) for idx, k in enumerate(missing_optional)]
+            related_optional = [k for score, _, k in sorted(scored, key=lambda x: (-x[0], x[1])) if score > 0]
+            
+            # Knowledge đã biết là prerequisite của phần còn thiếu: context cho LLM
+            gap_prerequisites = set()
+            for item in missing_essential + related_optional:
+                gap_prerequisites.update(graph.get_prerequisites(item.lower()))
+            known_related = [k for k in student_knowledge if k.lower() in gap_prerequisites]
+        
+        return {
+            "missing_essential": missing_essential,
+            "related_optional": related_optional,
+            "known_related": known_related
+        }
     
     def _create_prompt(self, job_info: Dict, student_knowledge: List[str]) -> str:
         """
-        Tạo prompt cho LLM theo format của project_prompt.py
+        Tạo prompt cho LLM trong giới hạn prompt_token_budget
+        
+        Chỉ gửi phần knowledge còn thiếu (essential trước, optional liên quan sau), bỏ knowledge
+        student đã biết và cắt ngắn description dài.
         
         Args:
             job_info: Dictionary chứa thông tin job từ data.json
@@ -46,98 +175,296 @@ class AIProjectSuggester:
         Returns:
             Prompt string
         """
-        # Format job info
-        job_name = job_info.get('name', 'N/A')
-        job_desc = job_info.get('description', 'N/A')
-        other_names = job_info.get('other_name', [])
-        essential_knowledge = job_info.get('essential_knowledge', [])
-        optional_knowledge = job_info.get('optional_knowledge', [])
-        
-        # Format as JSON strings
-        other_names_str = ',\n        '.join([f'"{name}"' for name in other_names])
-        essential_knowledge_str = ',\n        '.join([f'"{k}"' for k in essential_knowledge])
-        optional_knowledge_str = ',\n        '.join([f'"{k}"' for k in optional_knowledge])
-        student_knowledge_str = ',\n    '.join([f'"{k}"' for k in student_knowledge])
-        
-        prompt = f'''Given the job information: 
-{{
-    "name": "{job_name}",
-    "description": "{job_desc}",
-    "other_name": [
-        {other_names_str}
-    ],
-    "essential_knowledge": [
-        {essential_knowledge_str}
-    ],
-    "optional_knowledge": [
-        {optional_knowledge_str}
-    ]
-}},
-
-Given the student knowledge set:
-{{
-    {student_knowledge_str}
-}}
-
-Suggest 5 projects that would help the student bridge the gap between their current knowledge and those required for the job. Priortize essential knowledge first, then optional knowledge that is closely related to the student's existing skills.
+        description = job_info.get('description', 'N/A')
+        if len(description) > self.max_description_chars:
+            description = description[:self.max_description_chars].rsplit(' ', 1)[0] + "..."
+        
+        selected = self._select_prompt_knowledge(job_info, student_knowledge)
+        
+        instructions = '''
+Suggest 5 projects that would help the student learn the missing knowledge required for the job. Prioritize missing essential knowledge first, then the related optional knowledge.
 Do not make up knowledges that are not in the provided job information.
 Output in JSON format. Only output like a JSON file. Do not include any Markdown elements or code blocks. (for example ```json ... ```).
 
 Output format:
-{{
-  "project_suggestions": [
-    {{
-      "title": "...",
-      "description": "...",
-      "knowledge_gain": [
-        "a",
-        "b",
-        ...
-      ],
-      "reasoning": "..."
-    }},
-    ...
-  ]
-}}'''
-
-        print(f"Generated prompt for Gemini: {prompt}")
-        return prompt
+{"project_suggestions": [{"title": "...", "description": "...", "knowledge_gain": ["a", "b"], "reasoning": "..."}]}'''
+        
+        def render(payload: Dict) -> str:
+            return "Given the job and the knowledge gap of the student:\n" + \
+                json.dumps(payload, ensure_ascii=False) + "\n" + instructions
+        
+        payload = {
+            "name": job_info.get('name', 'N/A'),
+            "description": description,
+            "missing_essential_knowledge": [],
+            "related_optional_knowledge": [],
+            "student_already_knows": []
+        }
+        
+        # Thêm items theo thứ tự ưu tiên tới khi hết token budget
+        # (luôn giữ ít nhất một essential để prompt có nghĩa). Item không vừa thì bỏ qua để thử
+        # các item nhỏ hơn cùng field; field thấp hơn chỉ được thêm khi field trên không bị cắt
+        used = self.estimate_tokens(render(payload))
+        for field, items in (("missing_essential_knowledge", selected["missing_essential"]),
+                             ("related_optional_knowledge", selected["related_optional"]),
+                             ("student_already_knows", selected["known_related"])):
+            rejected = False
+            for item in items:
+                cost = self.estimate_tokens(json.dumps(item, ensure_ascii=False)) + 1
+                if used + cost > self.prompt_token_budget and payload["missing_essential_knowledge"]:
+                    rejected = True
+                    continue
+                payload[field].append(item)
+                used += cost
+            if rejected:
+                break
+        
+        return render(payload)
     
-    def suggest_project(self, job_info: Dict, student_knowledge: List[str]) -> Dict:
+    def suggest_project(self, job_info: Dict, student_knowledge: List[str],
+                        cancel_event: Optional[threading.Event] = None) -> Dict:
         """
         Đề xuất project dựa trên job info và student knowledge
         
+        Các request giống nhau chạy đồng thời (vd. double-click) được gộp thành một lần gọi LLM.
+        
         Args:
             job_info: Dictionary chứa thông tin job từ data.json
             student_knowledge: Danh sách knowledge mà student đã có
+            cancel_event: Event set khi không cần kết quả nữa (request gộp vẫn chạy cho waiter khác)
             
         Returns:
             Dictionary chứa thông tin project được đề xuất
         """
-        if not self.client:
+        return self.suggest_project_stream(job_info, student_knowledge, None, cancel_event)
+    
+    def suggest_project_stream(self, job_info: Dict, student_knowledge: List[str],
+                               on_project: Optional[Callable[[int, Dict], None]],
+                               cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Đề xuất project bằng streaming: gọi on_project cho từng project ngay khi
+        phần tử đó trong "project_suggestions" đã nhận đủ
+        
+        Args:
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+            on_project: Callback (index 1-based, project) cho từng project (None: không stream)
+            cancel_event: Event set khi không cần kết quả nữa
+            
+        Returns:
+            Dictionary đầy đủ như suggest_project
+        """
+        if not job_info or student_knowledge is None:
+            return {
+                "error": "Missing job information or student knowledge"
+            }
+        
+        # Kết quả pre-generate cho profile gần giống: tra cứu local, không cần gọi Gemini
+        pregenerated = self._lookup_pregenerated(job_info, student_knowledge)
+        if pregenerated is not None:
+            if on_project:
+                for idx, project in enumerate(pregenerated["project_suggestions"], 1):
+                    on_project(idx, project)
+            return pregenerated
+        
+        # Cache hit trả về ngay, không cần gọi Gemini
+        cache_key = SuggestionCache.make_key(self.model_name, self.SYSTEM_INSTRUCTION,
+                                             job_info, student_knowledge)
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached is None:
+                # Không khớp chính xác: dùng lại kết quả của knowledge set gần giống cho cùng job
+                similar = self.cache.get_similar(self._scope_key(job_info), student_knowledge)
+                if similar is not None:
+                    cached, distance = similar
+                    cached["near_duplicate_distance"] = round(distance, 3)
+            if cached is not None:
+                cached["from_cache"] = True
+                if on_project:
+                    for idx, project in enumerate(cached.get("project_suggestions", []), 1):
+                        on_project(idx, project)
+                return cached
+        
+        if not self.backend:
+            if self.local_suggester:
+                project_data = self.local_suggester.suggest_project(job_info, student_knowledge)
+                if on_project:
+                    for idx, project in enumerate(project_data["project_suggestions"], 1):
+                        on_project(idx, project)
+                return project_data
             return {
                 "error": "AI API is not configured."
             }
         
-        if not job_info or not student_knowledge:
+        delivered = [0]
+        
+        def on_progress(item):
+            delivered[0] = item[0]
+            if on_project:
+                on_project(*item)
+        
+        try:
+            project_data = self.single_flight.do(
+                cache_key,
+                lambda publish, flight_cancel: self._generate_projects(
+                    job_info, student_knowledge, cache_key, publish if on_project else None, flight_cancel),
+                on_progress=on_progress,
+                cancel_event=cancel_event
+            )
+        except SingleFlightCancelled:
             return {
-                "error": "Missing job information or student knowledge"
+                "error": "Request cancelled",
+                "cancelled": True
             }
         
+        if "error" in project_data:
+            return self._with_local_fallback(project_data, job_info, student_knowledge)
+        
+        # Request gộp vào call không stream: phát nốt các project chưa nhận
+        if on_project:
+            suggestions = project_data.get("project_suggestions", [])
+            for idx in range(delivered[0] + 1, len(suggestions) + 1):
+                on_project(idx, suggestions[idx - 1])
+        
+        # Mỗi waiter nhận bản copy riêng của kết quả dùng chung
+        return dict(project_data)
+    
+    def suggest_project_local(self, job_info: Dict, student_knowledge: List[str]) -> Optional[Dict]:
+        """
+        Đề xuất project offline ngay lập tức (preview trong lúc chờ LLM)
+        
+        Args:
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+            
+        Returns:
+            Dictionary project data, None nếu không có data_loader
+        """
+        if not self.local_suggester or not job_info:
+            return None
+        return self.local_suggester.suggest_project(job_info, student_knowledge)
+    
+    def _with_local_fallback(self, project_data: Dict, job_info: Dict,
+                             student_knowledge: List[str]) -> Dict:
+        """Gắn đề xuất offline vào kết quả lỗi (format_project_for_display sẽ hiển thị fallback)"""
+        local_data = self.suggest_project_local(job_info, student_knowledge)
+        if local_data is not None:
+            project_data = dict(project_data)
+            project_data["fallback"] = local_data
+        return project_data
+    
+    def _lookup_pregenerated(self, job_info: Dict, student_knowledge: List[str]) -> Optional[Dict]:
+        """
+        Tìm project suggestions pre-generate của job cho profile gần nhất với student
+        
+        Args:
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+            
+        Returns:
+            Dictionary project data, None nếu không có profile đủ gần
+        """
+        if not self.use_pregenerated or not self.data_loader:
+            return None
+        artifact = self.data_loader.pregenerated_suggestions
+        job_suggestions = artifact.get("suggestions", {}).get(job_info.get("name"), {})
+        if not job_suggestions:
+            return None
+        
+        known = set(k.lower() for k in student_knowledge)
+        best = None
+        for profile, projects in job_suggestions.items():
+            profile_knowledge = set(k.lower() for k in artifact.get("profiles", {}).get(profile, []))
+            distance = jaccard_distance(known, profile_knowledge)
+            if distance <= self.pregenerated_max_distance and (best is None or distance < best[0]):
+                best = (distance, profile, projects)
+        if best is None:
+            return None
+        
+        distance, profile, projects = best
+        return {
+            "project_suggestions": projects,
+            "source": f"Pre-generated by {artifact.get('model', 'Google Gemini')} (profile: {profile})",
+            "job_name": job_info.get("name", "N/A"),
+            "pregenerated_profile": profile
+        }
+    
+    def _scope_key(self, job_info: Dict) -> str:
+        """Key phạm vi (model, system instruction, job) để tìm kết quả gần giống trong cache"""
+        return SuggestionCache.make_scope_key(self.model_name, self.SYSTEM_INSTRUCTION, job_info)
+    
+    def _store_in_cache(self, cache_key: str, job_info: Dict, student_knowledge: List[str],
+                        project_data: Dict, model: Optional[str]):
+        """
+        Ghi kết quả vào cache kèm knowledge set (để index tìm gần giống)
+        
+        Cache key được tạo từ model chính (self.model_name): kết quả của model fallback
+        không được ghi để không bị trả về như kết quả của model chính.
+        """
+        if model != self.model_name:
+            print(f"Response from fallback model {model}, not cached")
+            return
+        if self.cache:
+            self.cache.set(cache_key, project_data, self._scope_key(job_info), student_knowledge)
+    
+    def _generate_projects(self, job_info: Dict, student_knowledge: List[str],
+                           cache_key: str, publish: Optional[Callable[[tuple], None]],
+                           cancel_event: Optional[threading.Event] = None) -> Dict:
+        """
+        Gọi LLM, phát từng project qua publish (nếu streaming) và ghi cache
+        
+        Args:
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+            cache_key: Cache key của request
+            publish: Function phát progress (index, project) cho các waiter (None: không stream)
+            cancel_event: Set khi không còn waiter nào (dừng stream, không ghi cache)
+            
+        Returns:
+            Dictionary project data hoặc dict "error"
+        """
+        parser = ProjectSuggestionStreamParser()
+        projects = []
         try:
             prompt = self._create_prompt(job_info, student_knowledge)
-            response_text = self._call_llm(prompt)
+            prompt_tokens = self.estimate_tokens(prompt)
+            print(f"Prompt for {job_info.get('name', 'N/A')}: ~{prompt_tokens} tokens")
+            
+            attempt_info = {}
+            if publish is None:
+                project_data = self._parse_response(self._call_llm(prompt, attempt_info), job_info)
+                project_data["prompt_tokens_estimate"] = prompt_tokens
+                self._store_in_cache(cache_key, job_info, student_knowledge, project_data,
+                                     attempt_info.get("model"))
+                return project_data
             
-            # Parse JSON response
-            # Loại bỏ markdown code blocks nếu có
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0]
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0]
+            try:
+                stream = self._call_llm_stream(prompt, attempt_info)
+                for chunk in stream:
+                    if cancel_event is not None and cancel_event.is_set():
+                        stream.close()  # Đóng stream upstream, không tốn thêm quota
+                        return {"error": "Request cancelled", "cancelled": True}
+                    for project in parser.feed(chunk):
+                        projects.append(project)
+                        publish((len(projects), project))
+            except Exception as e:
+                # Stream đứt giữa chừng: giữ lại các project đã phát cho UI
+                if not projects:
+                    raise
+                print(f"Lỗi khi stream AI response, trả về {len(projects)} project đã nhận: {e}")
+                return self._partial_result(job_info, projects, prompt_tokens, str(e))
             
-            project_data = json.loads(response_text.strip())
-            project_data["source"] = "Generated by Google Gemini"
-            project_data["job_name"] = job_info.get('name', 'N/A')
+            try:
+                project_data = self._parse_response(parser.get_text(), job_info)
+            except json.JSONDecodeError as e:
+                # Response bị cắt giữa chừng: giữ lại các project đã parse được
+                if not projects:
+                    raise
+                return self._partial_result(job_info, projects, prompt_tokens, f"Incomplete JSON: {e}")
+            project_data["prompt_tokens_estimate"] = prompt_tokens
+            
+            self._store_in_cache(cache_key, job_info, student_knowledge, project_data,
+                                 attempt_info.get("model"))
             
             return project_data
         
@@ -147,93 +474,172 @@ Output format:
                 "error": str(e)
             }
     
-    def _call_llm(self, prompt: str) -> str:
+    def _partial_result(self, job_info: Dict, projects: List[Dict], prompt_tokens: int, reason: str) -> Dict:
         """
-        Gọi Google Gemini API và trả về response
+        Kết quả chỉ gồm các project đã stream được (không ghi cache để lần sau gọi lại đủ)
         
         Args:
-            prompt: Prompt string
+            job_info: Dictionary chứa thông tin job
+            projects: Các project đã parse được
+            prompt_tokens: Ước lượng số token của prompt
+            reason: Lý do response bị cắt
+            
+        Returns:
+            Dictionary project data có cờ "partial"
+        """
+        return {
+            "project_suggestions": projects,
+            "source": "Generated by Google Gemini",
+            "job_name": job_info.get('name', 'N/A'),
+            "prompt_tokens_estimate": prompt_tokens,
+            "partial": True,
+            "partial_reason": reason
+        }
+    
+    def _parse_response(self, response_text: str, job_info: Dict) -> Dict:
+        """
+        Parse JSON response của LLM thành project data
+        
+        Args:
+            response_text: Response text từ LLM
+            job_info: Dictionary chứa thông tin job
+            
+        Returns:
+            Dictionary project data (kèm source và job_name)
+        """
+        # Loại bỏ markdown code blocks nếu có
+        if "```json" in response_text:
+            response_text = response_text.split("```json")[1].split("```")[0]
+        elif "```" in response_text:
+            response_text = response_text.split("```")[1].split("```")[0]
+        
+        project_data = json.loads(response_text.strip())
+        project_data["source"] = "Generated by Google Gemini"
+        project_data["job_name"] = job_info.get('name', 'N/A')
+        return project_data
+    
+    def suggest_projects_concurrently(self, job_infos: List[Dict],
+                                      student_knowledge: List[str],
+                                      max_concurrency: int = 3,
+                                      rate_limiter: Optional[RateLimiter] = None,
+                                      timeout: float = 60.0,
+                                      on_result: Optional[Callable[[int, Dict, Dict], None]] = None) -> List[Dict]:
+        """
+        Đề xuất project cho nhiều jobs song song (bounded thread pool)
+        
+        Args:
+            job_infos: Danh sách job info từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+            max_concurrency: Số request chạy đồng thời tối đa
+            rate_limiter: RateLimiter giới hạn số request mỗi giây (tùy chọn)
+            timeout: Thời gian tối đa cho mỗi request, tính từ lúc request bắt đầu chạy (giây)
+            on_result: Callback (index, job_info, project_data) gọi ngay khi từng request xong
             
         Returns:
-            Response text từ Gemini
+            List kết quả theo đúng thứ tự job_infos (request quá hạn trả về dict "error")
         """
+        results = [None] * len(job_infos)
+        started = {}
+        
+        def run(index: int, job_info: Dict) -> Dict:
+            if rate_limiter:
+                rate_limiter.acquire()
+            started[index] = time.monotonic()
+            return self.suggest_project(job_info, student_knowledge)
+        
+        def finish(index: int, project_data: Dict):
+            results[index] = project_data
+            if on_result:
+                on_result(index, job_infos[index], project_data)
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, max_concurrency))
         try:
-            response = self.client.models.generate_content(
-                model=self.model_name, 
-                contents=prompt,
-                config=genai.types.GenerateContentConfig(
-                    system_instruction=self.SYSTEM_INSTRUCTION,
-                    temperature=0.7,
-                    thinking_config=genai.types.ThinkingConfig(thinking_budget=8192),
-                    max_output_tokens=8192
-                ),
-            )
-            return response.text or ""  # null coalescing
-        except Exception as e:
-            print(f"❌ Error calling Gemini API: {e}")
-            return ""
+            futures = {executor.submit(run, i, job_info): i for i, job_info in enumerate(job_infos)}
+            pending = set(futures)
+            
+            while pending:
+                now = time.monotonic()
+                wait_time = None
+                for future in list(pending):
+                    index = futures[future]
+                    if index not in started or future.done():
+                        continue
+                    remaining = started[index] + timeout - now
+                    if remaining <= 0:
+                        pending.discard(future)
+                        finish(index, self._with_local_fallback(
+                            {"error": f"Request timed out after {timeout:.0f}s"},
+                            job_infos[index], student_knowledge))
+                    elif wait_time is None or remaining < wait_time:
+                        wait_time = remaining
+                
+                if not pending:
+                    break
+                
+                # Request chưa bắt đầu (đang chờ rate limiter/worker): kiểm tra lại sau một khoảng ngắn
+                if wait_time is None or len(started) < len(futures):
+                    wait_time = min(wait_time or 0.1, 0.1)
+                
+                done, _ = wait(pending, timeout=wait_time, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.discard(future)
+                    try:
+                        project_data = future.result()
+                    except Exception as e:
+                        project_data = {"error": str(e)}
+                    finish(futures[future], project_data)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        return results
     
-    def _generate_fallback_project(self, learned_items: List[str],
-                                  item_type: str,
-                                  difficulty: str) -> Dict:
+    def _call_llm(self, prompt: str, attempt_info: Optional[Dict] = None) -> str:
         """
-        Tạo project fallback khi không có AI API
+        Gọi LLM backend (retry, circuit breaker, model fallback) và trả về response
         
         Args:
-            learned_items: Danh sách items đã học
-            item_type: Loại items
-            difficulty: Độ khó
+            prompt: Prompt string
+            attempt_info: Dictionary nhận "model" đã trả về response
             
         Returns:
-            Dictionary chứa thông tin project fallback
+            Response text từ backend
+            
+        Raises:
+            LLMUnavailableError: Mọi model đều lỗi hoặc quá request_deadline
         """
-        items_str = ", ".join(learned_items[:5])
+        return self._get_llm_client().generate(prompt, attempt_info=attempt_info)
+    
+    def _call_llm_stream(self, prompt: str, attempt_info: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Gọi LLM backend ở chế độ streaming (retry trước chunk đầu tiên, model fallback)
         
-        return {
-            "project_name": f"Practice Project: {items_str}",
-            "description": f"A hands-on project to apply the {item_type} you've learned",
-            "difficulty": difficulty,
-            "estimated_time": "1-2 weeks",
-            "objectives": [
-                f"Apply learned {item_type} in practice",
-                "Build a complete application",
-                "Practice coding and problem solving"
-            ],
-            "technologies_used": learned_items,
-            "implementation_steps": [
-                {
-                    "step": 1,
-                    "title": "Design and Planning",
-                    "description": "Draw diagrams, define requirements, and plan implementation"
-                },
-                {
-                    "step": 2,
-                    "title": "Develop Core Features",
-                    "description": "Implement main features of the project"
-                },
-                {
-                    "step": 3,
-                    "title": "Testing and Debugging",
-                    "description": "Thoroughly test and fix bugs"
-                },
-                {
-                    "step": 4,
-                    "title": "Finalize and Documentation",
-                    "description": "Polish UI/UX, write documentation"
-                }
-            ],
-            "learning_outcomes": [
-                f"Master the learned {item_type}",
-                "Gain real project experience",
-                "Improve problem solving skills"
-            ],
-            "bonus_features": [
-                "Add beautiful UI",
-                "Deploy project to cloud",
-                "Add unit tests"
-            ],
-            "source": "Fallback (no AI API)"
-        }
+        Args:
+            prompt: Prompt string
+            attempt_info: Dictionary nhận "model" đang stream
+            
+        Returns:
+            Iterator các chunk text
+        """
+        yield from self._get_llm_client().stream(prompt, attempt_info=attempt_info)
+    
+    def _get_llm_client(self) -> ResilientLLMClient:
+        """Lấy ResilientLLMClient của backend hiện tại (tạo lại nếu backend đã đổi)"""
+        with self._llm_client_lock:
+            if self.llm_client is None or self.llm_client.backend is not self.backend:
+                if self.llm_client is not None:
+                    self.llm_client.close()
+                self.llm_client = ResilientLLMClient(self.backend, self.model_chain,
+                                                     deadline=self.request_deadline)
+            return self.llm_client
+    
+    def get_llm_metrics(self) -> Dict[str, Dict]:
+        """
+        Lấy histogram latency/lỗi theo model (cho instrumentation)
+        
+        Returns:
+            Dictionary model -> số liệu, rỗng nếu chưa có request nào
+        """
+        return self.llm_client.get_metrics() if self.llm_client else {}
     
     def format_project_for_display(self, project_data: Dict) -> str:
         """
@@ -248,83 +654,70 @@ Output format:
         if "error" in project_data and "fallback" not in project_data:
             return f"❌ Error: {project_data['error']}"
         
+        output = [self.format_project_header()]
+        
         # Nếu có fallback, dùng fallback
         if "fallback" in project_data:
+            output.append(f"⚠️ AI unavailable ({project_data.get('error', 'unknown error')}), showing local suggestions")
+            output.append("")
             project_data = project_data["fallback"]
         
-        output = []
-        output.append("=" * 70)
-        output.append("🚀 PROJECT SUGGESTIONS")
-        output.append("=" * 70)
+        suggestions = project_data.get("project_suggestions", [])
+        output.append(f"📚 Total: {len(suggestions)} projects suggested")
         output.append("")
         
-        # Xử lý format mới với project_suggestions array
-        if "project_suggestions" in project_data:
-            suggestions = project_data["project_suggestions"]
-            output.append(f"📚 Total: {len(suggestions)} projects suggested")
-            output.append("")
-            
-            for idx, project in enumerate(suggestions, 1):
-                output.append(f"{'─' * 70}")
-                output.append(f"PROJECT {idx}: {project.get('title', 'N/A')}")
-                output.append(f"{'─' * 70}")
-                output.append("")
-                
-                output.append(f"📝 Description:")
-                output.append(f"   {project.get('description', 'N/A')}")
-                output.append("")
-                
-                if project.get('knowledge_gain'):
-                    output.append(f"💡 Knowledge Applied ({len(project['knowledge_gain'])} items):")
-                    for knowledge in project['knowledge_gain']:
-                        output.append(f"   • {knowledge}")
-                    output.append("")
-                
-                output.append(f"🎯 Reasoning:")
-                output.append(f"   {project.get('reasoning', 'N/A')}")
-                output.append("")
+        for idx, project in enumerate(suggestions, 1):
+            output.append(self.format_single_project(idx, project))
         
-        else:
-            # Format cũ (fallback)
-            output.append(f"🚀 PROJECT: {project_data.get('project_name', 'N/A')}")
-            output.append("")
+        output.append(self.format_project_footer(project_data))
+        
+        return "\n".join(output)
+    
+    def format_project_header(self) -> str:
+        """Header của phần project suggestions (dùng khi render từng phần)"""
+        return "\n".join(["=" * 70, "🚀 PROJECT SUGGESTIONS", "=" * 70, ""])
+    
+    def format_single_project(self, idx: int, project: Dict) -> str:
+        """
+        Format một project trong "project_suggestions" (render tăng dần khi streaming)
+        
+        Args:
+            idx: Số thứ tự project (1-based)
+            project: Dictionary chứa title, description, knowledge_gain, reasoning
             
-            output.append(f"📝 Description: {project_data.get('description', 'N/A')}")
-            output.append(f"⏱️ Estimated Time: {project_data.get('estimated_time', 'N/A')}")
-            output.append(f"📊 Difficulty: {project_data.get('difficulty', 'N/A')}")
+        Returns:
+            Formatted string
+        """
+        output = []
+        output.append(f"{'─' * 70}")
+        output.append(f"PROJECT {idx}: {project.get('title', 'N/A')}")
+        output.append(f"{'─' * 70}")
+        output.append("")
+        
+        output.append(f"📝 Description:")
+        output.append(f"   {project.get('description', 'N/A')}")
+        output.append("")
+        
+        if project.get('knowledge_gain'):
+            output.append(f"💡 Knowledge Applied ({len(project['knowledge_gain'])} items):")
+            for knowledge in project['knowledge_gain']:
+                output.append(f"   • {knowledge}")
             output.append("")
-            
-            if project_data.get('objectives'):
-                output.append("🎯 Objectives:")
-                for obj in project_data['objectives']:
-                    output.append(f"  • {obj}")
-                output.append("")
-            
-            if project_data.get('technologies_used'):
-                output.append("🔧 Technologies Used:")
-                output.append(f"  {', '.join(project_data['technologies_used'])}")
-                output.append("")
-            
-            if project_data.get('implementation_steps'):
-                output.append("📋 Implementation Steps:")
-                for step in project_data['implementation_steps']:
-                    output.append(f"  {step['step']}. {step['title']}")
-                    output.append(f"     {step['description']}")
-                output.append("")
-            
-            if project_data.get('learning_outcomes'):
-                output.append("💡 Learning Outcomes:")
-                for outcome in project_data['learning_outcomes']:
-                    output.append(f"  • {outcome}")
-                output.append("")
-            
-            if project_data.get('bonus_features'):
-                output.append("✨ Bonus Features:")
-                for feature in project_data['bonus_features']:
-                    output.append(f"  • {feature}")
-                output.append("")
         
+        output.append(f"🎯 Reasoning:")
+        output.append(f"   {project.get('reasoning', 'N/A')}")
+        output.append("")
+        
+        return "\n".join(output)
+    
+    def format_project_footer(self, project_data: Dict) -> str:
+        """Footer (nguồn dữ liệu) của phần project suggestions"""
+        output = []
+        if project_data.get("partial"):
+            output.append(f"⚠️ Response truncated ({project_data.get('partial_reason', 'unknown error')}), "
+                          f"showing the {len(project_data.get('project_suggestions', []))} projects received")
         output.append(f"🤖 Source: {project_data.get('source', 'Generated by Google Gemini')}")
+        if project_data.get("prompt_tokens_estimate"):
+            output.append(f"📏 Prompt size: ~{project_data['prompt_tokens_estimate']} tokens")
         output.append("=" * 70)
-        
         return "\n".join(output)
@@ -0,0 +1,223 @@
+"""
+Module tìm lộ trình chuyển đổi nghề nghiệp (career transition) giữa các occupations
+bằng đồ thị chuyển đổi thưa (k bước gần nhất mỗi job) và Dijkstra
+"""
+import heapq
+from collections import defaultdict
+from typing import List, Dict, Set, Optional, FrozenSet
+
+
+class CareerPathFinder:
+    """Class tìm chuỗi công việc trung gian rẻ nhất để đi tới job mục tiêu"""
+
+    def __init__(self, data_loader, k: int = 5, step_exponent: float = 2.0):
+        """
+        Khởi tạo CareerPathFinder
+
+        Args:
+            data_loader: Instance của DataLoader
+            k: Số bước chuyển gần nhất giữ lại cho mỗi job (chiều đi và chiều đến)
+            step_exponent: Cost của một bước chuyển = gap ** step_exponent. Với 1, gap thỏa bất đẳng
+                thức tam giác nên nhảy thẳng tới target luôn rẻ nhất; > 1 phạt bước nhảy lớn để
+                chuỗi bước nhỏ qua jobs trung gian có thể rẻ hơn
+        """
+        self.data_loader = data_loader
+        self.k = k
+        self.step_exponent = step_exponent
+
+        # Build lazy sau khi data đã load
+        self.job_requirements = None  # job name -> frozenset requirements
+        self.transition_graph = None  # job name -> list of (cost, neighbor job)
+        self._item_cost_cache = {}
+        self._graph_job_count = 0  # Số jobs lúc build (jobs có thể còn đang được stream)
+
+    def _item_cost(self, item: str) -> int:
+        """Learning cost của một requirement = level (mặc định 5 nếu không có thông tin)"""
+        if item not in self._item_cost_cache:
+            self._item_cost_cache[item] = self.data_loader.get_knowledge_info(item).get("level", 5)
+        return self._item_cost_cache[item]
+
+    def gap_cost(self, current_items: Set[str], target_requirements: FrozenSet[str]) -> int:
+        """
+        Tính learning cost của phần requirements còn thiếu
+
+        Args:
+            current_items: Set requirements/knowledge đã có (lowercase)
+            target_requirements: Requirements của job đích (lowercase)
+
+        Returns:
+            Tổng level của các requirements còn thiếu
+        """
+        return sum(self._item_cost(item) for item in target_requirements if item not in current_items)
+
+    def build_transition_graph(self):
+        """
+        Precompute đồ thị chuyển đổi thưa giữa các jobs
+
+        Chỉ tính gap cho các cặp jobs có chung ít nhất một requirement (qua inverted index),
+        mỗi job giữ k bước đi rẻ nhất và k bước đến rẻ nhất để mọi job đều có cạnh vào.
+        """
+        self.job_requirements = {}
+        jobs = list(self.data_loader.jobs_data)
+        self._graph_job_count = len(jobs)
+        for job in jobs:
+            requirements = set(k.lower() for k in job.get("essential_knowledge", []))
+            requirements.update(s.lower() for s in job.get("essential_skill", []))
+            self.job_requirements[job["name"]] = frozenset(requirements)
+
+        # Inverted index: requirement -> jobs cần requirement đó
+        jobs_by_item = defaultdict(list)
+        for job_name, requirements in self.job_requirements.items():
+            for item in requirements:
+                jobs_by_item[item].append(job_name)
+
+        outgoing = {}
+        incoming = defaultdict(list)
+        for job_name, requirements in self.job_requirements.items():
+            candidates = set()
+            for item in requirements:
+                candidates.update(jobs_by_item[item])
+            candidates.discard(job_name)
+
+            costs = [(self.gap_cost(requirements, self.job_requirements[other]), other)
+                     for other in sorted(candidates)]
+            outgoing[job_name] = heapq.nsmallest(self.k, costs)
+            for cost, other in costs:
+                incoming[other].append((cost, job_name))
+
+        edges = defaultdict(set)
+        for job_name, nearest in outgoing.items():
+            edges[job_name].update(nearest)
+        for job_name, sources in incoming.items():
+            for cost, source in heapq.nsmallest(self.k, sources):
+                edges[source].add((cost, job_name))
+
+        self.transition_graph = {job_name: sorted(edges[job_name]) for job_name in self.job_requirements}
+
+    def step_cost(self, gap: int) -> float:
+        """Cost của một bước chuyển có learning cost (gap) cho trước"""
+        return float(gap) ** self.step_exponent
+
+    def find_transition_path(self, target_job: str,
+                             current_job: Optional[str] = None,
+                             current_items: Optional[List[str]] = None) -> Dict:
+        """
+        Tìm chuỗi occupations trung gian có tổng step cost nhỏ nhất tới target job (Dijkstra)
+
+        Node là job, trọng số cạnh cố định là step_cost của gap giữa requirements hai job
+        (đã precompute trong đồ thị thưa). Từ mọi node luôn có thêm cạnh thẳng tới target,
+        nên kết quả không bao giờ tệ hơn nhảy thẳng. Mỗi query O(E log V) trên đồ thị thưa.
+
+        Args:
+            target_job: Tên job mục tiêu (có thể là other_name)
+            current_job: Tên job hiện tại của user (ưu tiên nếu có)
+            current_items: Danh sách skills/knowledge hiện tại (dùng khi không có current_job)
+
+        Returns:
+            Dictionary chứa path, chi tiết từng bước, tổng cost và tổng learning cost
+        """
+        if self.transition_graph is None or self._graph_job_count != len(self.data_loader.jobs_data):
+            self.build_transition_graph()
+
+        target_name = self.data_loader.get_canonical_job_name(target_job)
+        if target_name not in self.job_requirements:
+            return {"found": False, "error": f"Job not found: {target_job}"}
+        target_requirements = self.job_requirements[target_name]
+
+        start = None
+        if current_job:
+            start = self.data_loader.get_canonical_job_name(current_job)
+            if start not in self.job_requirements:
+                return {"found": False, "error": f"Job not found: {current_job}"}
+            start_items = self.job_requirements[start]
+        else:
+            start_items = frozenset(item.lower() for item in (current_items or []))
+
+        def items_of(job_name: Optional[str]) -> FrozenSet[str]:
+            return start_items if job_name is None else self.job_requirements[job_name]
+
+        def neighbors(job_name: Optional[str]) -> List:
+            if job_name is None:
+                # Node ảo cho profile: nối tới k jobs có gap nhỏ nhất (chỉ tính 1 hàng, không all-pairs)
+                edges = heapq.nsmallest(self.k, [(self.gap_cost(start_items, requirements), name)
+                                                 for name, requirements in self.job_requirements.items()])
+            else:
+                edges = list(self.transition_graph[job_name])
+            # Cạnh thẳng tới target (đồ thị k gần nhất có thể không chứa cạnh này)
+            edges.append((self.gap_cost(items_of(job_name), target_requirements), target_name))
+            return edges
+
+        best_cost = {start: 0.0}
+        parent = {start: None}
+        heap = [(0.0, "" if start is None else start, start)]
+        closed = set()
+
+        while heap:
+            cost, _, job_name = heapq.heappop(heap)
+            if job_name in closed:
+                continue
+            if job_name == target_name:
+                break
+            closed.add(job_name)
+
+            for gap, neighbor in neighbors(job_name):
+                new_cost = cost + self.step_cost(gap)
+                if new_cost < best_cost.get(neighbor, float("inf")):
+                    best_cost[neighbor] = new_cost
+                    parent[neighbor] = job_name
+                    heapq.heappush(heap, (new_cost, neighbor, neighbor))
+
+        # Truy vết path
+        path = [target_name]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        path.reverse()
+
+        steps = []
+        previous_name = start
+        for job_name in path:
+            if job_name == start:
+                continue
+            previous_items = items_of(previous_name)
+            requirements = self.job_requirements[job_name]
+            steps.append({
+                "from": previous_name,
+                "to": job_name,
+                "cost": self.gap_cost(previous_items, requirements),
+                "learn": sorted(item for item in requirements if item not in previous_items)
+            })
+            previous_name = job_name
+
+        return {
+            "found": True,
+            "path": path,
+            "steps": steps,
+            "total_cost": round(best_cost[target_name], 2),
+            "learning_cost": sum(step["cost"] for step in steps)
+        }
+
+    def format_transition_path_for_display(self, path_data: Dict) -> str:
+        """
+        Format kết quả find_transition_path thành text dễ đọc
+
+        Args:
+            path_data: Dictionary từ find_transition_path
+
+        Returns:
+            Formatted string
+        """
+        if not path_data.get("found"):
+            return f"❌ {path_data.get('error', 'No transition path found')}"
+
+        output = [f"🧭 CAREER TRANSITION PATH: {' → '.join(path_data['path'])}",
+                  "=" * 70,
+                  f"📊 Total learning cost: {path_data['learning_cost']} (sum of item levels)",
+                  ""]
+        for idx, step in enumerate(path_data["steps"], 1):
+            origin = step["from"] or "Your current profile"
+            output.append(f"Step {idx}: {origin} → {step['to']} (cost {step['cost']}, "
+                          f"{len(step['learn'])} new items)")
+            for item in step["learn"]:
+                output.append(f"   • {item}")
+            output.append("")
+        return "\n".join(output)
@@ -0,0 +1,199 @@
+"""
+Module tiện ích cho xử lý đồng thời: rate limiter và gộp request (single-flight)
+dùng chung giữa các threads
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class RateLimiter:
+    """Token bucket rate limiter, an toàn khi dùng từ nhiều threads"""
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        """
+        Khởi tạo RateLimiter
+
+        Args:
+            rate_per_second: Số request tối đa mỗi giây (trung bình)
+            burst: Số request tối đa được phép dồn cùng lúc
+        """
+        if rate_per_second <= 0:
+            raise ValueError("rate_per_second must be positive")
+        self.rate_per_second = rate_per_second
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        Chờ tới khi có token
+
+        Args:
+            timeout: Thời gian chờ tối đa (giây), None: chờ vô hạn
+
+        Returns:
+            True nếu lấy được token, False nếu hết thời gian chờ
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate_per_second)
+                self._last_refill = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait_time = (1 - self._tokens) / self.rate_per_second
+
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+
+
+class SingleFlightCancelled(Exception):
+    """Waiter đã hủy việc chờ kết quả của SingleFlight"""
+
+
+class _Flight:
+    """Trạng thái của một upstream call đang chạy trong SingleFlight"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.result = None
+        self.error = None
+        self.progress = []
+        self.subscribers = []
+        self.waiters = 0
+        self.cancel_event = threading.Event()  # Set khi mọi waiter đã rời đi
+
+
+class SingleFlight:
+    """
+    Gộp các request đồng thời có cùng key thành một upstream call duy nhất,
+    kết quả (và progress) được chia cho mọi waiter. Khi mọi waiter đã hủy hoặc hết timeout,
+    cancel_event của upstream call được set để fn dừng sớm
+    """
+
+    def __init__(self):
+        """Khởi tạo SingleFlight"""
+        self._lock = threading.Lock()
+        self._flights = {}
+        self.calls = 0
+        self.executions = 0
+        self.deduplicated = 0
+        self.cancelled = 0
+
+    def do(self, key: Hashable, fn: Callable[[Callable[[Any], None], threading.Event], Any],
+           on_progress: Optional[Callable[[Any], None]] = None,
+           cancel_event: Optional[threading.Event] = None,
+           timeout: Optional[float] = None) -> Any:
+        """
+        Chạy fn cho key, hoặc chờ call đang chạy với cùng key
+
+        Upstream call chạy ở thread riêng nên hủy một waiter không ảnh hưởng tới các waiter
+        khác. Khi waiter cuối cùng rời đi, cancel_event truyền cho fn được set (fn tự kiểm tra
+        để dừng, vd. giữa các chunk stream); request mới cùng key lúc đó sẽ chạy call mới.
+
+        Args:
+            key: Key định danh request
+            fn: Function nhận (publish(item) để phát progress, cancel_event), trả về kết quả
+            on_progress: Callback cho từng item progress (item đã phát trước đó được replay)
+            cancel_event: Event set khi waiter muốn hủy
+            timeout: Thời gian chờ tối đa (giây), None: chờ vô hạn
+
+        Returns:
+            Kết quả của fn (exception của fn được raise lại cho mọi waiter)
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            # Call đang bị hủy (không còn waiter) thì không gộp vào
+            leader = flight is None or flight.cancel_event.is_set()
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.executions += 1
+            else:
+                self.deduplicated += 1
+            flight.waiters += 1
+
+        if on_progress:
+            with flight.lock:
+                for item in flight.progress:
+                    on_progress(item)
+                flight.subscribers.append(on_progress)
+
+        if leader:
+            threading.Thread(target=self._run, args=(key, flight, fn), daemon=True).start()
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not flight.done.is_set():
+            wait_time = 0.1 if cancel_event is not None else None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._leave(flight, on_progress)
+                    raise TimeoutError(f"Request timed out after {timeout:.0f}s")
+                wait_time = remaining if wait_time is None else min(wait_time, remaining)
+            if flight.done.wait(wait_time):
+                break
+            if cancel_event is not None and cancel_event.is_set():
+                self._leave(flight, on_progress)
+                with self._lock:
+                    self.cancelled += 1
+                raise SingleFlightCancelled()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def _run(self, key: Hashable, flight: _Flight, fn: Callable):
+        """Thực thi upstream call và đánh thức các waiter"""
+        def publish(item: Any):
+            with flight.lock:
+                flight.progress.append(item)
+                for subscriber in flight.subscribers:
+                    subscriber(item)
+
+        try:
+            flight.result = fn(publish, flight.cancel_event)
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done.set()
+
+    def _leave(self, flight: _Flight, on_progress: Optional[Callable]):
+        """Gỡ callback progress của waiter rời đi, hủy upstream call nếu không còn waiter nào"""
+        if on_progress:
+            with flight.lock:
+                if on_progress in flight.subscribers:
+                    flight.subscribers.remove(on_progress)
+        with self._lock:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.done.is_set():
+                flight.cancel_event.set()
+
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê gộp request
+
+        Returns:
+            Dictionary {"calls", "executions", "deduplicated", "cancelled", "in_flight"}
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "deduplicated": self.deduplicated,
+                "cancelled": self.cancelled,
+                "in_flight": len(self._flights)
+            }
@@ -1,8 +1,14 @@
 """
 Module để load và quản lý dữ liệu từ các file JSON
 """
+import hashlib
 import json
-from typing import Dict, List, Any
+import os
+import threading
+from typing import Dict, List, Any, Iterator, Optional, Tuple
+from graph_utils import PrerequisiteGraph
+from job_store import JobStore
+from search_index import BM25Index, tokenize
 
 
 class DataLoader:
@@ -16,26 +22,151 @@ class DataLoader:
             data_dir: Thư mục chứa các file dữ liệu
         """
         self.data_dir = data_dir
-        self.jobs_data = []
+        self.jobs_data = []  # List JobView (các cột nằm trong job_store)
+        self.job_store = JobStore()
         self.skills_data = []
         self.knowledge_data = []
         self.skill_details = {}  # Dictionary để lưu thông tin chi tiết về skills
         self.detailed_to_canonical = {}  # Map từ detailed item -> canonical skill/knowledge
         self.canonical_to_detailed = {}  # Map từ canonical -> list of detailed items
         self.job_other_name_to_canonical = {}  # Map từ other_name -> canonical job name
+        self.job_name_index = {}  # Map từ name/other_name (lowercase) -> job, build dần khi stream
+        self.search_index = BM25Index()  # BM25 trên name, other_name, description, build dần khi stream
+        
+        # Set khi toàn bộ jobs đã được load (trước đó jobs_data chỉ chứa một phần)
+        self.jobs_loaded = threading.Event()
+        
+        # Đồ thị prerequisites (skills + knowledge) compile 1 lần khi load
+        self.prerequisite_graph = PrerequisiteGraph()
+        
+        # Base roadmaps precompute bởi make-assets (chỉ dùng khi hash knowledge.txt khớp)
+        self.knowledge_hash = None
+        self.base_roadmaps = {}
+        
+        # Project suggestions pre-generate theo profile đại diện (chỉ dùng khi hash data khớp)
+        self.pregenerated_suggestions = {}
+        
+        # File jobs thực sự được load (data.ndjson hoặc data.json), artifact hash theo file này
+        self.jobs_file = "assets/data.json"
         
         # Cache expanded skills/knowledge để tránh tính toán lại
         self.expanded_skills_cache = None
         self.expanded_knowledge_cache = None
         
     def load_all_data(self):
-        """Load tất cả dữ liệu từ các file JSON"""
-        self.jobs_data = self.load_json("assets/data.json")
+        """
+        Load tất cả dữ liệu từ các file JSON
+        
+        Skills/knowledge (nhỏ) được load trước để UI dùng được ngay; jobs được stream sau đó,
+        index được cập nhật theo từng record nên matching/autocomplete chạy được trên phần đã load
+        """
         self.skills_data = self.load_json("assets/skill.json")
         self.knowledge_data = self.load_json("assets/knowledge.json")
         self.skill_details = self._parse_skill_details("assets/knowledge.txt")
+        self.prerequisite_graph.compile(self.skills_data, self.knowledge_data, self.skill_details)
+        self.knowledge_hash = self.compute_file_hash("assets/knowledge.txt")
         self._build_mapping_tables()  # Build mapping tables sau khi load data
         self._build_expanded_cache()  # Build cache cho expanded skills/knowledge
+        self.load_jobs()
+        self.base_roadmaps = self._load_base_roadmaps("assets/base_roadmaps.json")
+        self.pregenerated_suggestions = self._load_pregenerated_suggestions("assets/project_suggestions.json")
+    
+    def load_jobs(self):
+        """
+        Load jobs từ assets/data.ndjson (stream từng dòng) nếu có và không cũ hơn
+        assets/data.json, nếu không thì từ assets/data.json
+        
+        Với NDJSON, description/url không được giữ trong bộ nhớ mà đọc lại từ file theo offset
+        """
+        self.jobs_loaded.clear()
+        self.job_store.close()
+        self.jobs_data = []
+        self.job_name_index = {}
+        self.job_other_name_to_canonical = {}
+        self.search_index = BM25Index()
+        ndjson_path = f"{self.data_dir}/assets/data.ndjson"
+        if self._ndjson_is_current(ndjson_path, f"{self.data_dir}/assets/data.json"):
+            self.jobs_file = "assets/data.ndjson"
+            self.job_store = JobStore(ndjson_path)
+            jobs = self.iter_ndjson(self.jobs_file)
+        else:
+            self.jobs_file = "assets/data.json"
+            self.job_store = JobStore()
+            jobs = ((None, job) for job in self.load_json(self.jobs_file))
+        for offset, job in jobs:
+            self._add_job(job, offset)
+        self.jobs_loaded.set()
+    
+    @staticmethod
+    def _ndjson_is_current(ndjson_path: str, json_path: str) -> bool:
+        """
+        Kiểm tra data.ndjson (make-assets sinh ra từ data.json) dùng được không
+        
+        Args:
+            ndjson_path: Đường dẫn data.ndjson
+            json_path: Đường dẫn data.json
+            
+        Returns:
+            False nếu không có data.ndjson hoặc data.json đã được sửa sau khi data.ndjson được ghi
+        """
+        if not os.path.exists(ndjson_path):
+            return False
+        if os.path.exists(json_path) and os.path.getmtime(json_path) > os.path.getmtime(ndjson_path):
+            print("assets/data.ndjson is older than assets/data.json, loading data.json "
+                  "(run make-assets to regenerate it)")
+            return False
+        return True
+    
+    def iter_ndjson(self, filename: str) -> Iterator[Tuple[int, Dict]]:
+        """
+        Đọc file NDJSON từng record một (không giữ toàn bộ file trong bộ nhớ)
+        
+        Args:
+            filename: Tên file cần đọc
+            
+        Returns:
+            Iterator (byte offset của dòng, record), bỏ qua dòng rỗng hoặc hỏng
+        """
+        try:
+            with open(f"{self.data_dir}/{filename}", "rb") as f:
+                offset = 0
+                for line_number, line in enumerate(f, 1):
+                    line_offset = offset
+                    offset += len(line)
+                    if not line.strip():
+                        continue
+                    try:
+                        yield line_offset, json.loads(line)
+                    except json.JSONDecodeError:
+                        print(f"Error reading line {line_number} of {filename}")
+        except FileNotFoundError:
+            print(f"File not found: {filename}")
+    
+    def _add_job(self, record: Dict, offset: Optional[int] = None, keys: Optional[Tuple[str, ...]] = None):
+        """
+        Thêm một job và cập nhật các index liên quan
+        
+        Args:
+            record: Dictionary thông tin job
+            offset: Location của record cho job_store (byte offset trong data.ndjson, None nếu load từ data.json)
+            keys: Các key của job nếu record chỉ chứa các trường resident
+        """
+        job = self.job_store.append(record, offset, keys)
+        canonical_job_name = job["name"]
+        # Giữ match đầu tiên như khi duyệt tuần tự jobs_data
+        self.job_name_index.setdefault(canonical_job_name.lower(), job)
+        for other_name in job.get("other_name", []):
+            other_name_lower = other_name.lower()
+            self.job_name_index.setdefault(other_name_lower, job)
+            self.job_other_name_to_canonical[other_name_lower] = canonical_job_name
+        if self.search_index is not None:
+            # Index description từ record (JobView không giữ description trong bộ nhớ)
+            self.search_index.add(len(self.jobs_data), {
+                "name": canonical_job_name,
+                "aliases": " ".join(record.get("other_name", [])),
+                "description": record.get("description", "")
+            })
+        self.jobs_data.append(job)
         
     def load_json(self, filename: str) -> Any:
         """
@@ -57,6 +188,73 @@ class DataLoader:
             print(f"Error reading file: {filename}")
             return []
             
+    def compute_file_hash(self, filename: str) -> str:
+        """
+        Tính SHA-256 của nội dung file (dùng để kiểm tra artifact còn khớp dữ liệu không)
+        
+        Args:
+            filename: Tên file cần hash
+            
+        Returns:
+            Hex digest, hoặc None nếu không đọc được file
+        """
+        try:
+            with open(f"{self.data_dir}/{filename}", "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+    
+    def _load_base_roadmaps(self, filename: str) -> Dict[str, Dict]:
+        """
+        Load base roadmaps precompute, bỏ qua nếu hash knowledge.txt không khớp
+        
+        Args:
+            filename: Tên file artifact base roadmaps
+            
+        Returns:
+            Dictionary job name -> base plan (rỗng nếu không dùng được)
+        """
+        try:
+            with open(f"{self.data_dir}/{filename}", "r", encoding="utf-8") as f:
+                artifact = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Error reading file: {filename}")
+            return {}
+        
+        if not self.knowledge_hash or artifact.get("knowledge_hash") != self.knowledge_hash:
+            print(f"Base roadmaps are outdated (knowledge.txt changed), ignoring {filename}")
+            return {}
+        
+        return artifact.get("roadmaps", {})
+    
+    def _load_pregenerated_suggestions(self, filename: str) -> Dict:
+        """
+        Load project suggestions pre-generate, bỏ qua nếu file jobs đã load hoặc knowledge.txt đã đổi
+        
+        Args:
+            filename: Tên file artifact project suggestions
+            
+        Returns:
+            Dictionary {"model", "profiles", "suggestions"} (rỗng nếu không dùng được)
+        """
+        try:
+            with open(f"{self.data_dir}/{filename}", "r", encoding="utf-8") as f:
+                artifact = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError:
+            print(f"Error reading file: {filename}")
+            return {}
+        
+        if (artifact.get("knowledge_hash") != self.knowledge_hash or
+                artifact.get("data_hash") != self.compute_file_hash(self.jobs_file)):
+            print(f"Pre-generated suggestions are outdated (assets changed), ignoring {filename}")
+            return {}
+        
+        return artifact
+    
     def _parse_skill_details(self, filename: str) -> Dict[str, Dict]:
         """
         Parse file knowledge.txt để lấy thông tin chi tiết về skills
@@ -92,16 +290,8 @@ class DataLoader:
         Returns:
             Thông tin công việc hoặc None
         """
-        job_name_lower = job_name.lower()
-        for job in self.jobs_data:
-            if job["name"].lower() == job_name_lower:
-                return job
-            # Kiểm tra cả các tên khác
-            if "other_name" in job:
-                for other in job["other_name"]:
-                    if other.lower() == job_name_lower:
-                        return job
-        return None
+        # Index gồm cả tên chính và các tên khác
+        return self.job_name_index.get(job_name.lower())
     
     def get_skill_info(self, skill_name: str) -> Dict:
         """
@@ -135,28 +325,101 @@ class DataLoader:
             "prerequisites": []
         })
     
-    def search_jobs(self, query: str) -> List[Dict]:
+    def search_jobs(self, query: str, limit: Optional[int] = None, require_all: bool = False) -> List[Dict]:
         """
-        Tìm kiếm jobs theo tên
+        Tìm kiếm jobs theo tên, các tên khác và description, xếp hạng theo BM25
         
         Args:
             query: Từ khóa tìm kiếm
+            limit: Số kết quả tối đa (None: tất cả)
+            require_all: Chỉ lấy jobs match mọi từ của query (mặc định: match bất kỳ từ nào)
             
         Returns:
-            Danh sách các jobs phù hợp
+            Danh sách các jobs phù hợp (phù hợp nhất trước)
         """
+        results = self._ranked_job_search(query, limit, require_all)
+        enough = len(results) >= limit if limit is not None else bool(results)
+        if enough:
+            return results
+        
+        # BM25 chưa đủ kết quả (ví dụ chuỗi con giữa từ): bổ sung bằng tìm chuỗi con trong tên như trước
         query_lower = query.lower()
-        results = []
+        found = set(id(job) for job in results)
         for job in self.jobs_data:
-            if query_lower in job["name"].lower():
+            if limit is not None and len(results) >= limit:
+                break
+            if id(job) in found:
+                continue
+            if query_lower in job["name"].lower() or any(
+                    query_lower in other.lower() for other in job.get("other_name", [])):
                 results.append(job)
-            elif "other_name" in job:
-                for other in job["other_name"]:
-                    if query_lower in other.lower():
-                        results.append(job)
-                        break
         return results
     
+    def _ranked_job_search(self, query: str, limit: Optional[int], require_all: bool = False) -> List[Dict]:
+        """
+        Tìm jobs xếp hạng BM25 (token cuối match như prefix, các token kết hợp kiểu OR hoặc AND)
+        
+        Args:
+            query: Từ khóa tìm kiếm
+            limit: Số kết quả tối đa (None: tất cả)
+            require_all: Document phải match mọi token
+            
+        Returns:
+            Danh sách jobs theo điểm giảm dần
+        """
+        if self.search_index is None:
+            return []
+        return [self.jobs_data[doc_id]
+                for doc_id, _ in self.search_index.search(query, limit=limit, require_all=require_all)]
+    
+    def autocomplete_jobs(self, query: str, limit: int = 10) -> List[tuple]:
+        """
+        Gợi ý job cho ô nhập job (search_jobs với mọi từ đã gõ đều phải match)
+        
+        Args:
+            query: Text user đã gõ
+            limit: Số gợi ý tối đa
+            
+        Returns:
+            List of tuples: [(display_name, canonical_name), ...], mỗi canonical job tối đa 1 lần
+        """
+        matching_jobs = []
+        seen_canonical = set()  # Để tránh duplicate canonical names
+        for job in self.search_jobs(query, limit=limit, require_all=True):
+            if job["name"] in seen_canonical:
+                continue
+            seen_canonical.add(job["name"])
+            matching_jobs.append(self.get_job_display_name(job, query))
+        return matching_jobs
+    
+    def get_job_display_name(self, job: Dict, query: str) -> tuple:
+        """
+        Tên hiển thị của job trong gợi ý: dùng other_name nếu query khớp other_name mà không khớp tên chính
+        
+        Args:
+            job: Thông tin job
+            query: Text user đã gõ
+            
+        Returns:
+            Tuple (display_name, canonical_name), ví dụ ("devops engineer → cloud DevOps engineer", "cloud DevOps engineer")
+        """
+        query_lower = query.strip().lower()
+        tokens = tokenize(query)
+        
+        def matches(text: str) -> bool:
+            text_lower = text.lower()
+            if query_lower in text_lower:
+                return True
+            words = tokenize(text_lower)
+            return bool(tokens) and all(any(word.startswith(token) for word in words) for token in tokens)
+        
+        canonical_name = job["name"]
+        if not matches(canonical_name):
+            for other_name in job.get("other_name", []):
+                if matches(other_name):
+                    return (f"{other_name} → {canonical_name}", canonical_name)
+        return (canonical_name, canonical_name)
+    
     def get_all_jobs(self) -> List[str]:
         """Lấy danh sách tất cả các job names"""
         return [job["name"] for job in self.jobs_data]
@@ -174,7 +437,8 @@ class DataLoader:
         Build các bảng mapping:
         - detailed items -> canonical skill/knowledge
         - canonical -> list of detailed items
-        - job other_name -> canonical job name
+        
+        Mapping job other_name -> canonical job name được build trong _add_job
         """
         # Build skill/knowledge mappings từ knowledge.txt
         for canonical_name, info in self.skill_details.items():
@@ -185,15 +449,6 @@ class DataLoader:
             for detailed_item in detailed_items:
                 detailed_lower = detailed_item.lower()
                 self.detailed_to_canonical[detailed_lower] = canonical_name
-        
-        # Build job other_name mappings
-        for job in self.jobs_data:
-            canonical_job_name = job["name"]
-            other_names = job.get("other_name", [])
-            
-            for other_name in other_names:
-                other_name_lower = other_name.lower()
-                self.job_other_name_to_canonical[other_name_lower] = canonical_job_name
     
     def get_canonical_skill_or_knowledge(self, item_name: str) -> str:
         """
@@ -231,9 +486,9 @@ class DataLoader:
             return self.job_other_name_to_canonical[job_lower]
         
         # Kiểm tra xem có phải là canonical name không
-        for job in self.jobs_data:
-            if job["name"].lower() == job_lower:
-                return job["name"]
+        job = self.job_name_index.get(job_lower)
+        if job is not None and job["name"].lower() == job_lower:
+            return job["name"]
         
         # Nếu không tìm thấy, trả về chính nó
         return job_name
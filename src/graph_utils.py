@@ -2,6 +2,8 @@
 Module xử lý đồ thị, tìm SCC (Strongly Connected Components) bằng Tarjan's Algorithm
 và topological sort cho roadmap
 """
+import heapq
+import math
 from collections import defaultdict, deque
 from typing import List, Dict, Set, Tuple
 
@@ -138,8 +140,8 @@ class GraphUtils:
                         break
                 self.sccs.append(scc)
         
-        # Chạy Tarjan cho tất cả nodes chưa thăm
-        for node in self.nodes:
+        # Chạy Tarjan cho tất cả nodes chưa thăm (sorted để kết quả ổn định giữa các lần chạy)
+        for node in sorted(self.nodes):
             if node not in self.index:
                 strongconnect(node)
         
@@ -173,7 +175,7 @@ class GraphUtils:
             scc_in_degree[scc_id] = 0
         
         # Duyệt qua tất cả edges trong graph gốc
-        for node in self.nodes:
+        for node in sorted(self.nodes):
             node_scc = scc_map[node]
             for neighbor in self.graph[node]:
                 neighbor_scc = scc_map[neighbor]
@@ -185,7 +187,7 @@ class GraphUtils:
                         scc_in_degree[neighbor_scc] += 1
         
         # Convert sets to lists
-        condensation_graph = {k: list(v) for k, v in condensation_graph.items()}
+        condensation_graph = {k: sorted(v) for k, v in condensation_graph.items()}
         
         return condensation_graph, scc_map, dict(scc_in_degree)
     
@@ -298,16 +300,84 @@ class GraphUtils:
                         queue.append(neighbor_scc)
         
         unvisited = set(range(len(sccs))) - visited
-        # if unvisited:
-        #     print(f"WARNING: Unvisited SCCs detected: {unvisited}")
-        #     print(f"This might indicate a cycle in condensation graph!")
+        if unvisited:
+            raise ValueError(f"Unvisited SCCs detected: {sorted(unvisited)}")
 
         return result
     
+    def topological_sort_by_level(self, sccs: List[List[str]],
+                                  condensation_graph: Dict,
+                                  scc_in_degree: Dict,
+                                  node_levels: Dict[str, int]) -> List[Dict]:
+        """
+        Topological sort ưu tiên level - luôn lấy SCC sẵn sàng có level thấp nhất (heap)
+        
+        Key của heap là (level nhỏ nhất trong SCC, tên node nhỏ nhất, SCC_id) nên thứ tự
+        không phụ thuộc thứ tự duyệt set. Các SCC 1 node liên tiếp nối thẳng với nhau
+        được gom thành một stage "path". Độ phức tạp O((V+E) log V).
+        
+        Args:
+            sccs: List of SCCs
+            condensation_graph: Graph của các SCCs
+            scc_in_degree: In-degree của mỗi SCC
+            node_levels: Dictionary chứa level của mỗi node
+            
+        Returns:
+            List of stages, cùng format với topological_sort_dfs_style
+        """
+        def key(scc_id: int) -> Tuple:
+            scc_nodes = sccs[scc_id]
+            return (min(node_levels.get(node, 5) for node in scc_nodes), min(scc_nodes), scc_id)
+        
+        temp_in_degree = scc_in_degree.copy()
+        ready = [key(scc_id) for scc_id in range(len(sccs)) if temp_in_degree[scc_id] == 0]
+        heapq.heapify(ready)
+        
+        result = []
+        visited_count = 0
+        
+        while ready:
+            scc_id = heapq.heappop(ready)[-1]
+            visited_count += 1
+            scc_nodes = sccs[scc_id]
+            
+            if len(scc_nodes) > 1:
+                result.append({
+                    "type": "scc",
+                    "nodes": sorted(scc_nodes, key=lambda x: (node_levels.get(x, 5), x)),
+                    "is_parallel": True,
+                    "scc_id": scc_id
+                })
+            else:
+                last = result[-1] if result else None
+                if (last and last["type"] == "path"
+                        and scc_id in condensation_graph.get(last["scc_path"][-1], [])):
+                    # Nối tiếp path nếu SCC này là successor trực tiếp của node cuối path
+                    last["nodes"].extend(scc_nodes)
+                    last["scc_path"].append(scc_id)
+                else:
+                    result.append({
+                        "type": "path",
+                        "nodes": list(scc_nodes),
+                        "is_parallel": False,
+                        "scc_path": [scc_id]
+                    })
+            
+            for neighbor_scc in condensation_graph.get(scc_id, []):
+                temp_in_degree[neighbor_scc] -= 1
+                if temp_in_degree[neighbor_scc] == 0:
+                    heapq.heappush(ready, key(neighbor_scc))
+        
+        if visited_count != len(sccs):
+            raise ValueError(f"Unvisited SCCs detected: {len(sccs) - visited_count} SCCs")
+        
+        return result
+    
     def get_learning_path(self, target_items: List[str], 
                          get_prerequisites_func, 
                          get_level_func,
-                         learned_items: Set[str] = None) -> Dict:
+                         learned_items: Set[str] = None,
+                         sort_strategy: str = "dfs") -> Dict:
         """
         Tạo learning path cho các items cần học bằng Tarjan + Topological Sort
         
@@ -316,6 +386,7 @@ class GraphUtils:
             get_prerequisites_func: Function để lấy prerequisites
             get_level_func: Function để lấy level của một item
             learned_items: Set các items mà user đã học
+            sort_strategy: "dfs" (topological_sort_dfs_style) hoặc "level" (topological_sort_by_level)
             
         Returns:
             Dictionary chứa thông tin về learning path
@@ -365,10 +436,15 @@ class GraphUtils:
             # print(f"SCC {scc_id}: in-degree = {in_deg} {status}")
         # print("="*70 + "\n")
         
-        # Topological sort theo DFS style
-        learning_path = self.topological_sort_dfs_style(
-            sccs, condensation_graph, scc_in_degree, node_levels
-        )
+        # Topological sort theo DFS style hoặc theo level (heap)
+        if sort_strategy == "level":
+            learning_path = self.topological_sort_by_level(
+                sccs, condensation_graph, scc_in_degree, node_levels
+            )
+        else:
+            learning_path = self.topological_sort_dfs_style(
+                sccs, condensation_graph, scc_in_degree, node_levels
+            )
         # print(f"🎯 Learning path: {learning_path}")
         
         # Tìm các SCCs có nhiều hơn 1 node (có cycle)
@@ -382,6 +458,8 @@ class GraphUtils:
             "has_cycles": len(cycles_info) > 0,
             "cycles": cycles_info,
             "sccs": sccs,
+            "condensation_graph": condensation_graph,
+            "node_levels": node_levels,
             "total_items": len(self.nodes)  # Đếm tất cả nodes trong graph (chưa học)
         }
     
@@ -415,6 +493,166 @@ class GraphUtils:
         return result
 
 
+class PrerequisiteGraph:
+    """
+    Đồ thị prerequisites compile một lần lúc load data, gồm cả skills và knowledge
+    
+    Mỗi node (lowercase) mang type tag "skill" hoặc "knowledge"; cạnh prerequisite
+    có thể nối giữa hai loại khác nhau. Tên gốc (đúng chữ hoa/thường) được giữ riêng để hiển thị.
+    """
+    
+    def __init__(self):
+        self.node_types = {}  # node -> "skill" | "knowledge"
+        self.prerequisites = {}  # node -> list prerequisites (lowercase)
+        self.levels = {}  # node -> level
+        self.canonical_names = {}  # node -> tên gốc trong skill.json/knowledge.json/knowledge.txt
+    
+    def compile(self, skills: List[str], knowledge: List[str], item_details: Dict[str, Dict]):
+        """
+        Compile đồ thị từ danh sách skills, knowledge và thông tin chi tiết (knowledge.txt)
+        
+        Args:
+            skills: Danh sách skills (skill.json)
+            knowledge: Danh sách knowledge (knowledge.json)
+            item_details: Dictionary tên (lowercase) -> {"level", "detailed", "prerequisites"}
+        """
+        self.node_types.clear()
+        self.prerequisites.clear()
+        self.levels.clear()
+        self.canonical_names.clear()
+        
+        for skill in skills:
+            self.node_types[skill.lower()] = "skill"
+            self.canonical_names[skill.lower()] = skill
+        # Knowledge ưu tiên hơn nếu trùng tên với skill
+        for name in list(knowledge) + list(item_details.keys()):
+            self.node_types[name.lower()] = "knowledge"
+        for name in knowledge:
+            self.canonical_names[name.lower()] = name
+        
+        for name, info in item_details.items():
+            prerequisites = []
+            for prereq in info.get("prerequisites", []):
+                prereq_lower = prereq.lower()
+                if prereq_lower != name and prereq_lower not in prerequisites:
+                    prerequisites.append(prereq_lower)
+                self.node_types.setdefault(prereq_lower, "knowledge")
+                self.canonical_names.setdefault(prereq_lower, prereq)
+            self.prerequisites[name] = prerequisites
+            self.levels[name] = info.get("level", 5)
+    
+    def get_prerequisites(self, item: str) -> List[str]:
+        """Lấy prerequisites trực tiếp của item"""
+        return self.prerequisites.get(item.lower(), [])
+    
+    def get_level(self, item: str) -> int:
+        """Lấy level của item (mặc định 5)"""
+        return self.levels.get(item.lower(), 5)
+    
+    def get_type(self, item: str) -> str:
+        """Lấy type tag của item ("skill" hoặc "knowledge", mặc định knowledge)"""
+        return self.node_types.get(item.lower(), "knowledge")
+    
+    def get_canonical_name(self, item: str) -> str:
+        """Lấy tên gốc của item để hiển thị (mặc định chính item)"""
+        return self.canonical_names.get(item.lower(), item)
+    
+    def with_canonical_names(self, roadmap: Dict) -> Dict:
+        """
+        Đổi các node lowercase trong roadmap (format của create_roadmap) sang tên gốc để hiển thị
+        
+        Args:
+            roadmap: Roadmap dùng node lowercase
+            
+        Returns:
+            Roadmap cùng format với tên gốc
+        """
+        name = self.get_canonical_name
+        converted = dict(roadmap)
+        converted["roadmap"] = [dict(stage, items=[name(item) for item in stage["items"]])
+                                for stage in roadmap["roadmap"]]
+        converted["cycles"] = [[name(item) for item in cycle] for cycle in roadmap["cycles"]]
+        if "item_types" in roadmap:
+            converted["item_types"] = {name(item): t for item, t in roadmap["item_types"].items()}
+        scc_graph = roadmap["scc_graph"]
+        converted["scc_graph"] = {
+            "sccs": [[name(item) for item in scc] for scc in scc_graph["sccs"]],
+            "edges": scc_graph["edges"],
+            "node_levels": {name(item): level for item, level in scc_graph["node_levels"].items()}
+        }
+        return converted
+    
+    def create_roadmap(self, missing_items: List[str], learned_items: Set[str] = None,
+                       sort_strategy: str = "dfs") -> Dict:
+        """
+        Tạo roadmap cho skills và knowledge còn thiếu trong một lần duyệt
+        
+        Args:
+            missing_items: Danh sách skills/knowledge cần học
+            learned_items: Set skills/knowledge mà user đã học
+            sort_strategy: "dfs" hoặc "level" (xem GraphUtils.get_learning_path)
+            
+        Returns:
+            Dictionary cùng format với create_roadmap, thêm "item_types"
+        """
+        learned_lower = set(item.lower() for item in (learned_items or set()))
+        targets = []
+        for item in missing_items:
+            if item.lower() not in targets:
+                targets.append(item.lower())
+        
+        graph = GraphUtils()
+        path_info = graph.get_learning_path(targets, self.get_prerequisites, self.get_level,
+                                            learned_lower, sort_strategy)
+        formatted_groups = graph.get_parallel_learning_groups(path_info["path"])
+        
+        return {
+            "roadmap": formatted_groups,
+            "has_cycles": path_info["has_cycles"],
+            "cycles": path_info["cycles"],
+            "total_items": path_info["total_items"],
+            "item_types": {node: self.get_type(node) for node in graph.nodes},
+            "scc_graph": {
+                "sccs": path_info["sccs"],
+                "edges": path_info["condensation_graph"],
+                "node_levels": path_info["node_levels"]
+            }
+        }
+
+
+def _item_info_funcs(data_loader, item_type: str):
+    """Tạo functions lấy prerequisites và level của item theo item_type"""
+    def get_info(item: str) -> Dict:
+        if item_type == "knowledge":
+            return data_loader.get_knowledge_info(item)
+        return data_loader.get_skill_info(item)
+    
+    def get_prerequisites(item: str) -> List[str]:
+        return get_info(item).get("prerequisites", [])
+    
+    def get_level(item: str) -> int:
+        return get_info(item).get("level", 5)
+    
+    return get_prerequisites, get_level
+
+
+def create_base_plan(target_items: List[str], data_loader) -> Dict:
+    """
+    Hàm tiện ích tạo base plan (chưa học gì) cho một job, dùng khi build assets
+    
+    Args:
+        target_items: Danh sách các items cần học
+        data_loader: Instance của DataLoader (đã load, có prerequisite_graph)
+        
+    Returns:
+        Base plan (xem build_base_plan)
+    """
+    prerequisite_graph = data_loader.prerequisite_graph
+    return build_base_plan([item.lower() for item in target_items],
+                           prerequisite_graph.get_prerequisites,
+                           prerequisite_graph.get_level)
+
+
 def create_roadmap(missing_items: List[str], 
                    data_loader,
                    item_type: str = "knowledge",
@@ -433,20 +671,7 @@ def create_roadmap(missing_items: List[str],
     """
     graph = GraphUtils()
     
-    # Define functions để lấy prerequisites và level
-    def get_prerequisites(item: str) -> List[str]:
-        if item_type == "knowledge":
-            info = data_loader.get_knowledge_info(item)
-        else:
-            info = data_loader.get_skill_info(item)
-        return info.get("prerequisites", [])
-    
-    def get_level(item: str) -> int:
-        if item_type == "knowledge":
-            info = data_loader.get_knowledge_info(item)
-        else:
-            info = data_loader.get_skill_info(item)
-        return info.get("level", 5)
+    get_prerequisites, get_level = _item_info_funcs(data_loader, item_type)
     
     # Tạo learning path (truyền learned_items)
     path_info = graph.get_learning_path(missing_items, get_prerequisites, get_level, learned_items)
@@ -458,5 +683,354 @@ def create_roadmap(missing_items: List[str],
         "roadmap": formatted_groups,
         "has_cycles": path_info["has_cycles"],
         "cycles": path_info["cycles"],
-        "total_items": path_info["total_items"]
+        "total_items": path_info["total_items"],
+        # Giữ lại đồ thị nén để lập lịch theo tuần (schedule_weekly_plan)
+        "scc_graph": {
+            "sccs": path_info["sccs"],
+            "edges": path_info["condensation_graph"],
+            "node_levels": path_info["node_levels"]
+        }
+    }
+
+
+def build_base_plan(target_items: List[str],
+                    get_prerequisites_func,
+                    get_level_func) -> Dict:
+    """
+    Tạo base plan (roadmap khi chưa học gì) ở dạng compact để lưu thành artifact
+    
+    Items được đánh index; stages, SCCs và prerequisites đều lưu theo index.
+    
+    Args:
+        target_items: Danh sách items cần học (essential knowledge của job)
+        get_prerequisites_func: Function để lấy prerequisites
+        get_level_func: Function để lấy level của một item
+        
+    Returns:
+        Dictionary base plan: items, levels, prereqs, targets, sccs, stages
+    """
+    graph = GraphUtils()
+    path_info = graph.get_learning_path(target_items, get_prerequisites_func, get_level_func)
+    
+    items = sorted(graph.nodes)
+    index = {item: i for i, item in enumerate(items)}
+    
+    # prereqs[i] = index các prerequisites trực tiếp của item i (trong graph)
+    prereqs = [[] for _ in items]
+    for node in items:
+        for successor in graph.graph.get(node, []):
+            prereqs[index[successor]].append(index[node])
+    
+    return {
+        "items": items,
+        "levels": [path_info["node_levels"][item] for item in items],
+        "prereqs": prereqs,
+        "targets": sorted(set(index[item] for item in target_items if item in index)),
+        "sccs": [sorted(index[node] for node in scc) for scc in path_info["sccs"]],
+        "stages": [
+            {"type": stage["type"], "items": [index[node] for node in stage["nodes"]]}
+            for stage in path_info["path"]
+        ]
     }
+
+
+def prune_base_plan(plan: Dict, learned_items: Set[str] = None) -> Dict:
+    """
+    Cắt các items đã học khỏi base plan thay vì build lại đồ thị
+    
+    Giữ các items có thể đi tới từ targets theo prerequisites mà không đi qua item đã học
+    (cùng ngữ nghĩa với build_graph). Thứ tự stage của base plan vẫn là thứ tự topo hợp lệ
+    của đồ thị con.
+    
+    Args:
+        plan: Base plan từ build_base_plan
+        learned_items: Set các items mà user đã học
+        
+    Returns:
+        Dictionary cùng format với create_roadmap
+    """
+    learned_items = learned_items or set()
+    items = plan["items"]
+    learned = [item in learned_items for item in items]
+    
+    # BFS từ targets theo prerequisites, dừng tại items đã học
+    keep = [False] * len(items)
+    queue = deque(t for t in plan["targets"] if not learned[t])
+    for t in queue:
+        keep[t] = True
+    while queue:
+        i = queue.popleft()
+        for p in plan["prereqs"][i]:
+            if not keep[p] and not learned[p]:
+                keep[p] = True
+                queue.append(p)
+    
+    return _plan_to_roadmap(plan, keep)
+
+
+def prune_base_plan_batch(plan: Dict, learned_sets: List[Set[str]]) -> List[Dict]:
+    """
+    Cắt base plan cho nhiều learners cùng lúc bằng reachability mask
+    
+    Mỗi item có một bitmask theo learners (bit s = learner s cần học item). Duyệt SCCs
+    theo thứ tự Tarjan (dependents trước prerequisites) nên mỗi cạnh chỉ xử lý một lần
+    cho cả batch thay vì một BFS cho từng learner.
+    
+    Args:
+        plan: Base plan từ build_base_plan
+        learned_sets: List các set items đã học, mỗi set ứng với một learner
+        
+    Returns:
+        List roadmaps (format của create_roadmap), cùng thứ tự với learned_sets
+    """
+    items = plan["items"]
+    index = {item: i for i, item in enumerate(items)}
+    all_learners = (1 << len(learned_sets)) - 1
+    
+    learned = [0] * len(items)
+    for s, learned_items in enumerate(learned_sets):
+        for item in learned_items:
+            i = index.get(item)
+            if i is not None:
+                learned[i] |= 1 << s
+    
+    dependents = [[] for _ in items]
+    for i, prereqs in enumerate(plan["prereqs"]):
+        for p in prereqs:
+            dependents[p].append(i)
+    
+    is_target = [False] * len(items)
+    for t in plan["targets"]:
+        is_target[t] = True
+    
+    need = [0] * len(items)
+    for scc in plan["sccs"]:
+        # Lặp tới điểm bất động trong SCC (cycle), tối đa len(scc) vòng
+        changed = True
+        while changed:
+            changed = False
+            for i in scc:
+                mask = all_learners if is_target[i] else 0
+                for d in dependents[i]:
+                    mask |= need[d]
+                mask &= ~learned[i]
+                if mask != need[i]:
+                    need[i] = mask
+                    changed = True
+    
+    return [_plan_to_roadmap(plan, [bool(need[i] >> s & 1) for i in range(len(items))])
+            for s in range(len(learned_sets))]
+
+
+def _plan_to_roadmap(plan: Dict, keep: List[bool]) -> Dict:
+    """Chuyển base plan + mask items cần giữ thành roadmap (format của create_roadmap)"""
+    items = plan["items"]
+    
+    roadmap = []
+    for stage in plan["stages"]:
+        stage_items = [items[i] for i in stage["items"] if keep[i]]
+        if not stage_items:
+            continue
+        stage_type = stage["type"] if len(stage_items) > 1 else "path"
+        roadmap.append({
+            "stage": len(roadmap) + 1,
+            "items": stage_items,
+            "count": len(stage_items),
+            "can_learn_parallel": stage_type == "scc",
+            "is_scc": stage_type == "scc",
+            "type": stage_type
+        })
+    
+    # Đồ thị nén trên các items còn lại (cho schedule_weekly_plan)
+    sccs = []
+    scc_of = {}
+    for scc in plan["sccs"]:
+        kept = [i for i in scc if keep[i]]
+        if kept:
+            for i in kept:
+                scc_of[i] = len(sccs)
+            sccs.append(kept)
+    
+    edges = defaultdict(set)
+    for i, scc_id in scc_of.items():
+        for p in plan["prereqs"][i]:
+            if p in scc_of and scc_of[p] != scc_id:
+                edges[scc_of[p]].add(scc_id)
+    
+    cycles = [[items[i] for i in scc] for scc in sccs if len(scc) > 1]
+    
+    return {
+        "roadmap": roadmap,
+        "has_cycles": len(cycles) > 0,
+        "cycles": cycles,
+        "total_items": len(scc_of),
+        "scc_graph": {
+            "sccs": [[items[i] for i in scc] for scc in sccs],
+            "edges": {k: sorted(v) for k, v in edges.items()},
+            "node_levels": {items[i]: plan["levels"][i] for i in scc_of}
+        }
+    }
+
+
+def compute_ancestor_closures(items: List[str], get_prerequisites_func) -> Tuple[List[str], Dict[str, int]]:
+    """
+    Tính ancestor closure (item + tất cả prerequisites đệ quy) cho mọi item một lần duy nhất
+    
+    Closure được biểu diễn bằng bitmask (int) trên danh sách nodes để hợp/giao nhanh.
+    Các items trong cùng SCC có chung closure.
+    
+    Args:
+        items: Danh sách items gốc (ví dụ toàn bộ knowledge)
+        get_prerequisites_func: Function để lấy prerequisites của một item
+        
+    Returns:
+        Tuple of (nodes, closures)
+        - nodes: list các nodes, vị trí i tương ứng bit i trong bitmask
+        - closures: dict mapping node -> bitmask closure
+    """
+    graph = GraphUtils()
+    graph.build_graph(items, get_prerequisites_func)
+    sccs = graph.find_sccs_tarjan()
+    condensation_graph, scc_map, scc_in_degree = graph.build_condensation_graph(sccs)
+    
+    nodes = sorted(graph.nodes)
+    bit = {node: 1 << i for i, node in enumerate(nodes)}
+    
+    # Duyệt condensation graph theo thứ tự topo (Kahn): prerequisites trước
+    scc_closure = [0] * len(sccs)
+    for scc_id, scc in enumerate(sccs):
+        for node in scc:
+            scc_closure[scc_id] |= bit[node]
+    
+    temp_in_degree = dict(scc_in_degree)
+    queue = deque(scc_id for scc_id in range(len(sccs)) if temp_in_degree[scc_id] == 0)
+    while queue:
+        scc_id = queue.popleft()
+        for neighbor_scc in condensation_graph.get(scc_id, []):
+            scc_closure[neighbor_scc] |= scc_closure[scc_id]
+            temp_in_degree[neighbor_scc] -= 1
+            if temp_in_degree[neighbor_scc] == 0:
+                queue.append(neighbor_scc)
+    
+    closures = {node: scc_closure[scc_map[node]] for node in nodes}
+    return nodes, closures
+
+
+def schedule_weekly_plan(sccs: List[List[str]],
+                         condensation_graph: Dict,
+                         node_levels: Dict[str, int],
+                         hours_per_week: float,
+                         hours_per_item: float = 20) -> List[Dict]:
+    """
+    Xếp các SCC vào lịch học theo tuần bằng list scheduling với priority heap
+
+    Mỗi SCC là một đơn vị công việc (các items trong cycle học xen kẽ trong cùng
+    các tuần). Một SCC chỉ được bắt đầu khi mọi SCC prerequisite đã học xong.
+    Trong các SCC sẵn sàng, ưu tiên (level thấp, nhiều items phụ thuộc bắc cầu phía sau).
+    Độ phức tạp O((V+E) log V + số tuần).
+
+    Args:
+        sccs: List of SCCs
+        condensation_graph: Graph của các SCCs (SCC_id -> list SCC_id kế tiếp)
+        node_levels: Dictionary chứa level của mỗi node
+        hours_per_week: Số giờ học mỗi tuần của learner
+        hours_per_item: Số giờ cho một item level 5 (điều chỉnh theo level)
+
+    Returns:
+        List of weeks, mỗi tuần chứa các items và số giờ dành cho từng item
+    """
+    if not math.isfinite(hours_per_week) or hours_per_week <= 0:
+        raise ValueError("hours_per_week must be a positive number")
+
+    in_degree = [0] * len(sccs)
+    for scc_id, neighbors in condensation_graph.items():
+        for neighbor_scc in neighbors:
+            in_degree[neighbor_scc] += 1
+
+    def item_hours(node: str) -> float:
+        # Cùng hệ số độ khó với get_learning_time_estimate (level / 5)
+        return hours_per_item * node_levels.get(node, 5) / 5.0
+
+    # Số items phụ thuộc bắc cầu phía sau mỗi SCC: quy hoạch động một lượt theo thứ tự topo ngược,
+    # O(V+E). Item đi tới được qua nhiều nhánh bị đếm một lần cho mỗi nhánh (ước lượng dư, đủ làm priority)
+    topo_order = []
+    temp_in_degree = list(in_degree)
+    queue = deque(scc_id for scc_id in range(len(sccs)) if temp_in_degree[scc_id] == 0)
+    while queue:
+        scc_id = queue.popleft()
+        topo_order.append(scc_id)
+        for neighbor_scc in condensation_graph.get(scc_id, []):
+            temp_in_degree[neighbor_scc] -= 1
+            if temp_in_degree[neighbor_scc] == 0:
+                queue.append(neighbor_scc)
+
+    descendant_counts = [0] * len(sccs)
+    for scc_id in reversed(topo_order):
+        for neighbor_scc in condensation_graph.get(scc_id, []):
+            descendant_counts[scc_id] += len(sccs[neighbor_scc]) + descendant_counts[neighbor_scc]
+
+    def priority(scc_id: int) -> Tuple:
+        scc_nodes = sccs[scc_id]
+        level = min(node_levels.get(node, 5) for node in scc_nodes)
+        return (level, -descendant_counts[scc_id], min(scc_nodes), scc_id)
+
+    ready = [priority(scc_id) for scc_id in range(len(sccs)) if in_degree[scc_id] == 0]
+    heapq.heapify(ready)
+
+    weeks = []
+    current_week = {"week": 1, "items": [], "hours_used": 0.0}
+
+    def free_hours() -> float:
+        """Số giờ còn trống của tuần hiện tại, tự chuyển sang tuần mới nếu đã đầy"""
+        nonlocal current_week
+        free = hours_per_week - current_week["hours_used"]
+        if free <= 1e-9:
+            weeks.append(current_week)
+            current_week = {"week": current_week["week"] + 1, "items": [], "hours_used": 0.0}
+            free = hours_per_week
+        return free
+
+    def add_hours(node: str, hours: float):
+        while hours > 1e-9:
+            free = free_hours()
+            used = min(free, hours)
+            items = current_week["items"]
+            if items and items[-1]["item"] == node:
+                items[-1]["hours"] += used
+            else:
+                items.append({"item": node, "hours": used})
+            current_week["hours_used"] += used
+            hours -= used
+
+    while ready:
+        scc_id = heapq.heappop(ready)[-1]
+        scc_nodes = sorted(sccs[scc_id], key=lambda x: (node_levels.get(x, 5), x))
+
+        if len(scc_nodes) > 1:
+            # SCC: học xen kẽ các items, chia đều từng phần nhỏ theo tuần
+            remaining = {node: item_hours(node) for node in scc_nodes}
+            while remaining:
+                share = free_hours() / len(remaining)
+                for node in list(remaining):
+                    used = min(share, remaining[node])
+                    add_hours(node, used)
+                    remaining[node] -= used
+                    if remaining[node] <= 1e-9:
+                        del remaining[node]
+        else:
+            add_hours(scc_nodes[0], item_hours(scc_nodes[0]))
+
+        for neighbor_scc in condensation_graph.get(scc_id, []):
+            in_degree[neighbor_scc] -= 1
+            if in_degree[neighbor_scc] == 0:
+                heapq.heappush(ready, priority(neighbor_scc))
+
+    if current_week["items"]:
+        weeks.append(current_week)
+
+    for week in weeks:
+        week["hours_used"] = round(float(week["hours_used"]), 1)
+        for entry in week["items"]:
+            entry["hours"] = round(float(entry["hours"]), 1)
+
+    return weeks
@@ -2,6 +2,7 @@
 Module để matching job dựa trên skills và knowledge của user
 """
 from typing import List, Dict, Set
+from graph_utils import compute_ancestor_closures
 
 
 class JobMatcher:
@@ -15,6 +16,15 @@ class JobMatcher:
             data_loader: Instance của DataLoader
         """
         self.data_loader = data_loader
+        
+        # Precomputed closures cho ranking theo learning cost (build lazy 1 lần)
+        self._closure_nodes = None
+        self._closure_index = None
+        self._closure_levels = None
+        self._closure_prereqs = None
+        self._job_closures = None
+        self._job_targets = None
+        self._closure_job_count = 0  # Số jobs lúc build (jobs có thể còn đang được stream)
     
     def calculate_match_score(self, job: Dict, user_skills: List[str], 
                             user_knowledge: List[str]) -> Dict:
@@ -133,6 +143,153 @@ class JobMatcher:
         
         return results[:top_n]
     
+    def _build_job_closures(self):
+        """
+        Precompute ancestor closure của essential knowledge cho từng job
+        (item cần học + tất cả prerequisites đệ quy), lưu dưới dạng bitmask,
+        cùng prerequisites trực tiếp của từng node để duyệt lại khi user đã học một phần
+        """
+        def get_prerequisites(item: str) -> List[str]:
+            info = self.data_loader.get_knowledge_info(item)
+            return [p.lower() for p in info.get("prerequisites", [])]
+        
+        all_knowledge = set(k.lower() for k in self.data_loader.knowledge_data)
+        for job in self.data_loader.jobs_data:
+            all_knowledge.update(k.lower() for k in job.get("essential_knowledge", []))
+        
+        nodes, closures = compute_ancestor_closures(sorted(all_knowledge), get_prerequisites)
+        
+        self._closure_nodes = nodes
+        self._closure_index = {node: i for i, node in enumerate(nodes)}
+        self._closure_levels = [self.data_loader.get_knowledge_info(node).get("level", 5)
+                                for node in nodes]
+        self._closure_prereqs = []
+        for node in nodes:
+            mask = 0
+            for p in get_prerequisites(node):
+                i = self._closure_index.get(p)
+                if i is not None:
+                    mask |= 1 << i
+            self._closure_prereqs.append(mask)
+        
+        self._job_closures = {}
+        self._job_targets = {}
+        jobs = list(self.data_loader.jobs_data)
+        self._closure_job_count = len(jobs)
+        for job in jobs:
+            mask = 0
+            targets = 0
+            for k in job.get("essential_knowledge", []):
+                mask |= closures.get(k.lower(), 0)
+                i = self._closure_index.get(k.lower())
+                if i is not None:
+                    targets |= 1 << i
+            self._job_closures[job["name"]] = mask
+            self._job_targets[job["name"]] = targets
+    
+    def calculate_learning_cost(self, job: Dict, user_knowledge: List[str]) -> Dict:
+        """
+        Tính learning cost để đạt essential knowledge của job
+        
+        Items cần học là các node đi tới được từ essential knowledge còn thiếu theo prerequisites,
+        dừng tại items user đã học (cùng ngữ nghĩa với roadmap). Nếu user chưa học item nào trong
+        closure đã precompute thì dùng thẳng closure đó.
+        
+        Args:
+            job: Thông tin công việc
+            user_knowledge: Danh sách knowledge của user
+            
+        Returns:
+            Dictionary {"items": số items cần học, "level_sum": tổng level các items}
+        """
+        if self._job_closures is None or self._closure_job_count != len(self.data_loader.jobs_data):
+            self._build_job_closures()
+        
+        learned_mask = 0
+        for k in user_knowledge:
+            i = self._closure_index.get(k.lower())
+            if i is not None:
+                learned_mask |= 1 << i
+        
+        closure = self._job_closures.get(job["name"], 0)
+        if closure & learned_mask:
+            remaining = self._reachable_unlearned(self._job_targets[job["name"]], learned_mask)
+        else:
+            remaining = closure
+        
+        items = 0
+        level_sum = 0
+        while remaining:
+            low_bit = remaining & -remaining
+            level_sum += self._closure_levels[low_bit.bit_length() - 1]
+            items += 1
+            remaining ^= low_bit
+        
+        return {"items": items, "level_sum": level_sum}
+    
+    def _reachable_unlearned(self, targets: int, learned_mask: int) -> int:
+        """
+        BFS (trên bitmask) từ các targets chưa học theo prerequisites, không đi qua node đã học
+        
+        Args:
+            targets: Bitmask essential knowledge của job
+            learned_mask: Bitmask các node user đã học
+            
+        Returns:
+            Bitmask các node cần học
+        """
+        reached = targets & ~learned_mask
+        frontier = reached
+        while frontier:
+            low_bit = frontier & -frontier
+            frontier ^= low_bit
+            new = self._closure_prereqs[low_bit.bit_length() - 1] & ~learned_mask & ~reached
+            reached |= new
+            frontier |= new
+        return reached
+    
+    def rank_jobs_by_learning_cost(self, user_skills: List[str],
+                                   user_knowledge: List[str],
+                                   min_score: float = 5.0,
+                                   top_n: int = 15,
+                                   cost_weight: float = 0.5) -> List[Dict]:
+        """
+        Xếp hạng jobs kết hợp điểm match và learning cost (số items + tổng level
+        các items cần học như trong roadmap), tính cho toàn bộ catalog trong một lượt
+        
+        Args:
+            user_skills: Danh sách skills của user
+            user_knowledge: Danh sách knowledge của user
+            min_score: Điểm match tối thiểu để được xem là ứng viên
+            top_n: Số lượng jobs tối đa trả về
+            cost_weight: Trọng số của learning cost trong combined score (0..1)
+            
+        Returns:
+            Danh sách jobs (match info + "learning_cost" + "combined_score"),
+            sắp xếp theo combined score giảm dần
+        """
+        candidates = []
+        
+        for job in self.data_loader.jobs_data:
+            match_info = self.calculate_match_score(job, user_skills, user_knowledge)
+            if match_info["total_score"] >= min_score:
+                match_info["learning_cost"] = self.calculate_learning_cost(job, user_knowledge)
+                candidates.append(match_info)
+        
+        if not candidates:
+            return []
+        
+        # Chuẩn hóa cost về thang 0-100 (cost thấp nhất -> 100 điểm)
+        max_level_sum = max(c["learning_cost"]["level_sum"] for c in candidates) or 1
+        for c in candidates:
+            cost_score = 100 * (1 - c["learning_cost"]["level_sum"] / max_level_sum)
+            combined = c["total_score"] * (1 - cost_weight) + cost_score * cost_weight
+            c["combined_score"] = round(combined, 2)
+        
+        candidates.sort(key=lambda x: (x["combined_score"], x["total_score"]), reverse=True)
+        
+        return candidates[:top_n]
+    
     def get_missing_requirements(self, job_name: str, 
                                 user_skills: List[str],
                                 user_knowledge: List[str]) -> Dict:
@@ -0,0 +1,133 @@
+"""
+Module lưu jobs dạng cột: tên và các danh sách requirements nằm trong bộ nhớ,
+các trường văn bản dài (description, url) chỉ được đọc từ file NDJSON (mmap) khi cần
+"""
+import json
+import mmap
+import sys
+import threading
+from collections.abc import Mapping
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class JobStore:
+    """Lưu các trường của jobs theo cột, trả về JobView cho từng job"""
+
+    # Các trường còn lại (description, url, ...) là lazy
+    RESIDENT_FIELDS = ("name", "other_name", "essential_skill", "optional_skill",
+                       "essential_knowledge", "optional_knowledge")
+
+    def __init__(self, path: Optional[str] = None, lazy_loader: Optional[Callable[[int], Dict]] = None):
+        """
+        Khởi tạo JobStore
+
+        Args:
+            path: File NDJSON chứa các record đầy đủ (để đọc trường lazy theo offset)
+            lazy_loader: Hàm đọc record theo location thay cho file NDJSON (ví dụ theo row id SQLite)
+        """
+        self.path = path
+        self.lazy_loader = lazy_loader or (self._read_ndjson_record if path else None)
+        self.columns: Dict[str, List] = {field: [] for field in self.RESIDENT_FIELDS}
+        self._keys: List[Tuple[str, ...]] = []  # Các key của từng record (giữ đúng shape của dict gốc)
+        self._key_tuples: Dict[Tuple[str, ...], Tuple[str, ...]] = {}  # Dùng chung tuple giống nhau
+        self._offsets: List[Optional[int]] = []  # Location của record (byte offset trong file NDJSON)
+        self._resident_text: Dict[int, Dict] = {}  # Trường lazy của record không có offset
+        self._mmap = None
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict, offset: Optional[int] = None,
+               keys: Optional[Tuple[str, ...]] = None) -> "JobView":
+        """
+        Thêm một job
+
+        Args:
+            record: Dictionary job (schema của data.json)
+            offset: Location của record cho lazy_loader (None: giữ trường lazy trong bộ nhớ)
+            keys: Các key của job nếu record chỉ chứa các trường resident
+
+        Returns:
+            JobView của job vừa thêm
+        """
+        idx = len(self._keys)
+        for field in self.RESIDENT_FIELDS:
+            value = record.get(field)
+            # Requirements lặp lại giữa nhiều jobs: intern để các job dùng chung một string
+            if isinstance(value, list):
+                value = [sys.intern(item) if isinstance(item, str) else item for item in value]
+            self.columns[field].append(value)
+        keys = tuple(keys or record.keys())
+        self._keys.append(self._key_tuples.setdefault(keys, keys))
+        self._offsets.append(offset)
+        if offset is None or self.lazy_loader is None:
+            lazy = {key: value for key, value in record.items() if key not in self.columns}
+            if lazy:
+                self._resident_text[idx] = lazy
+        return JobView(self, idx)
+
+    def _open_mmap(self) -> mmap.mmap:
+        with self._lock:
+            if self._mmap is None:
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return self._mmap
+
+    def _read_ndjson_record(self, offset: int) -> Dict:
+        data = self._open_mmap()
+        end = data.find(b"\n", offset)
+        return json.loads(data[offset:end if end != -1 else len(data)])
+
+    def read_lazy_fields(self, idx: int) -> Dict:
+        """
+        Đọc các trường lazy của một job (từ file NDJSON hoặc lazy_loader)
+
+        Args:
+            idx: Vị trí của job trong store
+
+        Returns:
+            Dictionary các trường lazy có trong record
+        """
+        offset = self._offsets[idx]
+        if offset is None or self.lazy_loader is None:
+            return self._resident_text.get(idx, {})
+        record = self.lazy_loader(offset)
+        return {key: value for key, value in record.items() if key not in self.columns}
+
+    def keys_of(self, idx: int) -> Tuple[str, ...]:
+        """Các key của record gốc"""
+        return self._keys[idx]
+
+    def close(self):
+        """Đóng mmap (nếu đã mở)"""
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class JobView(Mapping):
+    """View chỉ đọc của một job trong JobStore, dùng như dict job của data.json"""
+
+    __slots__ = ("_store", "_idx")
+
+    def __init__(self, store: JobStore, idx: int):
+        self._store = store
+        self._idx = idx
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._store.keys_of(self._idx):
+            raise KeyError(key)
+        if key in self._store.columns:
+            return self._store.columns[key][self._idx]
+        return self._store.read_lazy_fields(self._idx)[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.keys_of(self._idx))
+
+    def __len__(self) -> int:
+        return len(self._store.keys_of(self._idx))
+
+    def __repr__(self) -> str:
+        return f"JobView({self._store.columns['name'][self._idx]!r})"
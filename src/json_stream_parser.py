@@ -0,0 +1,96 @@
+"""
+Module parse JSON tăng dần (incremental) cho response streaming của LLM
+"""
+import json
+from typing import List, Dict
+
+
+class ProjectSuggestionStreamParser:
+    """
+    Parser nhận từng chunk text và trả về mỗi phần tử của mảng "project_suggestions"
+    ngay khi object đó đã đóng đủ ngoặc, không cần chờ hết response
+    """
+
+    def __init__(self, array_key: str = "project_suggestions"):
+        """
+        Khởi tạo parser
+
+        Args:
+            array_key: Tên key của mảng cần emit từng phần tử
+        """
+        self.array_key = array_key
+        self.buffer = ""
+        self.position = 0  # Vị trí đã scan trong buffer
+        self.in_array = False
+        self.finished = False
+
+        # Trạng thái scan bên trong mảng
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        self.object_start = None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        """
+        Thêm chunk mới và lấy các objects vừa hoàn chỉnh
+
+        Args:
+            chunk: Đoạn text mới nhận từ stream
+
+        Returns:
+            List các objects (project) mới parse được
+        """
+        self.buffer += chunk
+        completed = []
+
+        if self.finished:
+            return completed
+
+        if not self.in_array:
+            key_pos = self.buffer.find(f'"{self.array_key}"')
+            if key_pos < 0:
+                return completed
+            bracket_pos = self.buffer.find("[", key_pos)
+            if bracket_pos < 0:
+                return completed
+            self.in_array = True
+            self.position = bracket_pos + 1
+
+        buffer = self.buffer
+        i = self.position
+        while i < len(buffer):
+            char = buffer[i]
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                if self.depth == 0 and char == "{":
+                    self.object_start = i
+                self.depth += 1
+            elif char in "}]":
+                if self.depth == 0 and char == "]":
+                    # Hết mảng project_suggestions
+                    self.finished = True
+                    i += 1
+                    break
+                self.depth -= 1
+                if self.depth == 0 and char == "}" and self.object_start is not None:
+                    try:
+                        completed.append(json.loads(buffer[self.object_start:i + 1]))
+                    except json.JSONDecodeError:
+                        pass  # Bỏ qua object lỗi, phần còn lại vẫn được parse
+                    self.object_start = None
+            i += 1
+
+        self.position = i
+        return completed
+
+    def get_text(self) -> str:
+        """Lấy toàn bộ text đã nhận"""
+        return self.buffer
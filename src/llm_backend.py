@@ -0,0 +1,405 @@
+"""
+Module backend LLM dùng chung cho AIProjectSuggester và make-assets:
+Gemini, stub cục bộ (deterministic) và HTTP client tới stub server (load test offline)
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import dataclass, asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterator, Optional, Protocol, runtime_checkable
+
+
+@dataclass
+class GenerationConfig:
+    """Tham số sinh văn bản dùng chung cho mọi backend"""
+    system_instruction: str = ""
+    temperature: float = 0.7
+    thinking_budget: Optional[int] = None
+    max_output_tokens: Optional[int] = None
+
+
+@runtime_checkable
+class LLMBackend(Protocol):
+    """Interface backend LLM: generate (blocking), stream (từng chunk), agenerate (asyncio)"""
+
+    name: str
+
+    def generate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        ...
+
+    def stream(self, model: str, prompt: str, config: GenerationConfig) -> Iterator[str]:
+        ...
+
+    async def agenerate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        ...
+
+
+class GeminiBackend:
+    """Backend Google Gemini (google.genai chỉ được import khi dùng backend này)"""
+
+    name = "gemini"
+
+    def __init__(self, api_key: str):
+        """
+        Khởi tạo Gemini client
+
+        Args:
+            api_key: Google API key
+        """
+        from google import genai
+        self._genai = genai
+        self.client = genai.Client(api_key=api_key)
+
+    def _make_config(self, config: GenerationConfig):
+        """Chuyển GenerationConfig sang GenerateContentConfig của google.genai"""
+        types = self._genai.types
+        kwargs = {
+            "system_instruction": config.system_instruction,
+            "temperature": config.temperature
+        }
+        if config.thinking_budget is not None:
+            kwargs["thinking_config"] = types.ThinkingConfig(thinking_budget=config.thinking_budget)
+        if config.max_output_tokens is not None:
+            kwargs["max_output_tokens"] = config.max_output_tokens
+        return types.GenerateContentConfig(**kwargs)
+
+    def generate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        response = self.client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=self._make_config(config),
+        )
+        return response.text or ""  # null coalescing
+
+    def stream(self, model: str, prompt: str, config: GenerationConfig) -> Iterator[str]:
+        stream = self.client.models.generate_content_stream(
+            model=model,
+            contents=prompt,
+            config=self._make_config(config),
+        )
+        for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+    async def agenerate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        response = await self.client.aio.models.generate_content(
+            model=model,
+            contents=prompt,
+            config=self._make_config(config),
+        )
+        return response.text or ""
+
+
+def default_stub_responder(model: str, prompt: str, config: GenerationConfig) -> str:
+    """
+    Responder mặc định của stub: trả về 5 project suggestions hợp lệ, xác định hoàn toàn
+    theo prompt (cùng prompt -> cùng response)
+
+    Args:
+        model: Tên model
+        prompt: Prompt string
+        config: GenerationConfig
+
+    Returns:
+        JSON string theo format project_suggestions
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+
+    # Lấy các knowledge trong phần essential knowledge của prompt làm knowledge_gain
+    match = re.search(r'essential_knowledge":\s*\[(.*?)\]', prompt, re.S)
+    knowledge = re.findall(r'"([^"]+)"', match.group(1)) if match else []
+
+    projects = []
+    for idx in range(5):
+        gain = knowledge[idx::5] or knowledge[:1]
+        projects.append({
+            "title": f"Stub project {idx + 1} ({digest})",
+            "description": f"Deterministic stub project generated by model {model}",
+            "knowledge_gain": gain,
+            "reasoning": "Generated by the local stub backend"
+        })
+    return json.dumps({"project_suggestions": projects}, ensure_ascii=False, indent=2)
+
+
+# Marker của prompt enrich knowledge (make-assets) để stub tách batch ra khỏi prompt
+ENRICH_ITEMS_MARKER = "ITEMS TO ENRICH:"
+ENRICH_ALLOWED_MARKER = "ALLOWED PREREQUISITES:"
+
+
+def knowledge_stub_responder(model: str, prompt: str, config: GenerationConfig) -> str:
+    """
+    Responder của stub cho bước enrich knowledge (make-assets): mỗi knowledge trong batch
+    một entry mặc định
+
+    Args:
+        model: Tên model
+        prompt: Prompt enrich (chứa ENRICH_ITEMS_MARKER và ENRICH_ALLOWED_MARKER)
+        config: GenerationConfig
+
+    Returns:
+        JSON array string theo format knowledge.txt
+    """
+    batch = json.loads(prompt.split(ENRICH_ITEMS_MARKER, 1)[1].split(ENRICH_ALLOWED_MARKER, 1)[0])
+    return json.dumps([
+        {"skill": name, "level": 5, "detailed": [], "prerequisites": []}
+        for name in batch
+    ], indent=4)
+
+
+STUB_RESPONDERS = {
+    "suggestions": default_stub_responder,
+    "knowledge": knowledge_stub_responder
+}
+
+
+class StubBackend:
+    """Backend giả lập cục bộ: không cần API key, response xác định, latency tùy chọn"""
+
+    name = "stub"
+
+    def __init__(self, responder: Optional[Callable[[str, str, GenerationConfig], str]] = None,
+                 latency: float = 0.0,
+                 chunk_size: int = 64):
+        """
+        Khởi tạo StubBackend
+
+        Args:
+            responder: Function (model, prompt, config) -> response text (mặc định: default_stub_responder)
+            latency: Thời gian giả lập mỗi request (giây)
+            chunk_size: Số ký tự mỗi chunk khi stream
+        """
+        self.responder = responder or default_stub_responder
+        self.latency = latency
+        self.chunk_size = max(1, chunk_size)
+
+    def generate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self.responder(model, prompt, config)
+
+    def stream(self, model: str, prompt: str, config: GenerationConfig) -> Iterator[str]:
+        text = self.responder(model, prompt, config)
+        # Chia đều latency cho các chunk để mô phỏng streaming
+        chunk_count = max(1, (len(text) + self.chunk_size - 1) // self.chunk_size)
+        for start in range(0, len(text), self.chunk_size):
+            if self.latency:
+                time.sleep(self.latency / chunk_count)
+            yield text[start:start + self.chunk_size]
+
+    async def agenerate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.responder(model, prompt, config)
+
+
+class HTTPBackend:
+    """Backend gọi tới StubLLMServer (hoặc server tương thích) qua HTTP"""
+
+    name = "http"
+
+    def __init__(self, base_url: str = "http://127.0.0.1:8765", timeout: float = 60.0):
+        """
+        Khởi tạo HTTPBackend
+
+        Args:
+            base_url: URL gốc của server
+            timeout: Timeout mỗi request (giây)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _open(self, path: str, model: str, prompt: str, config: GenerationConfig):
+        payload = json.dumps({"model": model, "prompt": prompt, "config": asdict(config)}).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=payload,
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"LLM server error {e.code}: {e.read().decode('utf-8', 'replace')}") from e
+
+    def generate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        with self._open("/generate", model, prompt, config) as response:
+            return json.loads(response.read().decode("utf-8"))["text"]
+
+    def stream(self, model: str, prompt: str, config: GenerationConfig) -> Iterator[str]:
+        # Server trả về NDJSON, mỗi dòng {"text": chunk}
+        with self._open("/stream", model, prompt, config) as response:
+            for line in response:
+                line = line.strip()
+                if line:
+                    yield json.loads(line.decode("utf-8"))["text"]
+
+    async def agenerate(self, model: str, prompt: str, config: GenerationConfig) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.generate, model, prompt, config)
+
+
+class StubLLMServer:
+    """
+    HTTP server giả lập LLM (chỉ dùng stdlib) với latency và failure injection
+
+    Endpoints: POST /generate -> {"text": ...}, POST /stream -> NDJSON {"text": chunk}
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765,
+                 backend: Optional[StubBackend] = None,
+                 latency: float = 0.0,
+                 failure_rate: float = 0.0,
+                 seed: Optional[int] = None):
+        """
+        Khởi tạo StubLLMServer
+
+        Args:
+            host: Địa chỉ bind
+            port: Cổng (0: chọn cổng trống)
+            backend: StubBackend sinh response (mặc định StubBackend())
+            latency: Latency thêm cho mỗi request (giây)
+            failure_rate: Xác suất trả về lỗi 503 (0..1)
+            seed: Seed cho failure injection (để tái lập kết quả)
+        """
+        self.backend = backend or StubBackend()
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self.request_count = 0
+        self.failure_count = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Không log từng request
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length).decode("utf-8"))
+                    config = GenerationConfig(**body.get("config", {}))
+                    model, prompt = body["model"], body["prompt"]
+                except (ValueError, KeyError, TypeError) as e:
+                    self._send_json(400, {"error": f"Bad request: {e}"})
+                    return
+
+                if self.path not in ("/generate", "/stream"):
+                    self._send_json(404, {"error": "Not found"})
+                    return
+
+                if server._should_fail():
+                    self._send_json(503, {"error": "Injected failure"})
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+
+                if self.path == "/generate":
+                    self._send_json(200, {"text": server.backend.generate(model, prompt, config)})
+                else:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    for chunk in server.backend.stream(model, prompt, config):
+                        self.wfile.write((json.dumps({"text": chunk}) + "\n").encode("utf-8"))
+                        self.wfile.flush()
+
+            def _send_json(self, status: int, data: Dict):
+                payload = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """URL gốc của server (dùng cho HTTPBackend)"""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _should_fail(self) -> bool:
+        with self._random_lock:
+            self.request_count += 1
+            failed = self._random.random() < self.failure_rate
+            if failed:
+                self.failure_count += 1
+            return failed
+
+    def start(self) -> "StubLLMServer":
+        """Chạy server ở background thread"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Dừng server"""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def serve_forever(self):
+        """Chạy server ở thread hiện tại (Ctrl+C để dừng)"""
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+
+def create_backend(kind: str, api_key: Optional[str] = None,
+                   url: Optional[str] = None, latency: float = 0.0) -> LLMBackend:
+    """
+    Tạo backend theo tên
+
+    Args:
+        kind: "gemini", "stub" hoặc "http"
+        api_key: API key (bắt buộc với gemini)
+        url: URL server (với http)
+        latency: Latency giả lập (với stub)
+
+    Returns:
+        Instance LLMBackend
+    """
+    if kind == "gemini":
+        if not api_key:
+            raise ValueError("Gemini backend requires an API key")
+        return GeminiBackend(api_key)
+    if kind == "stub":
+        return StubBackend(latency=latency)
+    if kind == "http":
+        return HTTPBackend(url or "http://127.0.0.1:8765")
+    raise ValueError(f"Unknown LLM backend: {kind}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub LLM server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to each request")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="probability of a 503 response")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--responder", choices=sorted(STUB_RESPONDERS), default="suggestions",
+                        help="response shape: project suggestions (app) or knowledge enrichment (make-assets)")
+    args = parser.parse_args()
+
+    stub_server = StubLLMServer(args.host, args.port,
+                                backend=StubBackend(responder=STUB_RESPONDERS[args.responder]),
+                                latency=args.latency, failure_rate=args.failure_rate, seed=args.seed)
+    print(f"Stub LLM server listening on {stub_server.url}")
+    stub_server.serve_forever()
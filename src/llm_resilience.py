@@ -0,0 +1,393 @@
+"""
+Module lớp gọi LLM chịu lỗi: retry với jittered exponential backoff, deadline mỗi request,
+circuit breaker theo model, chuỗi model fallback và histogram latency/lỗi theo model
+"""
+import bisect
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from llm_backend import LLMBackend, GenerationConfig
+
+_STREAM_END = object()  # Sentinel khi stream upstream kết thúc
+
+
+class LLMUnavailableError(Exception):
+    """Mọi model trong chuỗi fallback đều lỗi, hết retry hoặc hết deadline"""
+
+
+class CircuitOpenError(Exception):
+    """Circuit breaker đang mở, request bị từ chối ngay"""
+
+
+class CircuitBreaker:
+    """Circuit breaker 3 trạng thái: closed -> open (sau N lỗi liên tiếp) -> half_open (thử lại 1 request)"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Khởi tạo CircuitBreaker
+
+        Args:
+            failure_threshold: Số lỗi liên tiếp để mở circuit
+            reset_timeout: Thời gian mở circuit trước khi cho thử lại (giây)
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Kiểm tra request có được gửi đi không
+
+        Returns:
+            False nếu circuit đang mở (hoặc half_open đã có request thử)
+        """
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = "half_open"
+                self._trial_in_progress = False
+            if self.state == "half_open":
+                if self._trial_in_progress:
+                    return False
+                self._trial_in_progress = True
+            return True
+
+    def record_success(self):
+        """Ghi nhận request thành công: đóng circuit"""
+        with self._lock:
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        """Ghi nhận request lỗi: mở circuit nếu vượt ngưỡng hoặc request thử bị lỗi"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_progress = False
+            if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    """Histogram latency (bucket cố định, đơn vị giây) kèm số request lỗi"""
+
+    BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0]
+
+    def __init__(self):
+        """Khởi tạo histogram rỗng"""
+        self.counts = [0] * (len(self.BUCKETS) + 1)  # Bucket cuối: > BUCKETS[-1]
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, error: bool = False):
+        """
+        Ghi nhận một request
+
+        Args:
+            seconds: Latency của request
+            error: Request có lỗi không
+        """
+        with self._lock:
+            self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if error:
+                self.errors += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """
+        Ước lượng percentile từ bucket (trả về cận trên của bucket chứa percentile)
+
+        Args:
+            p: Percentile (0..100)
+
+        Returns:
+            Latency (giây), None nếu chưa có dữ liệu hoặc rơi vào bucket cuối (inf)
+        """
+        with self._lock:
+            if self.count == 0:
+                return None
+            rank = p / 100 * self.count
+            cumulative = 0
+            for idx, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= rank and bucket_count:
+                    return self.BUCKETS[idx] if idx < len(self.BUCKETS) else float("inf")
+            return float("inf")
+
+    def snapshot(self) -> Dict:
+        """
+        Lấy số liệu hiện tại
+
+        Returns:
+            Dictionary {"count", "errors", "mean", "p50", "p95", "p99", "buckets"}
+        """
+        p50, p95, p99 = self.percentile(50), self.percentile(95), self.percentile(99)
+        with self._lock:
+            buckets = {f"<={b}s": c for b, c in zip(self.BUCKETS, self.counts)}
+            buckets[f">{self.BUCKETS[-1]}s"] = self.counts[-1]
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "mean": round(self.total / self.count, 3) if self.count else None,
+                "p50": p50,
+                "p95": p95,
+                "p99": p99,
+                "buckets": buckets
+            }
+
+
+class _StreamReader:
+    """
+    Đọc một stream của backend trong thread riêng (daemon) và đưa từng chunk qua queue,
+    để caller chờ chunk với timeout mà stream bị treo không chiếm thread pool dùng chung
+    """
+
+    def __init__(self, open_stream: Callable[[], Iterator[str]]):
+        self._queue = queue.Queue()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(open_stream,), daemon=True)
+        self._thread.start()
+
+    def _run(self, open_stream: Callable[[], Iterator[str]]):
+        iterator = None
+        try:
+            iterator = iter(open_stream())
+            for chunk in iterator:
+                if self._closed.is_set():
+                    break
+                self._queue.put((chunk, None))
+            self._queue.put((_STREAM_END, None))
+        except Exception as e:
+            self._queue.put((None, e))
+        finally:
+            # Caller đã bỏ stream (hết deadline, lỗi hoặc dừng sớm): đóng upstream ngay khi thread rảnh
+            close = getattr(iterator, "close", None)
+            if self._closed.is_set() and close is not None:
+                try:
+                    close()
+                except Exception:
+                    pass
+
+    def next(self, timeout: float):
+        """
+        Chunk kế tiếp (_STREAM_END khi hết stream)
+
+        Raises:
+            TimeoutError: Không có chunk nào trong timeout giây
+            Exception: Lỗi của backend
+        """
+        try:
+            chunk, error = self._queue.get(timeout=max(0.0, timeout))
+        except queue.Empty:
+            raise TimeoutError("deadline exceeded while streaming") from None
+        if error is not None:
+            raise error
+        return chunk
+
+    def close(self):
+        """Báo thread dừng đọc; upstream được đóng khi lần đọc đang chạy (nếu có) trả về"""
+        self._closed.set()
+
+
+class ResilientLLMClient:
+    """Gọi LLMBackend qua chuỗi model fallback với retry, deadline và circuit breaker"""
+
+    def __init__(self, backend: LLMBackend,
+                 models: List[Tuple[str, GenerationConfig]],
+                 max_attempts: int = 3,
+                 base_delay: float = 0.5,
+                 max_delay: float = 8.0,
+                 deadline: float = 60.0,
+                 failure_threshold: int = 5,
+                 reset_timeout: float = 30.0,
+                 max_workers: int = 8):
+        """
+        Khởi tạo ResilientLLMClient
+
+        Args:
+            backend: LLMBackend thực hiện request
+            models: Chuỗi (model, config) theo thứ tự ưu tiên
+            max_attempts: Số lần thử tối đa cho mỗi model
+            base_delay: Backoff ban đầu (giây), tăng gấp đôi mỗi lần retry
+            max_delay: Backoff tối đa (giây)
+            deadline: Thời gian tối đa cho cả request, gồm mọi retry và fallback (giây)
+            failure_threshold: Số lỗi liên tiếp để mở circuit của một model
+            reset_timeout: Thời gian circuit mở trước khi thử lại (giây)
+            max_workers: Số thread tối đa chạy request (để bỏ chờ khi quá deadline)
+        """
+        if not models:
+            raise ValueError("At least one model is required")
+        self.backend = backend
+        self.models = models
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.breakers = {model: CircuitBreaker(failure_threshold, reset_timeout) for model, _ in models}
+        self.histograms = {model: LatencyHistogram() for model, _ in models}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._random = random.Random()
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: thời gian chờ ngẫu nhiên trong [0, min(max_delay, base_delay * 2^attempt)]"""
+        return self._random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _attempts(self, deadline: float) -> Iterator[Tuple[str, GenerationConfig, float]]:
+        """
+        Sinh các lần thử (model, config, thời gian còn lại) theo chuỗi fallback,
+        bỏ qua model có circuit đang mở và ngủ backoff giữa các lần retry
+
+        Args:
+            deadline: Thời điểm hết hạn (time.monotonic)
+        """
+        for model, config in self.models:
+            for attempt in range(self.max_attempts):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                if not self.breakers[model].allow():
+                    break  # Fail fast: chuyển sang model fallback
+                yield model, config, remaining
+
+                # Chỉ tới đây khi lần thử lỗi: chờ backoff (không vượt deadline)
+                if attempt + 1 < self.max_attempts:
+                    delay = min(self._backoff(attempt), deadline - time.monotonic())
+                    if delay > 0:
+                        time.sleep(delay)
+
+    def generate(self, prompt: str, deadline: Optional[float] = None,
+                 attempt_info: Optional[Dict] = None) -> str:
+        """
+        Gọi LLM với retry và fallback
+
+        Args:
+            prompt: Prompt string
+            deadline: Ghi đè deadline mặc định (giây)
+            attempt_info: Dictionary nhận "model" của model đã trả về response (để biết có fallback không)
+
+        Returns:
+            Response text
+
+        Raises:
+            LLMUnavailableError: Không model nào trả về kết quả trước deadline
+        """
+        deadline_at = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        errors = []
+        for model, config, remaining in self._attempts(deadline_at):
+            start = time.perf_counter()
+            future = self._executor.submit(self.backend.generate, model, prompt, config)
+            try:
+                text = future.result(timeout=remaining)
+                if not text:
+                    raise ValueError("Empty response")
+            except FutureTimeoutError:
+                self._record(model, start, error=True)
+                errors.append(f"{model}: deadline exceeded")
+                break
+            except Exception as e:
+                self._record(model, start, error=True)
+                errors.append(f"{model}: {e}")
+                continue
+            self._record(model, start, error=False)
+            if attempt_info is not None:
+                attempt_info["model"] = model
+            return text
+
+        raise LLMUnavailableError("; ".join(errors) or "All models unavailable (circuit open)")
+
+    def stream(self, prompt: str, deadline: Optional[float] = None,
+               attempt_info: Optional[Dict] = None) -> Iterator[str]:
+        """
+        Gọi LLM ở chế độ streaming với retry và fallback
+
+        Chỉ retry khi lỗi xảy ra trước chunk đầu tiên. Mỗi stream được đọc bởi một thread riêng
+        và từng chunk được chờ với timeout là thời gian còn lại, nên stream bị treo giữa chừng
+        cũng dừng đúng deadline mà không giữ thread của pool dùng chung.
+
+        Args:
+            prompt: Prompt string
+            deadline: Ghi đè deadline mặc định (giây)
+            attempt_info: Dictionary nhận "model" của model đang stream (set ở chunk đầu tiên)
+
+        Returns:
+            Iterator các chunk text
+
+        Raises:
+            LLMUnavailableError: Không model nào stream được trước deadline
+        """
+        deadline_at = time.monotonic() + (deadline if deadline is not None else self.deadline)
+        errors = []
+        for model, config, _ in self._attempts(deadline_at):
+            start = time.perf_counter()
+            received = False
+            reader = _StreamReader(lambda model=model, config=config: self.backend.stream(model, prompt, config))
+            try:
+                while True:
+                    chunk = reader.next(timeout=deadline_at - time.monotonic())
+                    if chunk is _STREAM_END:
+                        break
+                    if not received and attempt_info is not None:
+                        attempt_info["model"] = model
+                    received = True
+                    yield chunk
+            except TimeoutError as e:
+                self._record(model, start, error=True)
+                if received:
+                    raise LLMUnavailableError(f"{model}: {e}") from e
+                errors.append(f"{model}: deadline exceeded")
+                break
+            except Exception as e:
+                self._record(model, start, error=True)
+                if received:
+                    raise LLMUnavailableError(f"{model}: {e}") from e
+                errors.append(f"{model}: {e}")
+                continue
+            finally:
+                # Đóng stream upstream (giải phóng connection) khi timeout, lỗi hoặc caller dừng sớm
+                reader.close()
+            if received:
+                self._record(model, start, error=False)
+                return
+            self._record(model, start, error=True)
+            errors.append(f"{model}: Empty response")
+
+        raise LLMUnavailableError("; ".join(errors) or "All models unavailable (circuit open)")
+
+    def close(self):
+        """Dừng thread pool của generate (request đang chạy không bị chờ)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, model: str, start: float, error: bool):
+        """Cập nhật histogram và circuit breaker của model"""
+        self.histograms[model].observe(time.perf_counter() - start, error=error)
+        if error:
+            self.breakers[model].record_failure()
+        else:
+            self.breakers[model].record_success()
+
+    def get_metrics(self) -> Dict[str, Dict]:
+        """
+        Lấy histogram latency/lỗi và trạng thái circuit của từng model
+
+        Returns:
+            Dictionary model -> snapshot histogram kèm "circuit_state"
+        """
+        metrics = {}
+        for model, _ in self.models:
+            snapshot = self.histograms[model].snapshot()
+            snapshot["circuit_state"] = self.breakers[model].state
+            metrics[model] = snapshot
+        return metrics
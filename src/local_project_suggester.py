@@ -0,0 +1,171 @@
+"""
+Module đề xuất project offline từ prerequisite graph và các "detailed" items trong knowledge.txt
+(không cần API key, trả kết quả trong vài mili giây)
+"""
+from typing import List, Dict, Set
+
+
+class LocalProjectSuggester:
+    """Class gom knowledge còn thiếu thành các project theo độ gần trên prerequisite graph"""
+
+    def __init__(self, data_loader, max_projects: int = 5, max_items_per_project: int = 4):
+        """
+        Khởi tạo LocalProjectSuggester
+
+        Args:
+            data_loader: Instance của DataLoader (đã load data)
+            max_projects: Số project tối đa
+            max_items_per_project: Số knowledge tối đa trong một project
+        """
+        self.data_loader = data_loader
+        self.max_projects = max_projects
+        self.max_items_per_project = max_items_per_project
+
+    def _affinity(self, a: str, b: str) -> int:
+        """
+        Độ gần của hai knowledge trên prerequisite graph
+
+        Args:
+            a: Knowledge thứ nhất (lowercase)
+            b: Knowledge thứ hai (lowercase)
+
+        Returns:
+            Điểm: 3 nếu là prerequisite trực tiếp của nhau, +1 cho mỗi prerequisite
+            hoặc detailed item dùng chung
+        """
+        graph = self.data_loader.prerequisite_graph
+        prereqs_a = set(graph.get_prerequisites(a))
+        prereqs_b = set(graph.get_prerequisites(b))
+
+        score = 3 if (a in prereqs_b or b in prereqs_a) else 0
+        score += len(prereqs_a & prereqs_b)
+
+        detailed_a = set(d.lower() for d in self.data_loader.get_knowledge_info(a).get("detailed", []))
+        detailed_b = set(d.lower() for d in self.data_loader.get_knowledge_info(b).get("detailed", []))
+        score += len(detailed_a & detailed_b)
+        return score
+
+    def _group_items(self, items: List[str]) -> List[List[str]]:
+        """
+        Gom items thành các nhóm liên quan (greedy theo level tăng dần)
+
+        Args:
+            items: Danh sách knowledge (lowercase)
+
+        Returns:
+            List các nhóm, mỗi nhóm không quá max_items_per_project items
+        """
+        graph = self.data_loader.prerequisite_graph
+        ordered = sorted(items, key=lambda item: (graph.get_level(item), item))
+
+        groups = []
+        for item in ordered:
+            best_group = None
+            best_score = 0
+            for group in groups:
+                if len(group) >= self.max_items_per_project:
+                    continue
+                score = sum(self._affinity(item, member) for member in group)
+                if score > best_score:
+                    best_group, best_score = group, score
+            if best_group is None:
+                groups.append([item])
+            else:
+                best_group.append(item)
+
+        # Quá nhiều nhóm: gộp các nhóm nhỏ nhất (giữ giới hạn kích thước nếu có thể)
+        while len(groups) > self.max_projects:
+            groups.sort(key=len)
+            smallest = groups.pop(0)
+            target = next((g for g in groups if len(g) + len(smallest) <= self.max_items_per_project),
+                          groups[0])
+            target.extend(smallest)
+
+        # Nhóm nhiều item nhất (project trọng tâm) lên trước, giữ thứ tự level trong nhóm
+        groups.sort(key=lambda g: (-len(g), graph.get_level(g[0])))
+        return groups
+
+    def _build_project(self, group: List[str], display_names: Dict[str, str], known: Set[str]) -> Dict:
+        """
+        Tạo một project từ một nhóm knowledge
+
+        Args:
+            group: Nhóm knowledge (lowercase)
+            display_names: Map lowercase -> tên gốc trong job
+            known: Set knowledge đã biết (lowercase)
+
+        Returns:
+            Dictionary {"title", "description", "knowledge_gain", "reasoning"}
+        """
+        graph = self.data_loader.prerequisite_graph
+        names = [display_names.get(item, item) for item in group]
+
+        # Lấy 1-2 detailed items đầu tiên của mỗi knowledge làm công nghệ cụ thể
+        technologies = []
+        for item in group:
+            for detail in self.data_loader.get_knowledge_info(item).get("detailed", [])[:2]:
+                if detail not in technologies:
+                    technologies.append(detail)
+
+        if len(names) == 1:
+            title = f"Hands-on {names[0]} project"
+        else:
+            title = f"{names[0]} and {names[-1]} integration project"
+
+        description = f"Build a small end-to-end project that practises {', '.join(names)}."
+        if technologies:
+            description += f" Use {', '.join(technologies[:6])} as the concrete technologies."
+
+        reasons = []
+        links = [(a, b) for a in group for b in group if a != b and a in graph.get_prerequisites(b)]
+        for a, b in links[:2]:
+            reasons.append(f"{display_names.get(a, a)} is a prerequisite of {display_names.get(b, b)}")
+        known_prereqs = sorted(set(p for item in group for p in graph.get_prerequisites(item) if p in known))
+        if known_prereqs:
+            reasons.append(f"it builds on what you already know ({', '.join(known_prereqs[:3])})")
+        if not reasons:
+            reasons.append("these items are required by the job and can be practised together")
+        reasoning = "Grouped because " + "; ".join(reasons) + "."
+
+        return {
+            "title": title,
+            "description": description,
+            "knowledge_gain": names,
+            "reasoning": reasoning
+        }
+
+    def suggest_project(self, job_info: Dict, student_knowledge: List[str]) -> Dict:
+        """
+        Đề xuất project cho job dựa trên knowledge còn thiếu
+
+        Args:
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+
+        Returns:
+            Dictionary cùng schema "project_suggestions" với AIProjectSuggester
+        """
+        known = set(k.lower() for k in student_knowledge or [])
+
+        display_names = {}
+        missing = []
+        # Ưu tiên essential còn thiếu; nếu đã đủ thì dùng optional, cuối cùng ôn lại essential
+        for candidates in (
+            [k for k in job_info.get("essential_knowledge", []) if k.lower() not in known],
+            [k for k in job_info.get("optional_knowledge", []) if k.lower() not in known],
+            job_info.get("essential_knowledge", [])
+        ):
+            for name in candidates:
+                key = name.lower()
+                if key not in display_names:
+                    display_names[key] = name
+                    missing.append(key)
+            if missing:
+                break
+
+        groups = self._group_items(missing) if missing else []
+        return {
+            "project_suggestions": [self._build_project(group, display_names, known) for group in groups],
+            "source": "Generated locally from the knowledge graph",
+            "job_name": job_info.get("name", "N/A")
+        }
@@ -10,9 +10,12 @@ import os
 from dotenv import load_dotenv
 
 from data_loader import DataLoader
+from sqlite_data_loader import SQLiteDataLoader, is_database_current
 from job_matcher import JobMatcher
 from roadmap_generator import RoadmapGenerator
+from career_path import CareerPathFinder
 from ai_project_suggester import AIProjectSuggester
+from suggestion_cache import SuggestionCache
 from selection_listbox import SelectionListbox
 
 
@@ -36,10 +39,19 @@ class StudentCareerApp(ctk.CTk):
         print("Loaded API Key:", "Yes" if api_key else "No")
         
         # Initialize data loader
-        self.data_loader = DataLoader(data_dir=".")
+        # Dùng database SQLite nếu make-assets đã build và còn khớp assets, nếu không thì đọc các file JSON
+        if os.path.exists("assets/career_data.sqlite3") and is_database_current("."):
+            self.data_loader = SQLiteDataLoader(data_dir=".")
+        else:
+            self.data_loader = DataLoader(data_dir=".")
         self.job_matcher = JobMatcher(self.data_loader)
         self.roadmap_generator = RoadmapGenerator(self.data_loader)
-        self.ai_suggester = AIProjectSuggester(api_key=api_key) if api_key else None
+        self.career_path_finder = CareerPathFinder(self.data_loader)
+        self.ai_suggester = AIProjectSuggester(
+            api_key=api_key,
+            cache=SuggestionCache("cache/project_suggestions.sqlite3", max_jaccard_distance=0.2),
+            data_loader=self.data_loader
+        )  # Không có API key: dùng đề xuất offline từ knowledge graph
         
         # Load data in background
         self.load_data_thread = threading.Thread(target=self._load_data_background)
@@ -161,16 +173,25 @@ class StudentCareerApp(ctk.CTk):
         )
         find_job_btn.grid(row=0, column=0, padx=10)
         
-        # # Suggest project button
-        # suggest_project_tab1_btn = ctk.CTkButton(
-        #     action_buttons_frame,
-        #     text="💡 Suggest Projects",
-        #     command=self.suggest_project_tab1,
-        #     width=220,
-        #     height=45,
-        #     font=ctk.CTkFont(size=16, weight="bold")
-        # )
-        # suggest_project_tab1_btn.grid(row=0, column=1, padx=10)
+        # Chế độ xếp hạng: theo điểm match hoặc kết hợp learning cost
+        self.tab1_rank_mode = ctk.CTkOptionMenu(
+            action_buttons_frame,
+            values=["Rank by match score", "Rank by learning cost"],
+            width=220,
+            height=45
+        )
+        self.tab1_rank_mode.grid(row=0, column=2, padx=10)
+        
+        # Suggest project button
+        suggest_project_tab1_btn = ctk.CTkButton(
+            action_buttons_frame,
+            text="💡 Suggest Projects",
+            command=self.suggest_project_tab1,
+            width=220,
+            height=45,
+            font=ctk.CTkFont(size=16, weight="bold")
+        )
+        suggest_project_tab1_btn.grid(row=0, column=1, padx=10)
         
         # Lưu kết quả tìm job để dùng cho suggest project
         self.tab1_job_results = None
@@ -384,6 +405,27 @@ class StudentCareerApp(ctk.CTk):
         )
         suggest_project_btn.grid(row=0, column=1, padx=10)
         
+        career_path_btn = ctk.CTkButton(
+            button_frame,
+            text="🧭 Career Path",
+            command=self.find_career_path,
+            width=220,
+            height=45,
+            font=ctk.CTkFont(size=16, weight="bold")
+        )
+        career_path_btn.grid(row=0, column=2, padx=10)
+        
+        # Quỹ giờ học mỗi tuần cho lịch học theo tuần của roadmap (để trống: không lập lịch)
+        ctk.CTkLabel(
+            button_frame,
+            text="⏱️ Hours/week:",
+            font=ctk.CTkFont(size=14)
+        ).grid(row=0, column=3, padx=(20, 5))
+        
+        self.tab2_hours_entry = ctk.CTkEntry(button_frame, width=70, font=ctk.CTkFont(size=14))
+        self.tab2_hours_entry.insert(0, "10")
+        self.tab2_hours_entry.grid(row=0, column=4, padx=5)
+        
         # Output frame - Mở rộng
         output_frame = ctk.CTkFrame(main_container)
         output_frame.pack(pady=5, padx=5, fill="both", expand=True)
@@ -400,6 +442,9 @@ class StudentCareerApp(ctk.CTk):
         # Lưu roadmap data để dùng cho suggest project
         self.current_roadmap_data = None
         self.current_missing_items = None
+        
+        # Event hủy của request suggest project đang hiển thị
+        self.tab2_cancel_event = None
     
     
     def on_job_entry_change(self, event=None):
@@ -416,33 +461,8 @@ class StudentCareerApp(ctk.CTk):
             self.job_suggestions_frame.place_forget()
             return
         
-        # Tìm matching jobs (bao gồm cả other_names)
-        matching_jobs = []
-        seen_canonical = set()  # Để tránh duplicate canonical names
-        
-        for job in self.data_loader.jobs_data:
-            canonical_name = job["name"]
-            job_name_lower = canonical_name.lower()
-            
-            # Check trong tên chính
-            if search_text in job_name_lower:
-                if canonical_name not in seen_canonical:
-                    matching_jobs.append((canonical_name, canonical_name))
-                    seen_canonical.add(canonical_name)
-            
-            # Check trong other_names
-            if "other_name" in job:
-                for other_name in job["other_name"]:
-                    if search_text in other_name.lower():
-                        if canonical_name not in seen_canonical:
-                            # Format: "devops engineer → cloud DevOps engineer"
-                            display_name = f"{other_name} → {canonical_name}"
-                            matching_jobs.append((display_name, canonical_name))
-                            seen_canonical.add(canonical_name)
-                        break
-        
-        # Limit số lượng suggestions
-        matching_jobs = matching_jobs[:10]  # Max 10 suggestions
+        # Tìm matching jobs (bao gồm cả other_names), tối đa 10 gợi ý
+        matching_jobs = self.data_loader.autocomplete_jobs(search_text, limit=10)
         
         # Nếu không có match, ẩn dropdown
         if not matching_jobs:
@@ -530,12 +550,21 @@ class StudentCareerApp(ctk.CTk):
         
         # Find jobs
         try:
-            results = self.job_matcher.find_suitable_jobs(
-                user_skills,
-                user_knowledge,
-                min_score=5.0,  # Điểm tối thiểu rất thấp
-                top_n=15  # Hiển thị nhiều kết quả hơn
-            )
+            rank_by_cost = self.tab1_rank_mode.get() == "Rank by learning cost"
+            if rank_by_cost:
+                results = self.job_matcher.rank_jobs_by_learning_cost(
+                    user_skills,
+                    user_knowledge,
+                    min_score=5.0,
+                    top_n=15
+                )
+            else:
+                results = self.job_matcher.find_suitable_jobs(
+                    user_skills,
+                    user_knowledge,
+                    min_score=5.0,  # Điểm tối thiểu rất thấp
+                    top_n=15  # Hiển thị nhiều kết quả hơn
+                )
             
             # Lưu kết quả để dùng cho suggest project
             self.tab1_job_results = results
@@ -550,13 +579,20 @@ class StudentCareerApp(ctk.CTk):
                 self.tab1_output.insert("end", "  • Review your selected items\n")
             else:
                 self.tab1_output.insert("end", f"🎯 Found {len(results)} suitable jobs:\n")
-                self.tab1_output.insert("end", f"📌 You selected: {len(user_skills)} skills, {len(user_knowledge)} knowledge\n\n")
+                self.tab1_output.insert("end", f"📌 You selected: {len(user_skills)} skills, {len(user_knowledge)} knowledge\n")
+                if not self.data_loader.jobs_loaded.is_set():
+                    self.tab1_output.insert("end", f"⏳ Still loading jobs ({len(self.data_loader.jobs_data)} so far), search again for full results\n")
+                self.tab1_output.insert("end", "\n")
                 
                 for idx, job in enumerate(results, 1):
                     output = f"{'='*70}\n"
                     output += f"{idx}. {job['job_name']} - Score: {job['total_score']:.1f}%\n"
                     output += f"{'='*70}\n"
-                    output += f"   Required: {job['required_score']:.1f}% | Optional: {job['optional_score']:.1f}%\n\n"
+                    output += f"   Required: {job['required_score']:.1f}% | Optional: {job['optional_score']:.1f}%\n"
+                    if "learning_cost" in job:
+                        cost = job["learning_cost"]
+                        output += f"   Learning cost: {cost['items']} items (total level {cost['level_sum']}) | Combined: {job['combined_score']:.1f}\n"
+                    output += "\n"
                     
                     # Matched requirements (show what user has)
                     matched = job['matched']
@@ -639,21 +675,23 @@ class StudentCareerApp(ctk.CTk):
                 self.tab2_output.insert("end", f"Error: {missing_info.get('error', 'Job not found')}")
                 return
             
-            # Generate roadmap CHỈ CHO ESSENTIAL (REQUIRED) KNOWLEDGE
+            # Generate roadmap CHO ESSENTIAL (REQUIRED) SKILLS + KNOWLEDGE
             missing = missing_info["missing"]
             
-            # CHỈ LẤY REQUIRED KNOWLEDGE - KHÔNG LẤY OPTIONAL
+            # CHỈ LẤY REQUIRED - KHÔNG LẤY OPTIONAL
+            missing_required_skills = missing["required_skills"]
             missing_required_knowledge = missing["required_knowledge"]
             missing_optional_knowledge = missing["optional_knowledge"]
             
             # Lưu để dùng cho suggest project (chỉ required)
             self.current_missing_items = {
+                "required_skills": missing_required_skills,
                 "required_knowledge": missing_required_knowledge,
                 "optional_knowledge": missing_optional_knowledge  # Lưu riêng để hiển thị
             }
             
             # Kiểm tra xem có cần học gì không
-            if not missing_required_knowledge:
+            if not missing_required_knowledge and not missing_required_skills:
                 self.tab2_output.delete("1.0", "end")
                 output = "🎉 Congratulations! You meet all REQUIRED requirements for this job!\n\n"
                 
@@ -667,11 +705,13 @@ class StudentCareerApp(ctk.CTk):
                 self.tab2_output.insert("end", output)
                 return
             
-            # TẠO ROADMAP CHỈ VỚI REQUIRED KNOWLEDGE
+            # TẠO ROADMAP VỚI REQUIRED SKILLS + KNOWLEDGE (một đồ thị chung)
             roadmap_data = self.roadmap_generator.generate_learning_roadmap(
-                [],  # Không dùng skills
-                missing_required_knowledge,  # CHỈ REQUIRED KNOWLEDGE
-                learned_knowledge=user_knowledge  # Knowledge user đã có
+                missing_required_skills,
+                missing_required_knowledge,
+                learned_knowledge=user_knowledge,  # Knowledge user đã có
+                job_name=job_name_canonical,
+                learned_skills=user_skills
             )
             
             self.current_roadmap_data = roadmap_data
@@ -683,10 +723,11 @@ class StudentCareerApp(ctk.CTk):
             output = f"🎯 LEARNING ROADMAP FOR: {job_name_canonical}\n"
             output += f"{'='*70}\n\n"
             
-            # Summary (chỉ required knowledge)
+            # Summary (required skills + knowledge)
             summary = self.roadmap_generator.get_roadmap_summary(roadmap_data)
-            output += f"📊 REQUIRED KNOWLEDGE Overview:\n"
+            output += f"📊 REQUIRED Overview:\n"
             output += f"   • Total knowledge to learn: {summary['total_knowledge']}\n"
+            output += f"   • Total skills to learn: {summary['total_skills']}\n"
             # output += f"   • Độ khó trung bình: {summary['estimated_difficulty']}/10\n"
             
             # Time estimate
@@ -699,6 +740,17 @@ class StudentCareerApp(ctk.CTk):
             formatted_roadmap = self.roadmap_generator.format_roadmap_for_display(roadmap_data)
             self.tab2_output.insert("end", formatted_roadmap)
             
+            # Lịch học theo tuần theo quỹ giờ user nhập
+            hours_text = self.tab2_hours_entry.get().strip()
+            if hours_text:
+                try:
+                    hours_per_week = float(hours_text)
+                    weekly_plan = self.roadmap_generator.generate_weekly_plan(roadmap_data, hours_per_week)
+                    self.tab2_output.insert(
+                        "end", "\n" + self.roadmap_generator.format_weekly_plan_for_display(weekly_plan) + "\n")
+                except ValueError:
+                    self.tab2_output.insert("end", f"\n⚠️ Invalid hours per week: {hours_text}\n")
+            
             # HIỂN thị OPTIONAL KNOWLEDGE RIÊNG BIỆT (không trong roadmap)
             if missing_optional_knowledge:
                 output = "\n" + "="*70 + "\n"
@@ -723,20 +775,36 @@ class StudentCareerApp(ctk.CTk):
             self.tab2_output.delete("1.0", "end")
             self.tab2_output.insert("end", f"Error: {str(e)}\n{type(e).__name__}")
     
+    def find_career_path(self):
+        """Tìm chuỗi jobs trung gian tới job mục tiêu từ skills/knowledge đang chọn (Tab 2)"""
+        job_name = self.tab2_job_entry.get().strip()
+        if not job_name:
+            messagebox.showwarning("Warning", "Please enter a job title!")
+            return
+        
+        # Skills và knowledge user đã có (đã là canonical names)
+        current_items = list(set(self.tab2_skills_listbox.get_selected_canonical() +
+                                 self.tab2_knowledge_listbox.get_selected_canonical()))
+        
+        self.tab2_output.delete("1.0", "end")
+        self.tab2_output.insert("end", f"Searching career path to '{job_name}'...\n")
+        self.update()
+        
+        try:
+            path_data = self.career_path_finder.find_transition_path(job_name, current_items=current_items)
+            self.tab2_output.delete("1.0", "end")
+            self.tab2_output.insert("end", self.career_path_finder.format_transition_path_for_display(path_data))
+            self.tab2_output.see("1.0")
+        except Exception as e:
+            self.tab2_output.delete("1.0", "end")
+            self.tab2_output.insert("end", f"Error: {str(e)}\n{type(e).__name__}")
+    
     def suggest_project(self):
         """Đề xuất project sử dụng Google Gemini AI (Tab 2)"""
         # if not self.current_missing_items:
         #     messagebox.showwarning("Cảnh báo", "Vui lòng tạo roadmap trước khi đề xuất project!")
         #     return
         
-        if not self.ai_suggester:
-            messagebox.showwarning(
-                "Warning",
-                "GEMINI_API_KEY not found in .env file!\n\n" +
-                "Please add GEMINI_API_KEY to .env file"
-            )
-            return
-        
         # Clear output và hiển thị loading
         self.tab2_output.delete("1.0", "end")
         self.tab2_output.insert("end", "🤖 Generating project suggestions...\n")
@@ -754,6 +822,12 @@ class StudentCareerApp(ctk.CTk):
         user_knowledge = self.tab2_knowledge_listbox.get_selected_canonical()
         user_knowledge = list(set(user_knowledge))  # Remove duplicates
         
+        # Hủy hiển thị của lần bấm trước (request giống nhau vẫn được gộp, không gọi lại AI)
+        if self.tab2_cancel_event:
+            self.tab2_cancel_event.set()
+        cancel_event = threading.Event()
+        self.tab2_cancel_event = cancel_event
+        
         # Run in thread để không block UI
         def suggest_in_thread():
             try:
@@ -765,19 +839,59 @@ class StudentCareerApp(ctk.CTk):
                     self.tab2_output.insert("end", f"❌ Job information not found: {job_name_canonical}")
                     return
                 
-                # Gọi AI với job_info và student_knowledge
-                project_data = self.ai_suggester.suggest_project(
+                # Preview offline hiển thị ngay trong lúc chờ AI (bị thay thế khi AI trả về project đầu tiên)
+                if self.ai_suggester.backend:
+                    preview = self.ai_suggester.suggest_project_local(job_info, user_knowledge)
+                    if preview:
+                        def show_preview():
+                            if cancel_event.is_set():
+                                return
+                            self.tab2_output.delete("1.0", "end")
+                            self.tab2_output.insert("end", "⚡ Instant preview (local knowledge graph), waiting for AI...\n\n")
+                            self.tab2_output.insert("end", self.ai_suggester.format_project_for_display(preview))
+                        self.after(0, show_preview)
+                
+                def show_header():
+                    if cancel_event.is_set():
+                        return
+                    self.tab2_output.delete("1.0", "end")
+                    self.tab2_output.insert("end", self.ai_suggester.format_project_header() + "\n")
+                
+                def show_project(idx: int, project: dict):
+                    if cancel_event.is_set():
+                        return
+                    self.tab2_output.insert("end", self.ai_suggester.format_single_project(idx, project) + "\n")
+                
+                received = []
+                
+                def on_project(idx: int, project: dict):
+                    # Render từng project ngay khi stream trả về đủ object (qua main thread)
+                    if not received:
+                        self.after(0, show_header)
+                    received.append(project)
+                    self.after(0, show_project, idx, project)
+                
+                # Gọi AI với job_info và student_knowledge (streaming)
+                project_data = self.ai_suggester.suggest_project_stream(
                     job_info,
-                    user_knowledge
+                    user_knowledge,
+                    on_project,
+                    cancel_event
                 )
                 
-                formatted = self.ai_suggester.format_project_for_display(project_data)
-                
-                self.tab2_output.delete("1.0", "end")
-                self.tab2_output.insert("end", formatted)
+                def show_final():
+                    if cancel_event.is_set():
+                        return
+                    if received and "error" not in project_data:
+                        self.tab2_output.insert("end", self.ai_suggester.format_project_footer(project_data))
+                    else:
+                        formatted = self.ai_suggester.format_project_for_display(project_data)
+                        self.tab2_output.delete("1.0", "end")
+                        self.tab2_output.insert("end", formatted)
+                        # Scroll to top để hiển thị từ đầu
+                        self.tab2_output.see("1.0")
                 
-                # Scroll to top để hiển thị từ đầu
-                self.tab2_output.see("1.0")
+                self.after(0, show_final)
                 
             except Exception as e:
                 self.tab2_output.delete("1.0", "end")
@@ -792,14 +906,6 @@ class StudentCareerApp(ctk.CTk):
             messagebox.showwarning("Warning", "Please find suitable jobs first!")
             return
         
-        if not self.ai_suggester:
-            messagebox.showwarning(
-                "Warning",
-                "GEMINI_API_KEY not found in .env file!\n\n" +
-                "Please add GEMINI_API_KEY to .env file"
-            )
-            return
-        
         # Clear output và hiển thị loading
         self.tab1_output.delete("1.0", "end")
         self.tab1_output.insert("end", "🤖 Generating project suggestions for jobs...\n\n")
@@ -807,42 +913,36 @@ class StudentCareerApp(ctk.CTk):
         
         # Lấy top 3 jobs để suggest project
         top_jobs = self.tab1_job_results[:3]
+        job_infos = []
+        for job_result in top_jobs:
+            job_info = self.data_loader.get_job_by_name(job_result['job_name'])
+            if not job_info:
+                self.tab1_output.insert("end", f"❌ Job information not found: {job_result['job_name']}\n\n")
+                continue
+            job_infos.append(job_info)
+        
+        def show_result(idx: int, job_info: dict, project_data: dict):
+            """Hiển thị kết quả của một job ngay khi request đó hoàn thành"""
+            output_text = f"{'='*70}\n"
+            output_text += f"JOB {idx + 1}: {job_info['name']}\n"
+            output_text += f"{'='*70}\n\n"
+            
+            formatted = self.ai_suggester.format_project_for_display(project_data)
+            output_text += formatted + "\n\n"
+            
+            self.tab1_output.insert("end", output_text)
         
         def suggest_in_thread():
             try:
-                output_text = ""
-                
-                for idx, job_result in enumerate(top_jobs, 1):
-                    job_name = job_result['job_name']
-                    
-                    # Lấy thông tin job từ data_loader
-                    job_info = self.data_loader.get_job_by_name(job_name)
-                    
-                    if not job_info:
-                        output_text += f"\n❌ Job information not found: {job_name}\n\n"
-                        continue
-                    
-                    output_text += f"{'='*70}\n"
-                    output_text += f"JOB {idx}: {job_name}\n"
-                    output_text += f"{'='*70}\n\n"
-                    
-                    # Gọi AI để suggest project
-                    project_data = self.ai_suggester.suggest_project(
-                        job_info,
-                        self.tab1_user_knowledge
-                    )
-                    
-                    if "error" in project_data:
-                        output_text += f"❌ Error: {project_data['error']}\n\n"
-                    else:
-                        # Format project suggestions
-                        formatted = self.ai_suggester.format_project_for_display(project_data)
-                        output_text += formatted + "\n\n"
-                
-                # Hiển thị kết quả
-                self.tab1_output.delete("1.0", "end")
-                self.tab1_output.insert("end", output_text)
-                self.tab1_output.see("1.0")
+                # Gọi song song cho các jobs, hiển thị từng kết quả khi xong (qua main thread)
+                self.ai_suggester.suggest_projects_concurrently(
+                    job_infos,
+                    self.tab1_user_knowledge,
+                    max_concurrency=3,
+                    timeout=90,
+                    on_result=lambda idx, job_info, project_data: self.after(
+                        0, show_result, idx, job_info, project_data)
+                )
                 
             except Exception as e:
                 self.tab1_output.delete("1.0", "end")
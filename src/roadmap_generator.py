@@ -1,8 +1,10 @@
 """
 Module tạo roadmap học tập dựa trên topological sort
 """
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict
-from graph_utils import create_roadmap
+from graph_utils import build_base_plan, prune_base_plan, prune_base_plan_batch, schedule_weekly_plan
 
 
 class RoadmapGenerator:
@@ -19,43 +21,140 @@ class RoadmapGenerator:
     
     def generate_learning_roadmap(self, missing_skills: List[str], 
                                     missing_knowledge: List[str],
-                                    learned_knowledge: List[str] = None) -> Dict:
+                                    learned_knowledge: List[str] = None,
+                                    job_name: str = None,
+                                    learned_skills: List[str] = None) -> Dict:
         """
-        Tạo roadmap học tập chỉ cho knowledge còn thiếu (bỏ skills)
+        Tạo roadmap học tập cho cả skills và knowledge còn thiếu trong một lần duyệt
+        trên đồ thị prerequisites đã compile (data_loader.prerequisite_graph)
+        
+        Nếu chỉ thiếu knowledge và có base roadmap precompute cho job_name, roadmap
+        được tạo bằng cách cắt các items đã học khỏi base plan thay vì build lại đồ thị.
         
         Args:
-            missing_skills: Danh sách skills còn thiếu (không sử dụng)
+            missing_skills: Danh sách skills còn thiếu
             missing_knowledge: Danh sách knowledge còn thiếu
             learned_knowledge: Danh sách knowledge mà user đã học
+            job_name: Tên canonical của job (để dùng base roadmap nếu có)
+            learned_skills: Danh sách skills mà user đã có
             
         Returns:
-            Dictionary chứa roadmap chi tiết
+            Dictionary chứa roadmap chi tiết ("learning_roadmap" với tên gốc của items, item có type tag)
         """
-        # Chuyển learned_knowledge thành set
-        learned_set = set(learned_knowledge) if learned_knowledge else set()
+        # Chuyển learned items thành set (lowercase, cùng key với đồ thị)
+        learned_set = set(k.lower() for k in (learned_knowledge or []))
+        learned_set.update(s.lower() for s in (learned_skills or []))
         
-        print(learned_knowledge)
-
-        # Chỉ tạo roadmap cho knowledge
-        knowledge_roadmap = None
-        if missing_knowledge:
-            knowledge_roadmap = create_roadmap(
-                missing_knowledge,
-                self.data_loader,
-                item_type="knowledge",
+        prerequisite_graph = self.data_loader.prerequisite_graph
+        learning_roadmap = None
+        base_plan = None if missing_skills else \
+            self._get_base_plan(job_name, missing_knowledge, learned_set)
+        
+        if base_plan:
+            learning_roadmap = prune_base_plan(base_plan, learned_set)
+            learning_roadmap["item_types"] = {
+                item: prerequisite_graph.get_type(item)
+                for item in learning_roadmap["scc_graph"]["node_levels"]
+            }
+        elif missing_skills or missing_knowledge:
+            learning_roadmap = prerequisite_graph.create_roadmap(
+                list(missing_skills) + list(missing_knowledge),
                 learned_items=learned_set
             )
         
-        # print(f"Generated learning roadmap: {knowledge_roadmap}")
-
+        # Đồ thị dùng key lowercase: hiển thị bằng tên gốc (ví dụ "ICT security legislation")
+        if learning_roadmap:
+            learning_roadmap = prerequisite_graph.with_canonical_names(learning_roadmap)
+        
+        return {
+            "learning_roadmap": learning_roadmap
+        }
+    
+    def generate_cohort_roadmaps(self, target_items: List[str],
+                                 learned_sets: List[List[str]],
+                                 job_name: str = None,
+                                 processes: int = None,
+                                 chunk_size: int = 256) -> Dict:
+        """
+        Tạo roadmap cho cả một nhóm learners cùng target, dùng chung một base plan
+        (condensation DAG build/precompute một lần) và reachability mask theo batch
+        
+        Args:
+            target_items: Danh sách skills/knowledge cần đạt (chung cho cả nhóm)
+            learned_sets: Danh sách items đã học của từng learner
+            job_name: Tên canonical của job (dùng base roadmap precompute nếu khớp targets)
+            processes: Số process để chia batch (None hoặc <= 1: chạy trong process hiện tại)
+            chunk_size: Số learners mỗi chunk khi chạy bằng process pool
+            
+        Returns:
+            Dictionary chứa "roadmaps" (cùng format generate_learning_roadmap, cùng thứ tự
+            với learned_sets), "elapsed_seconds" và "roadmaps_per_second"
+        """
+        start_time = time.perf_counter()
+        
+        prerequisite_graph = self.data_loader.prerequisite_graph
+        targets = sorted(set(item.lower() for item in target_items))
+        
+        base_plan = self.data_loader.base_roadmaps.get(job_name) if job_name else None
+        if not base_plan or sorted(base_plan["items"][t] for t in base_plan["targets"]) != targets:
+            base_plan = build_base_plan(targets, prerequisite_graph.get_prerequisites,
+                                        prerequisite_graph.get_level)
+        
+        normalized_sets = [set(item.lower() for item in learned) for learned in learned_sets]
+        
+        if processes and processes > 1 and len(normalized_sets) > chunk_size:
+            chunks = [normalized_sets[i:i + chunk_size]
+                      for i in range(0, len(normalized_sets), chunk_size)]
+            with ProcessPoolExecutor(max_workers=processes) as executor:
+                results = executor.map(prune_base_plan_batch, [base_plan] * len(chunks), chunks)
+                pruned = [roadmap for chunk_result in results for roadmap in chunk_result]
+        else:
+            pruned = prune_base_plan_batch(base_plan, normalized_sets)
+        
+        item_types = {item: prerequisite_graph.get_type(item) for item in base_plan["items"]}
+        roadmaps = []
+        for roadmap in pruned:
+            if roadmap["total_items"] == 0:
+                roadmaps.append({"learning_roadmap": None})
+                continue
+            roadmap["item_types"] = {item: item_types[item]
+                                     for item in roadmap["scc_graph"]["node_levels"]}
+            roadmaps.append({"learning_roadmap": prerequisite_graph.with_canonical_names(roadmap)})
+        
+        elapsed = time.perf_counter() - start_time
         return {
-            "skills_roadmap": None,  # Không sử dụng skills nữa
-            "knowledge_roadmap": knowledge_roadmap
+            "roadmaps": roadmaps,
+            "elapsed_seconds": round(elapsed, 4),
+            "roadmaps_per_second": round(len(roadmaps) / elapsed, 1) if elapsed > 0 else 0.0
         }
     
+    def _get_base_plan(self, job_name: str, missing_knowledge: List[str],
+                       learned_set: set) -> Dict:
+        """
+        Lấy base plan của job nếu có và khớp với missing knowledge được yêu cầu
+        
+        Args:
+            job_name: Tên canonical của job
+            missing_knowledge: Danh sách knowledge còn thiếu
+            learned_set: Set knowledge đã học
+            
+        Returns:
+            Base plan hoặc None (fallback về create_roadmap)
+        """
+        base_plan = self.data_loader.base_roadmaps.get(job_name) if job_name else None
+        if not base_plan:
+            return None
+        
+        items = base_plan["items"]
+        remaining_targets = set(items[t] for t in base_plan["targets"]) - learned_set
+        if remaining_targets != set(k.lower() for k in missing_knowledge):
+            return None
+        
+        return base_plan
+    
     def format_roadmap_for_display(self, roadmap_data: Dict) -> str:
         """
-        Format roadmap thành string dễ đọc cho UI (chỉ knowledge)
+        Format roadmap thành string dễ đọc cho UI (skills được đánh dấu [skill])
         
         Args:
             roadmap_data: Kết quả từ generate_learning_roadmap
@@ -65,14 +164,15 @@ class RoadmapGenerator:
         """
         output = []
         
-        # Format knowledge roadmap
-        if roadmap_data["knowledge_roadmap"]:
+        # Format learning roadmap
+        if roadmap_data["learning_roadmap"]:
             output.append("=" * 60)
-            output.append("📚 KNOWLEDGE LEARNING ROADMAP")
+            output.append("📚 LEARNING ROADMAP")
             output.append("=" * 60)
             output.append("")
             
-            kr = roadmap_data["knowledge_roadmap"]
+            kr = roadmap_data["learning_roadmap"]
+            item_types = kr.get("item_types", {})
             
             for stage in kr["roadmap"]:
                 stage_num = stage["stage"]
@@ -89,18 +189,21 @@ class RoadmapGenerator:
                     output.append(f"Stage {stage_num}: ➡️ Learn Sequentially ({count} items)")
                 
                 for item in items:
-                    output.append(f"  • {item}")
+                    if item_types.get(item) == "skill":
+                        output.append(f"  • {item} [skill]")
+                    else:
+                        output.append(f"  • {item}")
                 
                 output.append("")
         
-        if not roadmap_data["knowledge_roadmap"]:
+        if not roadmap_data["learning_roadmap"]:
             output.append("Nothing more to learn! You're ready! 🎉")
         
         return "\n".join(output)
     
     def get_roadmap_summary(self, roadmap_data: Dict) -> Dict:
         """
-        Tạo summary về roadmap (chỉ knowledge)
+        Tạo summary về roadmap (đếm riêng skills và knowledge theo type tag)
         
         Args:
             roadmap_data: Kết quả từ generate_learning_roadmap
@@ -110,29 +213,29 @@ class RoadmapGenerator:
         """
         summary = {
             "total_knowledge": 0,
-            "total_skills": 0,  # Luôn là 0
-            "knowledge_stages": 0,
-            "skills_stages": 0,
+            "total_skills": 0,
+            "total_stages": 0,
             "has_cycles": False,
             "estimated_difficulty": 0.0
         }
         
-        if roadmap_data["knowledge_roadmap"]:
-            kr = roadmap_data["knowledge_roadmap"]
-            summary["total_knowledge"] = kr["total_items"]
-            summary["knowledge_stages"] = len(kr["roadmap"])
+        if roadmap_data["learning_roadmap"]:
+            kr = roadmap_data["learning_roadmap"]
+            item_types = kr.get("item_types", {})
+            summary["total_skills"] = sum(1 for t in item_types.values() if t == "skill")
+            summary["total_knowledge"] = kr["total_items"] - summary["total_skills"]
+            summary["total_stages"] = len(kr["roadmap"])
             summary["has_cycles"] = kr["has_cycles"]
         
-        # Tính độ khó trung bình (chỉ knowledge)
-        total_items = summary["total_knowledge"]
+        # Tính độ khó trung bình
+        total_items = summary["total_knowledge"] + summary["total_skills"]
         if total_items > 0:
             total_difficulty = 0
+            prerequisite_graph = self.data_loader.prerequisite_graph
             
-            if roadmap_data["knowledge_roadmap"]:
-                for stage in roadmap_data["knowledge_roadmap"]["roadmap"]:
-                    for item in stage["items"]:
-                        info = self.data_loader.get_knowledge_info(item)
-                        total_difficulty += info.get("level", 5)
+            for stage in roadmap_data["learning_roadmap"]["roadmap"]:
+                for item in stage["items"]:
+                    total_difficulty += prerequisite_graph.get_level(item)
             
             summary["estimated_difficulty"] = round(total_difficulty / total_items, 2)
         
@@ -141,7 +244,7 @@ class RoadmapGenerator:
     def get_next_items_to_learn(self, roadmap_data: Dict, 
                                current_stage: int = 1) -> List[str]:
         """
-        Lấy danh sách items cần học ở stage tiếp theo (chỉ knowledge)
+        Lấy danh sách items cần học ở stage tiếp theo
         
         Args:
             roadmap_data: Kết quả từ generate_learning_roadmap
@@ -152,8 +255,8 @@ class RoadmapGenerator:
         """
         next_items = []
         
-        if roadmap_data["knowledge_roadmap"]:
-            kr = roadmap_data["knowledge_roadmap"]["roadmap"]
+        if roadmap_data["learning_roadmap"]:
+            kr = roadmap_data["learning_roadmap"]["roadmap"]
             if current_stage <= len(kr):
                 next_items.extend(kr[current_stage - 1]["items"])
         
@@ -162,7 +265,7 @@ class RoadmapGenerator:
     def get_learning_time_estimate(self, roadmap_data: Dict, 
                                    hours_per_item: int = 20) -> Dict:
         """
-        Ước tính thời gian học tập (chỉ knowledge)
+        Ước tính thời gian học tập (skills + knowledge)
         
         Args:
             roadmap_data: Kết quả từ generate_learning_roadmap
@@ -172,7 +275,7 @@ class RoadmapGenerator:
             Dictionary chứa ước tính thời gian
         """
         summary = self.get_roadmap_summary(roadmap_data)
-        total_items = summary["total_knowledge"]  # Chỉ tính knowledge
+        total_items = summary["total_knowledge"] + summary["total_skills"]
         
         # Điều chỉnh thời gian dựa trên độ khó
         difficulty_multiplier = summary["estimated_difficulty"] / 5.0
@@ -189,3 +292,56 @@ class RoadmapGenerator:
             "items_count": total_items,
             "difficulty_multiplier": round(difficulty_multiplier, 2)
         }
+    
+    def generate_weekly_plan(self, roadmap_data: Dict, hours_per_week: float,
+                             hours_per_item: int = 20) -> List[Dict]:
+        """
+        Xếp các stage của roadmap vào lịch học theo tuần dựa trên quỹ giờ của learner
+        
+        Args:
+            roadmap_data: Kết quả từ generate_learning_roadmap
+            hours_per_week: Số giờ learner có thể học mỗi tuần
+            hours_per_item: Số giờ trung bình cho mỗi item (level 5)
+            
+        Returns:
+            List of weeks: [{"week": 1, "items": [{"item": ..., "hours": ...}], "hours_used": ...}, ...]
+        """
+        kr = roadmap_data["learning_roadmap"]
+        if not kr:
+            return []
+        
+        scc_graph = kr["scc_graph"]
+        return schedule_weekly_plan(
+            scc_graph["sccs"],
+            scc_graph["edges"],
+            scc_graph["node_levels"],
+            hours_per_week,
+            hours_per_item
+        )
+    
+    def format_weekly_plan_for_display(self, weekly_plan: List[Dict]) -> str:
+        """
+        Format lịch học theo tuần thành string dễ đọc cho UI
+        
+        Args:
+            weekly_plan: Kết quả từ generate_weekly_plan
+            
+        Returns:
+            String formatted weekly plan
+        """
+        if not weekly_plan:
+            return "Nothing more to learn! You're ready! 🎉"
+        
+        output = []
+        output.append("=" * 60)
+        output.append(f"📅 WEEKLY LEARNING PLAN ({len(weekly_plan)} weeks)")
+        output.append("=" * 60)
+        output.append("")
+        
+        for week in weekly_plan:
+            output.append(f"Week {week['week']}: {week['hours_used']}h")
+            for entry in week["items"]:
+                output.append(f"  • {entry['item']} ({entry['hours']}h)")
+            output.append("")
+        
+        return "\n".join(output)
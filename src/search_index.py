@@ -0,0 +1,194 @@
+"""
+Module inverted index trong bộ nhớ với xếp hạng BM25 (có trọng số theo field) để tìm jobs
+theo tên, các tên khác và description
+"""
+import bisect
+import heapq
+import math
+import re
+import threading
+from typing import Dict, List, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it",
+    "of", "on", "or", "such", "that", "the", "their", "them", "they", "this", "to", "with"
+))
+MIN_PREFIX_LENGTH = 2  # Token prefix ngắn hơn (ví dụ "c" của "C++") match gần như mọi term: bỏ qua
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Tách text thành các token lowercase (bỏ stopwords)
+
+    Args:
+        text: Text cần tách
+
+    Returns:
+        Danh sách token
+    """
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def query_tokens(query: str) -> List[str]:
+    """
+    Tách query user đang gõ thành token (token cuối sẽ được match như prefix, nên bỏ nếu quá ngắn)
+
+    Args:
+        query: Text user đã gõ
+
+    Returns:
+        Danh sách token
+    """
+    tokens = tokenize(query)
+    if tokens and len(tokens[-1]) < MIN_PREFIX_LENGTH:
+        tokens.pop()
+    return tokens
+
+
+class BM25Index:
+    """Inverted index BM25F đơn giản: tf của mỗi field được nhân trọng số rồi cộng lại"""
+
+    def __init__(self, field_weights: Dict[str, float] = None, k1: float = 1.2, b: float = 0.75,
+                 max_prefix_terms: int = 50):
+        """
+        Khởi tạo BM25Index
+
+        Args:
+            field_weights: Trọng số của từng field (mặc định name > aliases > description)
+            k1: Tham số bão hòa tf của BM25
+            b: Tham số chuẩn hóa độ dài document của BM25
+            max_prefix_terms: Số term tối đa được mở rộng từ một token prefix
+        """
+        self.field_weights = field_weights or {"name": 3.0, "aliases": 2.0, "description": 1.0}
+        self.k1 = k1
+        self.b = b
+        self.max_prefix_terms = max_prefix_terms
+        self.postings: Dict[str, Dict[int, float]] = {}  # term -> {doc_id: weighted tf}
+        self.doc_lengths: Dict[int, float] = {}
+        self.total_length = 0.0
+        self._sorted_terms = None  # Build lại khi có term mới (dùng cho prefix match)
+        # Điểm BM25 đã tính sẵn của từng posting (term -> [(doc_id, score)]), xóa khi index thay đổi
+        self._impacts: Dict[str, List[Tuple[int, float]]] = {}
+        self._lock = threading.Lock()  # Index có thể được thêm dần trong lúc đang được query
+
+    def add(self, doc_id: int, fields: Dict[str, str]):
+        """
+        Thêm một document vào index
+
+        Args:
+            doc_id: Id của document (ví dụ vị trí trong jobs_data)
+            fields: Dictionary field -> text
+        """
+        with self._lock:
+            self._add(doc_id, fields)
+
+    def _add(self, doc_id: int, fields: Dict[str, str]):
+        length = 0.0
+        for field, text in fields.items():
+            weight = self.field_weights.get(field, 1.0)
+            for token in tokenize(text or ""):
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = {}
+                    self._sorted_terms = None
+                postings[doc_id] = postings.get(doc_id, 0.0) + weight
+                length += weight
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        # idf và độ dài trung bình đã đổi: điểm tính sẵn không còn đúng
+        self._impacts = {}
+
+    def _term_impacts(self, term: str) -> List[Tuple[int, float]]:
+        """Điểm BM25 của term với từng document chứa nó (tính một lần, dùng lại cho các query sau)"""
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            doc_count = len(self.doc_lengths)
+            avg_length = self.total_length / doc_count or 1.0
+            postings = self.postings[term]
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            impacts = []
+            for doc_id, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                impacts.append((doc_id, idf * tf * (self.k1 + 1) / (tf + norm)))
+            impacts.sort(key=lambda x: (-x[1], x[0]))  # Query một term: lấy thẳng top đầu danh sách
+            self._impacts[term] = impacts
+        return impacts
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """Các term bắt đầu bằng prefix (tối đa max_prefix_terms)"""
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self.postings)
+        terms = []
+        idx = bisect.bisect_left(self._sorted_terms, prefix)
+        while idx < len(self._sorted_terms) and len(terms) < self.max_prefix_terms:
+            term = self._sorted_terms[idx]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            idx += 1
+        return terms
+
+    def search(self, query: str, limit: int = None, prefix_last: bool = True,
+               require_all: bool = False) -> List[Tuple[int, float]]:
+        """
+        Tìm documents theo BM25
+
+        Args:
+            query: Câu truy vấn
+            limit: Số kết quả tối đa (None: tất cả)
+            prefix_last: Token cuối được match như prefix (cho autocomplete khi đang gõ,
+                token cuối ngắn hơn MIN_PREFIX_LENGTH bị bỏ qua)
+            require_all: Chỉ giữ documents match mọi token (AND), mặc định OR
+
+        Returns:
+            List (doc_id, score) theo score giảm dần
+        """
+        tokens = query_tokens(query) if prefix_last else tokenize(query)
+        with self._lock:
+            return self._search(tokens, limit, prefix_last, require_all)
+
+    def _search(self, tokens: List[str], limit: int, prefix_last: bool,
+                require_all: bool = False) -> List[Tuple[int, float]]:
+        if not tokens or not self.doc_lengths:
+            return []
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, int] = {}  # Số token document đã match (cho require_all)
+        for position, token in enumerate(tokens):
+            if prefix_last and position == len(tokens) - 1:
+                terms = self._expand_prefix(token)
+            else:
+                terms = [token] if token in self.postings else []
+
+            if not terms and require_all:
+                return []
+
+            if len(terms) == 1:
+                if len(tokens) == 1:
+                    impacts = self._term_impacts(terms[0])
+                    return impacts[:limit] if limit else list(impacts)
+                for doc_id, score in self._term_impacts(terms[0]):
+                    scores[doc_id] = scores.get(doc_id, 0.0) + score
+                    matched[doc_id] = matched.get(doc_id, 0) + 1
+                continue
+
+            # Một token mở rộng thành nhiều term: mỗi document lấy điểm cao nhất. Khi có limit (và OR),
+            # mỗi term mở rộng chỉ đóng góp các posting điểm cao nhất của nó (xấp xỉ, đủ cho autocomplete)
+            depth = limit * 20 if limit and not require_all else None
+            token_scores: Dict[int, float] = {}
+            for term in terms:
+                for doc_id, score in self._term_impacts(term)[:depth]:
+                    if score > token_scores.get(doc_id, 0.0):
+                        token_scores[doc_id] = score
+            for doc_id, score in token_scores.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + score
+                matched[doc_id] = matched.get(doc_id, 0) + 1
+
+        if require_all:
+            scores = {doc_id: score for doc_id, score in scores.items() if matched[doc_id] == len(tokens)}
+
+        key = lambda x: (-x[1], x[0])
+        if limit:
+            return heapq.nsmallest(limit, scores.items(), key=key)
+        return sorted(scores.items(), key=key)
@@ -0,0 +1,339 @@
+"""
+Module DataLoader đọc dữ liệu từ SQLite (build bởi make-assets) thay vì parse các file JSON:
+jobs, aliases, requirements và chi tiết knowledge.txt nằm trong các bảng có index,
+kèm bảng FTS5 trên tên, aliases và description của jobs
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from data_loader import DataLoader
+from job_store import JobStore
+from search_index import BM25Index, query_tokens
+
+SCHEMA_VERSION = 1
+JOB_KEYS = ("url", "name", "description", "other_name", "essential_skill", "optional_skill",
+            "essential_knowledge", "optional_knowledge")
+REQUIREMENT_KINDS = ("essential_skill", "optional_skill", "essential_knowledge", "optional_knowledge")
+
+
+def _file_hash(path: str) -> Optional[str]:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def _jobs_source(data_dir: str) -> str:
+    """File jobs mà DataLoader sẽ load (data.ndjson nếu còn mới, nếu không thì data.json)"""
+    if DataLoader._ndjson_is_current(os.path.join(data_dir, "assets/data.ndjson"),
+                                     os.path.join(data_dir, "assets/data.json")):
+        return "assets/data.ndjson"
+    return "assets/data.json"
+
+
+def build_database(data_dir: str = ".", db_path: str = "assets/career_data.sqlite3") -> int:
+    """
+    Build database SQLite từ các file trong assets/ (ghi file tạm rồi thay thế)
+
+    Args:
+        data_dir: Thư mục gốc chứa assets/
+        db_path: Đường dẫn database (tương đối với data_dir)
+
+    Returns:
+        Số jobs đã ghi
+    """
+    loader = DataLoader(data_dir)
+    jobs_file = _jobs_source(data_dir)
+    if jobs_file == "assets/data.ndjson":
+        jobs = [job for _, job in loader.iter_ndjson(jobs_file)]
+    else:
+        jobs = loader.load_json(jobs_file)
+    skills = loader.load_json("assets/skill.json")
+    knowledge = loader.load_json("assets/knowledge.json")
+    details = loader.load_json("assets/knowledge.txt")
+
+    target = os.path.join(data_dir, db_path)
+    tmp_path = target + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE jobs (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                name_lower TEXT NOT NULL,
+                url TEXT,
+                description TEXT
+            );
+            CREATE INDEX idx_jobs_name ON jobs(name_lower);
+            CREATE TABLE job_aliases (
+                job_id INTEGER NOT NULL REFERENCES jobs(id),
+                position INTEGER NOT NULL,
+                alias TEXT NOT NULL,
+                alias_lower TEXT NOT NULL
+            );
+            CREATE INDEX idx_job_aliases_alias ON job_aliases(alias_lower);
+            CREATE INDEX idx_job_aliases_job ON job_aliases(job_id, position);
+            CREATE TABLE job_requirements (
+                job_id INTEGER NOT NULL REFERENCES jobs(id),
+                kind TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                item TEXT NOT NULL,
+                item_lower TEXT NOT NULL
+            );
+            CREATE INDEX idx_job_requirements_job ON job_requirements(job_id, kind, position);
+            CREATE INDEX idx_job_requirements_item ON job_requirements(item_lower);
+            CREATE TABLE items (type TEXT NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL);
+            CREATE INDEX idx_items_type ON items(type, position);
+            CREATE TABLE knowledge_details (
+                skill_lower TEXT PRIMARY KEY,
+                skill TEXT NOT NULL,
+                level INTEGER NOT NULL
+            );
+            CREATE TABLE knowledge_links (
+                skill_lower TEXT NOT NULL REFERENCES knowledge_details(skill_lower),
+                kind TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                item TEXT NOT NULL
+            );
+            CREATE INDEX idx_knowledge_links_skill ON knowledge_links(skill_lower, kind, position);
+            CREATE VIRTUAL TABLE jobs_fts USING fts5(name, aliases, description);
+        """)
+
+        for job_id, job in enumerate(jobs, 1):
+            aliases = job.get("other_name", [])
+            conn.execute("INSERT INTO jobs VALUES (?, ?, ?, ?, ?)",
+                         (job_id, job["name"], job["name"].lower(), job.get("url"), job.get("description")))
+            conn.executemany("INSERT INTO job_aliases VALUES (?, ?, ?, ?)",
+                             [(job_id, i, alias, alias.lower()) for i, alias in enumerate(aliases)])
+            conn.executemany("INSERT INTO job_requirements VALUES (?, ?, ?, ?, ?)",
+                             [(job_id, kind, i, item, item.lower())
+                              for kind in REQUIREMENT_KINDS for i, item in enumerate(job.get(kind, []))])
+            conn.execute("INSERT INTO jobs_fts(rowid, name, aliases, description) VALUES (?, ?, ?, ?)",
+                         (job_id, job["name"], "\n".join(aliases), job.get("description", "")))
+
+        conn.executemany("INSERT INTO items VALUES ('skill', ?, ?)", list(enumerate(skills)))
+        conn.executemany("INSERT INTO items VALUES ('knowledge', ?, ?)", list(enumerate(knowledge)))
+
+        for item in details:
+            skill_lower = item["skill"].lower()
+            conn.execute("INSERT OR REPLACE INTO knowledge_details VALUES (?, ?, ?)",
+                         (skill_lower, item["skill"], item["level"]))
+            conn.execute("DELETE FROM knowledge_links WHERE skill_lower = ?", (skill_lower,))
+            conn.executemany("INSERT INTO knowledge_links VALUES (?, ?, ?, ?)",
+                             [(skill_lower, kind, i, value)
+                              for kind in ("detailed", "prerequisites") for i, value in enumerate(item[kind])])
+
+        # Hash của file nguồn: để kiểm tra các artifact khác (base roadmaps, pregenerated) còn khớp không
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("schema_version", str(SCHEMA_VERSION)),
+            ("knowledge_hash", _file_hash(os.path.join(data_dir, "assets/knowledge.txt"))),
+            ("data_file", jobs_file),
+            ("data_hash", _file_hash(os.path.join(data_dir, jobs_file)))
+        ])
+        conn.commit()
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, target)
+    return len(jobs)
+
+
+class SQLiteDataLoader(DataLoader):
+    """DataLoader đọc từ database SQLite chỉ đọc (nhiều instance app có thể dùng chung một file)"""
+
+    def __init__(self, data_dir: str = ".", db_path: str = "assets/career_data.sqlite3"):
+        """
+        Khởi tạo SQLiteDataLoader
+
+        Args:
+            data_dir: Thư mục gốc chứa assets/
+            db_path: Đường dẫn database (tương đối với data_dir)
+        """
+        super().__init__(data_dir)
+        self.db_path = os.path.join(data_dir, db_path)
+        self.data_hash = None
+        self._local = threading.local()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Lấy connection chỉ đọc của thread hiện tại"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            uri = "file:" + os.path.abspath(self.db_path) + "?mode=ro"
+            conn = sqlite3.connect(uri, uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def load_all_data(self):
+        """Load dữ liệu từ database (không parse data.json, skill.json, knowledge.json, knowledge.txt)"""
+        conn = self._connect()
+        if self._meta("schema_version") != str(SCHEMA_VERSION):
+            raise RuntimeError(f"Unsupported database schema in {self.db_path}, rebuild it with make-assets")
+
+        self.skills_data = [row[0] for row in conn.execute(
+            "SELECT name FROM items WHERE type = 'skill' ORDER BY position")]
+        self.knowledge_data = [row[0] for row in conn.execute(
+            "SELECT name FROM items WHERE type = 'knowledge' ORDER BY position")]
+        self.skill_details = self._load_skill_details()
+        self.prerequisite_graph.compile(self.skills_data, self.knowledge_data, self.skill_details)
+        self.knowledge_hash = self._meta("knowledge_hash")
+        self.data_hash = self._meta("data_hash")
+        self.jobs_file = self._meta("data_file") or "assets/data.json"
+        self._build_mapping_tables()
+        self._build_expanded_cache()
+        self.load_jobs()
+        self.base_roadmaps = self._load_base_roadmaps("assets/base_roadmaps.json")
+        self.pregenerated_suggestions = self._load_pregenerated_suggestions("assets/project_suggestions.json")
+
+    def _load_skill_details(self) -> Dict[str, Dict]:
+        details = {}
+        for skill_lower, level in self._connect().execute("SELECT skill_lower, level FROM knowledge_details"):
+            details[skill_lower] = {"level": level, "detailed": [], "prerequisites": []}
+        for skill_lower, kind, item in self._connect().execute(
+                "SELECT skill_lower, kind, item FROM knowledge_links ORDER BY skill_lower, kind, position"):
+            details[skill_lower][kind].append(item)
+        return details
+
+    def _read_job_text(self, job_id: int) -> Dict:
+        row = self._connect().execute("SELECT url, description FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return {"url": row[0], "description": row[1]} if row else {}
+
+    def load_jobs(self):
+        """Load các cột resident của jobs; url/description được đọc theo id khi cần"""
+        self.jobs_loaded.clear()
+        self.jobs_data = []
+        self.job_name_index = {}
+        self.job_other_name_to_canonical = {}
+        self.search_index = None  # Tìm kiếm dùng bảng FTS5
+        self.job_store = JobStore(lazy_loader=self._read_job_text)
+
+        conn = self._connect()
+        records = {job_id: {"name": name, "other_name": [], **{kind: [] for kind in REQUIREMENT_KINDS}}
+                   for job_id, name in conn.execute("SELECT id, name FROM jobs ORDER BY id")}
+        for job_id, alias in conn.execute("SELECT job_id, alias FROM job_aliases ORDER BY job_id, position"):
+            records[job_id]["other_name"].append(alias)
+        for job_id, kind, item in conn.execute(
+                "SELECT job_id, kind, item FROM job_requirements ORDER BY job_id, kind, position"):
+            records[job_id][kind].append(item)
+
+        for job_id, record in records.items():
+            self._add_job(record, job_id, keys=JOB_KEYS)
+        self.jobs_loaded.set()
+
+    def compute_file_hash(self, filename: str) -> str:
+        """Hash của file jobs lấy từ database (file đó không cần tồn tại)"""
+        if filename == self.jobs_file and self.data_hash:
+            return self.data_hash
+        return super().compute_file_hash(filename)
+
+    def get_job_by_name(self, job_name: str) -> Dict:
+        """
+        Lấy thông tin job theo tên chính hoặc other_name (query qua index)
+
+        Args:
+            job_name: Tên công việc
+
+        Returns:
+            Thông tin công việc hoặc None
+        """
+        job_lower = job_name.lower()
+        row = self._connect().execute(
+            "SELECT MIN(job_id) FROM ("
+            " SELECT id AS job_id FROM jobs WHERE name_lower = ?"
+            " UNION ALL SELECT job_id FROM job_aliases WHERE alias_lower = ?)",
+            (job_lower, job_lower)
+        ).fetchone()
+        if not row or row[0] is None or row[0] > len(self.jobs_data):
+            return None
+        return self.jobs_data[row[0] - 1]
+
+    @staticmethod
+    def _fts_query(query: str, require_all: bool = False) -> Optional[str]:
+        """
+        Chuyển text user gõ thành FTS5 query cùng ngữ nghĩa với BM25Index:
+        cùng query_tokens (bỏ stopwords và token prefix quá ngắn), các token kết hợp bằng OR
+        (hoặc AND với require_all), token cuối match như prefix
+        """
+        tokens = query_tokens(query)
+        if not tokens:
+            return None
+        terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+        return (" AND " if require_all else " OR ").join(terms)
+
+    def _ranked_job_search(self, query: str, limit: Optional[int], require_all: bool = False) -> List[Dict]:
+        """
+        Tìm jobs qua FTS5 trên tên, other_names và description, xếp hạng bm25
+        với cùng trọng số field như BM25Index (search_jobs/autocomplete_jobs dùng chung)
+
+        Args:
+            query: Từ khóa tìm kiếm
+            limit: Số kết quả tối đa (None: tất cả)
+            require_all: Document phải match mọi token
+
+        Returns:
+            Danh sách jobs theo điểm giảm dần
+        """
+        fts_query = self._fts_query(query, require_all)
+        if not fts_query:
+            return []
+        weights = BM25Index().field_weights
+        rows = self._connect().execute(
+            "SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ? ORDER BY bm25(jobs_fts, ?, ?, ?), rowid LIMIT ?",
+            (fts_query, weights["name"], weights["aliases"], weights["description"],
+             limit if limit is not None else -1)
+        ).fetchall()
+        return [self.jobs_data[rowid - 1] for (rowid,) in rows if rowid <= len(self.jobs_data)]
+
+
+def is_database_current(data_dir: str = ".", db_path: str = "assets/career_data.sqlite3") -> bool:
+    """
+    Kiểm tra database còn khớp với các file assets không (schema và hash của file jobs, knowledge.txt)
+
+    File assets không tồn tại (chỉ phân phối database) thì không so được hash và database được dùng.
+
+    Args:
+        data_dir: Thư mục gốc chứa assets/
+        db_path: Đường dẫn database (tương đối với data_dir)
+
+    Returns:
+        True nếu dùng được database
+    """
+    path = os.path.join(data_dir, db_path)
+    try:
+        conn = sqlite3.connect("file:" + os.path.abspath(path) + "?mode=ro", uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"Cannot read {db_path} ({e}), loading JSON assets instead")
+        return False
+
+    if meta.get("schema_version") != str(SCHEMA_VERSION):
+        print(f"{db_path} has an unsupported schema, loading JSON assets instead (rebuild it with make-assets)")
+        return False
+    data_file = meta.get("data_file", "assets/data.json")
+    source = _jobs_source(data_dir)
+    if data_file != source and os.path.exists(os.path.join(data_dir, source)):
+        print(f"{db_path} was built from another jobs file, loading JSON assets instead "
+              f"(rebuild it with make-assets --sqlite-only)")
+        return False
+    for key, filename in (("data_hash", data_file), ("knowledge_hash", "assets/knowledge.txt")):
+        current = _file_hash(os.path.join(data_dir, filename))
+        if current is not None and current != meta.get(key):
+            print(f"{db_path} is outdated ({filename} changed), loading JSON assets instead "
+                  f"(rebuild it with make-assets --sqlite-only)")
+            return False
+    return True
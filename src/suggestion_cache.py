@@ -0,0 +1,330 @@
+"""
+Module cache kết quả đề xuất project trên đĩa (SQLite) với TTL và giới hạn LRU,
+hỗ trợ tìm entry gần giống (Jaccard trên knowledge set) qua MinHash/LSH
+"""
+import hashlib
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Optional, Set, Tuple
+
+
+class MinHasher:
+    """Tính MinHash signature và LSH band keys cho một tập string"""
+
+    _PRIME = (1 << 61) - 1
+
+    def __init__(self, num_perm: int = 64, rows_per_band: int = 4, seed: int = 1):
+        """
+        Khởi tạo MinHasher
+
+        Args:
+            num_perm: Số hàm hash (độ dài signature), phải chia hết cho rows_per_band
+            rows_per_band: Số giá trị mỗi band; ngưỡng LSH xấp xỉ (1/bands)^(1/rows)
+            seed: Seed sinh hệ số các hàm hash (cố định để signature ổn định giữa các lần chạy)
+        """
+        if num_perm % rows_per_band:
+            raise ValueError("num_perm must be divisible by rows_per_band")
+        self.num_perm = num_perm
+        self.rows_per_band = rows_per_band
+        rng = random.Random(seed)
+        self._coefficients = [(rng.randrange(1, self._PRIME), rng.randrange(0, self._PRIME))
+                              for _ in range(num_perm)]
+
+    def signature(self, items: Set[str]) -> List[int]:
+        """
+        Tính MinHash signature
+
+        Args:
+            items: Tập phần tử (đã chuẩn hóa, không rỗng)
+
+        Returns:
+            List num_perm giá trị min hash
+        """
+        hashes = [int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+                  for item in items]
+        prime = self._PRIME
+        return [min((a * h + b) % prime for h in hashes) for a, b in self._coefficients]
+
+    def band_keys(self, scope: str, items: Set[str]) -> List[str]:
+        """
+        Tính LSH band keys: hai tập có chung ít nhất một band key là candidate gần giống
+
+        Args:
+            scope: Phạm vi so sánh (vd. job), chỉ các tập cùng scope mới khớp band
+            items: Tập phần tử (đã chuẩn hóa, không rỗng)
+
+        Returns:
+            List band keys (hex)
+        """
+        signature = self.signature(items)
+        keys = []
+        for band, start in enumerate(range(0, self.num_perm, self.rows_per_band)):
+            values = ",".join(str(v) for v in signature[start:start + self.rows_per_band])
+            keys.append(hashlib.sha1(f"{scope}|{band}|{values}".encode("utf-8")).hexdigest())
+        return keys
+
+
+def jaccard_distance(a: Set[str], b: Set[str]) -> float:
+    """Khoảng cách Jaccard 1 - |A ∩ B| / |A ∪ B| (0 nếu cả hai rỗng)"""
+    union = len(a | b)
+    return 1.0 - len(a & b) / union if union else 0.0
+
+
+class SuggestionCache:
+    """Class cache response của LLM theo hash của (model, system instruction, input đã chuẩn hóa)"""
+
+    def __init__(self, db_path: str = "cache/project_suggestions.sqlite3",
+                 ttl_seconds: float = 7 * 24 * 3600,
+                 max_entries: int = 1000,
+                 max_jaccard_distance: float = 0.0):
+        """
+        Khởi tạo SuggestionCache
+
+        Args:
+            db_path: Đường dẫn file SQLite (thư mục được tạo nếu chưa có)
+            ttl_seconds: Thời gian sống của một entry (None: không hết hạn)
+            max_entries: Số entry tối đa, vượt quá sẽ xóa entry ít được dùng gần đây nhất
+            max_jaccard_distance: Khoảng cách Jaccard tối đa giữa hai knowledge set để dùng lại
+                entry của cùng job (0: chỉ khớp chính xác)
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_jaccard_distance = max_jaccard_distance
+        self.min_hasher = MinHasher()
+
+        # Mỗi thread (GUI threads) dùng connection riêng, SQLite WAL lo việc khóa giữa writers
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.near_hits = 0
+
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS suggestions ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_suggestions_last_access "
+                         "ON suggestions(last_access)")
+            # Knowledge set và LSH bands của từng entry (xóa theo entry qua ON DELETE CASCADE)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS suggestion_sets ("
+                " key TEXT PRIMARY KEY REFERENCES suggestions(key) ON DELETE CASCADE,"
+                " knowledge TEXT NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS suggestion_bands ("
+                " band TEXT NOT NULL,"
+                " key TEXT NOT NULL REFERENCES suggestions(key) ON DELETE CASCADE)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_suggestion_bands_band ON suggestion_bands(band)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_suggestion_bands_key ON suggestion_bands(key)")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Lấy connection của thread hiện tại"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=10000")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model_name: str, system_instruction: str,
+                 job_info: Dict, student_knowledge: List[str]) -> str:
+        """
+        Tạo cache key từ model, system instruction và input đã chuẩn hóa
+
+        Args:
+            model_name: Tên model LLM
+            system_instruction: System instruction gửi kèm request
+            job_info: Dictionary chứa thông tin job từ data.json
+            student_knowledge: Danh sách knowledge mà student đã có
+
+        Returns:
+            SHA-256 hex digest
+        """
+        normalized = SuggestionCache._normalize_scope(model_name, system_instruction, job_info)
+        normalized["student_knowledge"] = sorted(set(k.lower() for k in student_knowledge))
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def make_scope_key(model_name: str, system_instruction: str, job_info: Dict) -> str:
+        """
+        Tạo key của phạm vi so sánh gần giống (model, system instruction, job), không gồm knowledge
+
+        Args:
+            model_name: Tên model LLM
+            system_instruction: System instruction gửi kèm request
+            job_info: Dictionary chứa thông tin job từ data.json
+
+        Returns:
+            SHA-256 hex digest
+        """
+        normalized = SuggestionCache._normalize_scope(model_name, system_instruction, job_info)
+        payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _normalize_scope(model_name: str, system_instruction: str, job_info: Dict) -> Dict:
+        """Chuẩn hóa phần model, system instruction và job của cache key"""
+        return {
+            "model": model_name,
+            "system_instruction": " ".join(system_instruction.split()),
+            "job": {
+                "name": job_info.get("name", "").lower(),
+                "description": job_info.get("description", ""),
+                "essential_knowledge": sorted(set(k.lower() for k in job_info.get("essential_knowledge", []))),
+                "optional_knowledge": sorted(set(k.lower() for k in job_info.get("optional_knowledge", [])))
+            }
+        }
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Lấy entry theo key (None nếu không có hoặc đã hết hạn)
+
+        Args:
+            key: Cache key từ make_key
+
+        Returns:
+            Dữ liệu đã cache hoặc None
+        """
+        value = self._read_entry(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def _read_entry(self, key: str) -> Optional[Dict]:
+        """Đọc entry và cập nhật last_access (xóa nếu hết hạn), không đụng tới thống kê"""
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute("SELECT value, created_at FROM suggestions WHERE key = ?", (key,)).fetchone()
+
+        if row is not None and self.ttl_seconds is not None and now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM suggestions WHERE key = ?", (key,))
+            row = None
+
+        if row is None:
+            return None
+
+        conn.execute("UPDATE suggestions SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def get_similar(self, scope_key: str, student_knowledge: List[str]) -> Optional[Tuple[Dict, float]]:
+        """
+        Tìm entry cùng scope có knowledge set gần nhất trong max_jaccard_distance
+
+        Candidates lấy qua LSH bands (không quét toàn bộ cache), sau đó so Jaccard chính xác.
+
+        Args:
+            scope_key: Key từ make_scope_key
+            student_knowledge: Danh sách knowledge của student
+
+        Returns:
+            (dữ liệu đã cache, khoảng cách Jaccard) hoặc None
+        """
+        items = set(k.lower() for k in student_knowledge)
+        if self.max_jaccard_distance <= 0 or not items:
+            return None
+
+        bands = self.min_hasher.band_keys(scope_key, items)
+        placeholders = ",".join("?" * len(bands))
+        rows = self._connect().execute(
+            "SELECT DISTINCT s.key, s.knowledge FROM suggestion_bands b "
+            f"JOIN suggestion_sets s ON s.key = b.key WHERE b.band IN ({placeholders})",
+            bands
+        ).fetchall()
+
+        candidates = []
+        for key, knowledge in rows:
+            distance = jaccard_distance(items, set(json.loads(knowledge)))
+            if distance <= self.max_jaccard_distance:
+                candidates.append((distance, key))
+
+        # Entry gần nhất còn hạn; lookup exact đã tính miss nên ở đây chỉ tăng near_hits
+        for distance, key in sorted(candidates):
+            value = self._read_entry(key)
+            if value is not None:
+                with self._stats_lock:
+                    self.near_hits += 1
+                return value, distance
+        return None
+
+    def set(self, key: str, value: Dict, scope_key: Optional[str] = None,
+            student_knowledge: Optional[List[str]] = None):
+        """
+        Lưu entry vào cache, sau đó xóa entries hết hạn và entries vượt giới hạn LRU
+
+        Args:
+            key: Cache key từ make_key
+            value: Dữ liệu cần cache (JSON serializable)
+            scope_key: Key từ make_scope_key (cùng student_knowledge để index tìm gần giống)
+            student_knowledge: Danh sách knowledge của request
+        """
+        now = time.time()
+        items = set(k.lower() for k in student_knowledge or [])
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO suggestions (key, value, created_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now, now)
+            )
+            if scope_key and items:
+                conn.execute("INSERT OR REPLACE INTO suggestion_sets (key, knowledge) VALUES (?, ?)",
+                             (key, json.dumps(sorted(items), ensure_ascii=False)))
+                conn.execute("DELETE FROM suggestion_bands WHERE key = ?", (key,))
+                conn.executemany("INSERT INTO suggestion_bands (band, key) VALUES (?, ?)",
+                                 [(band, key) for band in self.min_hasher.band_keys(scope_key, items)])
+            if self.ttl_seconds is not None:
+                conn.execute("DELETE FROM suggestions WHERE created_at < ?", (now - self.ttl_seconds,))
+            if self.max_entries is not None:
+                conn.execute(
+                    "DELETE FROM suggestions WHERE key NOT IN "
+                    "(SELECT key FROM suggestions ORDER BY last_access DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        """Xóa toàn bộ cache"""
+        self._connect().execute("DELETE FROM suggestions")
+
+    def get_stats(self) -> Dict:
+        """
+        Lấy thống kê cache
+
+        Returns:
+            Dictionary {"hits", "misses", "near_hits", "hit_rate", "entries"}
+        """
+        entries = self._connect().execute("SELECT COUNT(*) FROM suggestions").fetchone()[0]
+        with self._stats_lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "near_hits": self.near_hits,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+                "entries": entries
+            }
@@ -0,0 +1,10 @@
+"""
+Cấu hình pytest: thêm src/ vào sys.path (giống benchmarks/)
+
+Chạy từ thư mục gốc của project:
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
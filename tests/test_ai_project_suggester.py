@@ -0,0 +1,69 @@
+"""
+Test AIProjectSuggester.suggest_projects_concurrently với StubBackend (không cần API key)
+"""
+import threading
+import time
+
+from ai_project_suggester import AIProjectSuggester
+from llm_backend import StubBackend, default_stub_responder
+
+JOBS = [
+    {"name": f"job {i}", "description": f"Job number {i}", "essential_knowledge": [f"skill {i}"],
+     "optional_knowledge": []}
+    for i in range(4)
+]
+
+
+class CountingBackend(StubBackend):
+    """StubBackend đếm số request chạy đồng thời"""
+
+    def __init__(self, latency: float):
+        super().__init__(latency=latency)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def generate(self, model, prompt, config):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            return super().generate(model, prompt, config)
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def make_suggester(backend) -> AIProjectSuggester:
+    return AIProjectSuggester(backend=backend, use_pregenerated=False, request_deadline=30.0)
+
+
+def test_results_keep_input_order_and_concurrency_is_bounded():
+    backend = CountingBackend(latency=0.1)
+    suggester = make_suggester(backend)
+    received = []
+
+    results = suggester.suggest_projects_concurrently(
+        JOBS, ["Python"], max_concurrency=2, timeout=10.0,
+        on_result=lambda index, job, data: received.append(index))
+
+    assert all("error" not in result for result in results)
+    assert [result["job_name"] for result in results] == [job["name"] for job in JOBS]
+    assert sorted(received) == list(range(len(JOBS)))
+    assert backend.max_active <= 2
+
+
+def test_slow_requests_time_out():
+    def responder(model, prompt, config):
+        if "job 1" in prompt:
+            time.sleep(2.0)
+        return default_stub_responder(model, prompt, config)
+
+    suggester = make_suggester(StubBackend(responder=responder))
+    start = time.monotonic()
+    results = suggester.suggest_projects_concurrently(JOBS, ["Python"], max_concurrency=4, timeout=0.5)
+    elapsed = time.monotonic() - start
+
+    assert "timed out" in results[1]["error"]
+    assert all("error" not in result for i, result in enumerate(results) if i != 1)
+    assert elapsed < 1.5
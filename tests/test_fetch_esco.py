@@ -0,0 +1,104 @@
+"""
+Test EscoCrawler chạy offline với FixtureServer phát lại cache response đã ghi
+"""
+import asyncio
+import importlib.util
+import json
+import os
+
+import pytest
+
+spec = importlib.util.spec_from_file_location(
+    "fetch_esco", os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'make-assets', 'fetch-esco.py'))
+fetch_esco = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(fetch_esco)
+
+ROOT = "http://data.europa.eu/esco/isco/C25"
+
+
+def concept(uri: str, children: list) -> dict:
+    return {"_embedded": {uri: {"uri": uri, "_links": {"narrowerConcept": [{"uri": c} for c in children]}}}}
+
+
+def occupation(uri: str, title: str) -> dict:
+    return {"_embedded": {"occupation " + uri: {
+        "uri": uri,
+        "title": title,
+        "description": {"en": {"literal": f"{title} description"}},
+        "alternativeLabel": {"en": [f"{title} alias"]},
+        "_links": {
+            "hasEssentialSkill": [
+                {"title": "Python", "skillType": fetch_esco.KNOWLEDGE_SKILL_TYPE},
+                {"title": "debug software"}
+            ],
+            "hasOptionalSkill": [{"title": "SQL", "skillType": fetch_esco.KNOWLEDGE_SKILL_TYPE}]
+        }
+    }}}
+
+
+@pytest.fixture
+def recorded_cache(tmp_path):
+    """Cache của một cây ISCO nhỏ: C25 -> C251, C252; hai nhánh cùng trỏ tới occupation 'shared'"""
+    responses = {
+        ROOT: concept(ROOT, [ROOT + "1", ROOT + "2"]),
+        ROOT + "1": concept(ROOT + "1", ["occ/developer", "occ/shared"]),
+        ROOT + "2": concept(ROOT + "2", ["occ/tester", "occ/shared"]),
+        "occ/developer": occupation("occ/developer", "software developer"),
+        "occ/tester": occupation("occ/tester", "software tester"),
+        "occ/shared": occupation("occ/shared", "ICT consultant"),
+    }
+    cache_dir = tmp_path / "recorded"
+    cache_dir.mkdir()
+    for uri, response in responses.items():
+        with open(fetch_esco.cache_path(str(cache_dir), uri), 'w', encoding='utf-8') as file:
+            json.dump({"uri": uri, "response": response}, file)
+    return cache_dir
+
+
+@pytest.fixture
+def fixture_server(recorded_cache):
+    server = fetch_esco.FixtureServer(str(recorded_cache), port=0).start()
+    yield server
+    server.stop()
+
+
+def crawl(crawler) -> list:
+    occupations = []
+    found = asyncio.run(crawler.crawl(ROOT, occupations.append))
+    assert found == len(occupations)
+    return occupations
+
+
+def test_crawl_replays_fixture(fixture_server, tmp_path):
+    crawler = fetch_esco.EscoCrawler(fixture_server.url, str(tmp_path / "cache"), concurrency=4, max_attempts=1)
+    occupations = crawl(crawler)
+
+    assert sorted(o["name"] for o in occupations) == ["ICT consultant", "software developer", "software tester"]
+    assert crawler.stats["duplicates"] == 1
+    assert crawler.stats["failures"] == 0
+    assert fixture_server.request_count == 6
+
+    developer = next(o for o in occupations if o["name"] == "software developer")
+    assert developer["other_name"] == ["software developer alias"]
+    assert developer["essential_knowledge"] == ["Python"]
+    assert developer["essential_skill"] == ["debug software"]
+    assert developer["optional_knowledge"] == ["SQL"]
+
+
+def test_rerun_uses_cache(fixture_server, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    crawl(fetch_esco.EscoCrawler(fixture_server.url, cache_dir, max_attempts=1))
+    requests = fixture_server.request_count
+
+    crawler = fetch_esco.EscoCrawler(fixture_server.url, cache_dir, max_attempts=1)
+    assert len(crawl(crawler)) == 3
+    assert fixture_server.request_count == requests
+    assert crawler.stats["cache_hits"] == 6
+
+
+def test_missing_response_counts_as_failure(fixture_server, recorded_cache, tmp_path):
+    os.remove(fetch_esco.cache_path(str(recorded_cache), "occ/tester"))
+    crawler = fetch_esco.EscoCrawler(fixture_server.url, str(tmp_path / "cache"), max_attempts=1)
+
+    assert sorted(o["name"] for o in crawl(crawler)) == ["ICT consultant", "software developer"]
+    assert crawler.stats["failures"] == 1
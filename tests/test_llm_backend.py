@@ -0,0 +1,85 @@
+"""
+Test StubLLMServer + HTTPBackend qua ResilientLLMClient (retry và model fallback khi server lỗi)
+"""
+import json
+
+import pytest
+
+from llm_backend import GenerationConfig, HTTPBackend, StubBackend, StubLLMServer
+from llm_resilience import LLMUnavailableError, ResilientLLMClient
+
+MODELS = [("primary", GenerationConfig()), ("fallback", GenerationConfig())]
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def start(**kwargs) -> StubLLMServer:
+        server = StubLLMServer(port=0, **kwargs).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.stop()
+
+
+def make_client(server: StubLLMServer, **kwargs) -> ResilientLLMClient:
+    options = dict(max_attempts=5, base_delay=0.0, max_delay=0.0, deadline=10.0, failure_threshold=100)
+    options.update(kwargs)
+    return ResilientLLMClient(HTTPBackend(server.url, timeout=5.0), MODELS, **options)
+
+
+def test_generate_retries_injected_failures(server_factory):
+    server = server_factory(failure_rate=0.5, seed=1)
+    client = make_client(server)
+    try:
+        for _ in range(10):
+            response = json.loads(client.generate("prompt"))
+            assert response["project_suggestions"]
+    finally:
+        client.close()
+    assert server.failure_count > 0
+    assert server.request_count == server.failure_count + 10
+
+
+def test_stream_matches_generate(server_factory):
+    server = server_factory(backend=StubBackend(chunk_size=16))
+    client = make_client(server)
+    try:
+        attempt_info = {}
+        chunks = list(client.stream("prompt", attempt_info=attempt_info))
+        assert len(chunks) > 1
+        assert "".join(chunks) == client.generate("prompt")
+        assert attempt_info["model"] == "primary"
+    finally:
+        client.close()
+
+
+def test_generate_fails_when_every_request_fails(server_factory):
+    server = server_factory(failure_rate=1.0)
+    client = make_client(server, max_attempts=2)
+    try:
+        with pytest.raises(LLMUnavailableError):
+            client.generate("prompt")
+    finally:
+        client.close()
+    # Mỗi model được thử max_attempts lần
+    assert server.request_count == 2 * len(MODELS)
+
+
+def test_falls_back_to_next_model(server_factory):
+    def responder(model: str, prompt: str, config: GenerationConfig) -> str:
+        if model == "primary":
+            raise RuntimeError("primary overloaded")
+        return "from " + model
+
+    server = server_factory(backend=StubBackend(responder=responder))
+    client = make_client(server, max_attempts=1)
+    try:
+        attempt_info = {}
+        assert client.generate("prompt", attempt_info=attempt_info) == "from fallback"
+        assert attempt_info["model"] == "fallback"
+    finally:
+        client.close()